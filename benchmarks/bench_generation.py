@@ -0,0 +1,285 @@
+"""
+Benchmark of building strategies for, and generating examples of, requests to
+every operation of a selection of API schemas.
+
+Run from the root of the repository with:
+
+``python benchmarks/bench_generation.py [-n N] [-o RESULTS] [--compare OLD]``
+
+Each of the schemas bundled with the tests is loaded, along with synthetic
+schemas with many operations, and for each the time taken to load the schema,
+build the strategy for each operation, and draw ``N`` examples per operation
+is measured, along with the peak memory allocated while doing so. Results can
+be written to a JSON file, and compared against those of an earlier run to
+spot regressions between commits.
+"""
+import sys
+import argparse
+import json
+import os.path as osp
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import hypothesis
+
+sys.path.insert(0, osp.dirname(osp.dirname(osp.abspath(__file__))))
+
+# The path needs to be set up before the package can be imported.
+# pylint: disable=wrong-import-position
+from swaggerconformance.client import Client
+from swaggerconformance.strategies import StrategyFactory
+from swaggerconformance._generation import draw_examples
+
+
+# Increment this whenever the format of results files changes.
+RESULTS_FORMAT = 1
+
+TEST_SCHEMA_DIR = osp.join(osp.dirname(osp.dirname(osp.abspath(__file__))),
+                           'tests', 'test_schemas')
+BUNDLED_SCHEMAS = ['petstore.json', 'uber.json',
+                   'all_constraints_schema.json', 'full_put_schema.json']
+
+
+def main(raw_args):
+    """Run the benchmark with the supplied command line args."""
+    parser = argparse.ArgumentParser(
+        prog='python benchmarks/bench_generation.py',
+        description='Benchmark of strategy building and example generation.')
+    parser.add_argument('-n', '--num-examples', type=int, default=20,
+                        help='number of examples to draw per operation')
+    parser.add_argument('-s', '--synthetic', type=int, action='append',
+                        metavar='NUM_OPERATIONS',
+                        help='add a synthetic schema with this many '
+                             'operations (repeatable, default 200)')
+    parser.add_argument('-o', '--output', metavar='RESULTS',
+                        help='write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='OLD_RESULTS',
+                        help='compare against results from an earlier run, '
+                             'failing if any schema has regressed')
+    parser.add_argument('--threshold', type=float, default=10,
+                        help='percentage change counted as a regression')
+    args = parser.parse_args(raw_args)
+
+    results = run_benchmarks(args.num_examples, args.synthetic or [200])
+    print(report(results))
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as results_file:
+            json.dump(results, results_file, indent=2, sort_keys=True)
+
+    if args.compare is not None:
+        with open(args.compare, encoding='utf-8') as results_file:
+            old_results = json.load(results_file)
+        if old_results.get("format") != RESULTS_FORMAT:
+            raise ValueError("Unsupported results format {!r} in: {!r}".format(
+                old_results.get("format"), args.compare))
+        comparison, regressions = compare(old_results, results,
+                                          args.threshold)
+        print(comparison)
+        if len(regressions) > 0:
+            raise Exception("Regressed beyond {}%: {}".format(
+                args.threshold, ', '.join(regressions)))
+
+
+def run_benchmarks(num_examples, synthetic_sizes):
+    """Benchmark each bundled schema and a synthetic schema of each size.
+
+    :rtype: dict
+    """
+    schemas = {name: osp.join(TEST_SCHEMA_DIR, name)
+               for name in BUNDLED_SCHEMAS}
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for num_operations in synthetic_sizes:
+            name = 'synthetic-{}.json'.format(num_operations)
+            schemas[name] = osp.join(temp_dir, name)
+            with open(schemas[name], 'w', encoding='utf-8') as schema_file:
+                json.dump(synthetic_schema(num_operations), schema_file)
+
+        for name, path in sorted(schemas.items()):
+            print("Benchmarking {}...".format(name), file=sys.stderr)
+            results[name] = benchmark_schema(path, num_examples)
+
+    return {"format": RESULTS_FORMAT,
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "hypothesis": hypothesis.__version__,
+            "num_examples": num_examples,
+            "schemas": results}
+
+
+def benchmark_schema(schema_path, num_examples):
+    """Time loading a schema, building strategies for each operation, and
+    drawing examples from them, then measure the peak memory allocated doing
+    so all over again.
+
+    Memory is traced in a separate pass so tracing doesn't skew the timings.
+
+    :rtype: dict
+    """
+    timings = _generate(schema_path, num_examples)
+
+    tracemalloc.start()
+    try:
+        _generate(schema_path, num_examples)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings["peak_memory"] = peak_memory
+    timings["examples_per_second"] = (timings["examples"] /
+                                      timings["draw_seconds"])
+    return timings
+
+
+def _generate(schema_path, num_examples):
+    start_time = time.perf_counter()
+    client = Client(schema_path)
+    load_time = time.perf_counter()
+
+    value_factory = StrategyFactory()
+    strategies = [operation.parameters_strategy(value_factory)
+                  for operation in client.api.operations()]
+    build_time = time.perf_counter()
+
+    examples = sum(len(draw_examples(strategy, num_examples))
+                   for strategy in strategies)
+    draw_time = time.perf_counter()
+
+    return {"operations": len(strategies),
+            "examples": examples,
+            "load_seconds": load_time - start_time,
+            "build_seconds": build_time - load_time,
+            "draw_seconds": draw_time - build_time}
+
+
+def synthetic_schema(num_operations):
+    """A schema with the given number of operations, spread across GET and PUT
+    on paths sharing a handful of models, with a mix of parameter types and
+    constraints.
+
+    :rtype: dict
+    """
+    definitions = {
+        "Item": {
+            "type": "object",
+            "required": ["name", "count"],
+            "properties": {
+                "name": {"type": "string", "minLength": 1, "maxLength": 40},
+                "count": {"type": "integer", "minimum": 0, "maximum": 1000},
+                "ratio": {"type": "number", "minimum": 0, "maximum": 1,
+                          "exclusiveMinimum": True},
+                "code": {"type": "string", "pattern": "^[A-Z]{3}-[0-9]{4}$"},
+                "tags": {"type": "array", "maxItems": 5,
+                         "items": {"type": "string",
+                                   "enum": ["red", "green", "blue"]}},
+                "created": {"type": "string", "format": "date-time"},
+            },
+        },
+        "Group": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "string", "format": "uuid"},
+                "items": {"type": "array", "maxItems": 3,
+                          "items": {"$ref": "#/definitions/Item"}},
+            },
+        },
+    }
+    responses = {"200": {"description": "Success"}}
+    paths = {}
+    for index in range((num_operations + 1) // 2):
+        model = "Item" if index % 2 == 0 else "Group"
+        path_param = {"name": "id", "in": "path", "required": True,
+                      "type": "string", "maxLength": 20}
+        query_param = {"name": "limit", "in": "query", "type": "integer",
+                       "minimum": 1, "maximum": 100}
+        paths["/resource{}/{{id}}".format(index)] = {
+            "get": {"operationId": "get{}".format(index),
+                    "parameters": [path_param, query_param],
+                    "responses": responses},
+            "put": {"operationId": "put{}".format(index),
+                    "parameters": [path_param,
+                                   {"name": "body", "in": "body",
+                                    "required": True,
+                                    "schema": {"$ref": "#/definitions/" +
+                                                       model}}],
+                    "responses": responses},
+        }
+        if 2 * index + 1 == num_operations:
+            del paths["/resource{}/{{id}}".format(index)]["put"]
+
+    return {"swagger": "2.0",
+            "info": {"title": "Synthetic API", "version": "1.0"},
+            "host": "127.0.0.1:5000",
+            "basePath": "/api",
+            "schemes": ["http"],
+            "consumes": ["application/json"],
+            "produces": ["application/json"],
+            "paths": paths,
+            "definitions": definitions}
+
+
+def report(results):
+    """Human readable table of benchmark results.
+
+    :rtype: str
+    """
+    lines = ["{:<30} {:>6} {:>9} {:>9} {:>9} {:>10} {:>10}".format(
+        "schema", "ops", "load (s)", "build (s)", "draw (s)", "examples/s",
+        "peak (MB)")]
+    for name, timings in sorted(results["schemas"].items()):
+        lines.append(
+            "{:<30} {:>6} {:>9.3f} {:>9.3f} {:>9.3f} {:>10.1f} {:>10.2f}"
+            .format(name, timings["operations"], timings["load_seconds"],
+                    timings["build_seconds"], timings["draw_seconds"],
+                    timings["examples_per_second"],
+                    timings["peak_memory"] / 2 ** 20))
+
+    return '\n'.join(lines)
+
+
+def compare(old_results, new_results, threshold):
+    """Compare the examples per second and peak memory of each schema against
+    an earlier run.
+
+    :return: A human readable table of the changes, and the names of schemas
+             which regressed by more than the threshold percentage.
+    :rtype: tuple(str, list(str))
+    """
+    lines = ["Compared with {} ({} examples per operation):".format(
+        old_results.get("commit") or "earlier run",
+        old_results["num_examples"])]
+    regressions = []
+    for name, new in sorted(new_results["schemas"].items()):
+        old = old_results["schemas"].get(name)
+        if old is None:
+            continue
+        speed_change = _percent_change(old["examples_per_second"],
+                                       new["examples_per_second"])
+        memory_change = _percent_change(old["peak_memory"],
+                                        new["peak_memory"])
+        lines.append("{:<30} examples/s {:>+7.1f}%  peak memory {:>+7.1f}%"
+                     .format(name, speed_change, memory_change))
+        if speed_change < -threshold or memory_change > threshold:
+            regressions.append(name)
+
+    return '\n'.join(lines), regressions
+
+
+def _percent_change(old, new):
+    return 100 * (new - old) / old
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+            cwd=osp.dirname(osp.abspath(__file__))).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
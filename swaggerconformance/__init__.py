@@ -2,12 +2,17 @@
 This package enables easy testing of Swagger Spec defined APIs using property
 based tests and by generating paramter values meeting the specification.
 
-This top-level package exposes functions for basic API tests just requiring
-access to the API schema.
+This top-level package exposes functions for basic API tests, and load tests,
+just requiring access to the API schema.
 
 Subpackages and modules then provide classes and functions for finer grain
-control over value generation and test procedures.
+control over value generation and test procedures - including the `aio`
+module for testing from an `asyncio` event loop, which needs importing
+directly.
 """
 from ._basictests import api_conformance_test, operation_conformance_test
+from ._loadtest import api_load_test
+from ._corpus import generate_corpus, replay_corpus
 
-__all__ = ["api_conformance_test", "operation_conformance_test"]
+__all__ = ["api_conformance_test", "operation_conformance_test",
+           "api_load_test", "generate_corpus", "replay_corpus"]
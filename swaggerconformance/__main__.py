@@ -1,18 +1,48 @@
 """
 Allow running the package from the command line directly with:
 
-``python -m swaggerconformance <url-or-path-to-schema> [-n num-tests-per-op]``
+``python -m swaggerconformance <url-or-path-to-schema> [-n N] [-j N]``
 
-to run the basic conformance test of the API defined by the given schema.
+to run the basic conformance test of the API defined by the given schema, or:
+
+``python -m swaggerconformance load <url-or-path-to-schema> [-d SECS] [-c N]``
+
+to run a load test of the API with values generated in the same way, or:
+
+``python -m swaggerconformance generate-corpus <schema> <corpus-path> [-n N]``
+
+``python -m swaggerconformance replay <schema> <corpus-path> [-j N]``
+
+to generate a corpus of examples, and replay them against the API later, or:
+
+``python -m swaggerconformance merge <output-path> <summary-path>...``
+
+to merge the summaries written by separate shards of a conformance test, or:
+
+``python -m swaggerconformance stub <url-or-path-to-schema> [-p PORT]``
+
+to run a local stand-in for the API's server, to test against with
+``--server``.
 """
 import sys
 import argparse
 
-from swaggerconformance import api_conformance_test
+from swaggerconformance import (api_conformance_test, api_load_test,
+                                generate_corpus, replay_corpus)
+from swaggerconformance.instrumentation import Timings
+from swaggerconformance.latency import LatencyBudget, LatencyBudgets
+from swaggerconformance.results import RunSummary
+from swaggerconformance.strategies import StrategyFactory
+from swaggerconformance.stubserver import StubServer
 
 
 def main(raw_args):
-    """Run a basic API conformance test with the supplied command line args."""
+    """Run a basic API conformance test with the supplied command line args,
+    or another command if the first argument names one."""
+    if len(raw_args) > 0 and raw_args[0] in _COMMANDS:
+        _COMMANDS[raw_args[0]](raw_args[1:])
+        return
+
     parser = argparse.ArgumentParser(
         prog='python -m swaggerconformance',
         description='Basic Swagger-defined API conformance test.')
@@ -20,9 +50,350 @@ def main(raw_args):
     parser.add_argument('-n', dest='num_tests_per_op', metavar='N', type=int,
                         default=20,
                         help="number of tests to run per API operation")
+    parser.add_argument('-j', '--workers', dest='workers', metavar='N',
+                        type=int, default=1,
+                        help="number of API operations to test concurrently")
+    parser.add_argument('--schema-cache', dest='schema_cache_dir',
+                        metavar='DIR', default=None,
+                        help="directory to cache the parsed schema in, "
+                        "which must only be writable by trusted users")
+    parser.add_argument('--validate-responses', dest='validate_responses',
+                        action='store_true',
+                        help="validate response bodies against their schemas")
+    parser.add_argument('--results-log', dest='results_sink', metavar='FILE',
+                        default=None,
+                        help="file to stream the result of each request to")
+    parser.add_argument('--timings', dest='timings', action='store_true',
+                        help="print how long each phase of testing took")
+    parser.add_argument('--time-budget', dest='time_budget', metavar='SECS',
+                        type=float, default=None,
+                        help="fit as many tests as possible into this time, "
+                             "running at most N per API operation")
+    parser.add_argument('--min-tests', dest='min_tests_per_op', metavar='N',
+                        type=int, default=5,
+                        help="number of tests to run per API operation at "
+                             "least, with a time budget")
+    parser.add_argument('--weight', dest='operation_weights',
+                        metavar='OPERATION_ID=WEIGHT', type=_operation_weight,
+                        action='append', default=[],
+                        help="relative share of the time budget for an API "
+                             "operation, 1 by default")
+    parser.add_argument('--shard-index', dest='shard_index', metavar='I',
+                        type=int, default=0,
+                        help="index of the shard of API operations to test")
+    parser.add_argument('--shard-count', dest='shard_count', metavar='N',
+                        type=int, default=1,
+                        help="number of shards to split API operations into")
+    parser.add_argument('--shard-timings', dest='shard_timings',
+                        metavar='FILE', default=None,
+                        help="summary of a previous run to balance shards by")
+    parser.add_argument('--summary', dest='summary_path', metavar='FILE',
+                        default=None,
+                        help="file to write a summary of each API operation's "
+                             "outcome to")
+    parser.add_argument('--since', dest='since', metavar='FILE', default=None,
+                        help="summary of a previous run, to skip API "
+                             "operations which passed and haven't changed")
+    parser.add_argument('--force', dest='force', action='store_true',
+                        help="test all API operations, even if unchanged")
+    parser.add_argument('--example-database', dest='example_database',
+                        metavar='DIR', default=None,
+                        help="directory to save failing examples in and "
+                             "replay them from")
+    parser.add_argument('--server', dest='server_url', metavar='URL',
+                        default=None,
+                        help="URL of the server to send requests to instead "
+                             "of the one in the schema")
+    parser.add_argument('--latency-budget', dest='latency_budgets',
+                        metavar='[OPERATION_ID:]p95=MS,p99=MS,max=MS',
+                        type=_latency_budget, action='append', default=[],
+                        help="fail API operations whose request latencies "
+                             "exceed any of these limits - all API operations "
+                             "without an OPERATION_ID")
+    parser.add_argument('--latency-budgets', dest='latency_budgets_path',
+                        metavar='FILE', default=None,
+                        help="JSON file of latency budgets per API operation")
+    parser.add_argument('--schema-latency-budgets',
+                        dest='schema_latency_budgets', action='store_true',
+                        help="also apply latency budgets declared in the "
+                             "schema with x-latency-budget extensions")
+    _add_payload_arguments(parser)
+    parsed_args = parser.parse_args(raw_args)
+    timings = Timings() if parsed_args.timings else None
+    try:
+        api_conformance_test(parsed_args.schema_path,
+                             num_tests_per_op=parsed_args.num_tests_per_op,
+                             workers=parsed_args.workers,
+                             schema_cache_dir=parsed_args.schema_cache_dir,
+                             validate_responses=parsed_args.validate_responses,
+                             results_sink=parsed_args.results_sink,
+                             instrumentation=timings,
+                             time_budget=parsed_args.time_budget,
+                             min_tests_per_op=parsed_args.min_tests_per_op,
+                             operation_weights=dict(
+                                 parsed_args.operation_weights),
+                             shard_index=parsed_args.shard_index,
+                             shard_count=parsed_args.shard_count,
+                             shard_timings=parsed_args.shard_timings,
+                             summary_path=parsed_args.summary_path,
+                             since=parsed_args.since,
+                             force=parsed_args.force,
+                             example_database=parsed_args.example_database,
+                             server_url=parsed_args.server_url,
+                             latency_budgets=_latency_budgets(parsed_args),
+                             value_factory=_value_factory(parsed_args))
+    finally:
+        if timings is not None:
+            print(timings.report())
+
+
+def load_main(raw_args):
+    """Run an API load test with the supplied command line args."""
+    parser = argparse.ArgumentParser(
+        prog='python -m swaggerconformance load',
+        description='Swagger-defined API load test.')
+    parser.add_argument('schema_path', help='URL or path to Swagger schema')
+    parser.add_argument('-d', '--duration', dest='duration', metavar='SECS',
+                        type=float, default=60,
+                        help="how long to send requests for")
+    parser.add_argument('-c', '--concurrency', dest='concurrency',
+                        metavar='N', type=int, default=10,
+                        help="maximum number of requests in flight")
+    parser.add_argument('-r', '--rate', dest='rate', metavar='N', type=float,
+                        default=None,
+                        help="target number of requests to send per second")
+    parser.add_argument('-n', dest='num_examples_per_op', metavar='N',
+                        type=int, default=100,
+                        help="number of distinct examples per API operation")
+    parser.add_argument('--schema-cache', dest='schema_cache_dir',
+                        metavar='DIR', default=None,
+                        help="directory to cache the parsed schema in, "
+                        "which must only be writable by trusted users")
+    parser.add_argument('--server', dest='server_url', metavar='URL',
+                        default=None,
+                        help="URL of the server to send requests to instead "
+                             "of the one in the schema")
+    _add_payload_arguments(parser)
+    parsed_args = parser.parse_args(raw_args)
+    results = api_load_test(
+        parsed_args.schema_path,
+        duration=parsed_args.duration,
+        concurrency=parsed_args.concurrency,
+        rate=parsed_args.rate,
+        num_examples_per_op=parsed_args.num_examples_per_op,
+        value_factory=_value_factory(parsed_args),
+        schema_cache_dir=parsed_args.schema_cache_dir,
+        server_url=parsed_args.server_url)
+    print(results.report())
+
+
+def generate_corpus_main(raw_args):
+    """Generate a corpus of examples with the supplied command line args."""
+    parser = argparse.ArgumentParser(
+        prog='python -m swaggerconformance generate-corpus',
+        description='Generate a corpus of Swagger-defined API requests.')
+    parser.add_argument('schema_path', help='URL or path to Swagger schema')
+    parser.add_argument('corpus_path',
+                        help='path to write the corpus to, compressed if it '
+                             'ends in .gz')
+    parser.add_argument('-n', dest='num_examples_per_op', metavar='N',
+                        type=int, default=100,
+                        help="number of examples to generate per operation")
+    parser.add_argument('--schema-cache', dest='schema_cache_dir',
+                        metavar='DIR', default=None,
+                        help="directory to cache the parsed schema in, "
+                        "which must only be writable by trusted users")
+    _add_payload_arguments(parser)
+    parsed_args = parser.parse_args(raw_args)
+    generate_corpus(parsed_args.schema_path, parsed_args.corpus_path,
+                    num_examples_per_op=parsed_args.num_examples_per_op,
+                    value_factory=_value_factory(parsed_args),
+                    schema_cache_dir=parsed_args.schema_cache_dir)
+
+
+def replay_main(raw_args):
+    """Replay a corpus of examples with the supplied command line args."""
+    parser = argparse.ArgumentParser(
+        prog='python -m swaggerconformance replay',
+        description='Replay a corpus of Swagger-defined API requests.')
+    parser.add_argument('schema_path', help='URL or path to Swagger schema')
+    parser.add_argument('corpus_path', help='path of the corpus to replay')
+    parser.add_argument('-j', '--workers', dest='workers', metavar='N',
+                        type=int, default=1,
+                        help="number of examples to replay concurrently")
+    parser.add_argument('--schema-cache', dest='schema_cache_dir',
+                        metavar='DIR', default=None,
+                        help="directory to cache the parsed schema in, "
+                        "which must only be writable by trusted users")
+    parser.add_argument('--validate-responses', dest='validate_responses',
+                        action='store_true',
+                        help="validate response bodies against their schemas")
+    parser.add_argument('--results-log', dest='results_sink', metavar='FILE',
+                        default=None,
+                        help="file to stream the result of each request to")
+    parsed_args = parser.parse_args(raw_args)
+    replay_corpus(parsed_args.schema_path, parsed_args.corpus_path,
+                  workers=parsed_args.workers,
+                  validate_responses=parsed_args.validate_responses,
+                  results_sink=parsed_args.results_sink,
+                  schema_cache_dir=parsed_args.schema_cache_dir)
+
+
+def merge_main(raw_args):
+    """Merge run summaries with the supplied command line args."""
+    parser = argparse.ArgumentParser(
+        prog='python -m swaggerconformance merge',
+        description='Merge summaries of API conformance tests.')
+    parser.add_argument('output_path', help='path to write merged summary to')
+    parser.add_argument('summary_paths', metavar='summary_path', nargs='+',
+                        help='path of a summary to merge')
     parsed_args = parser.parse_args(raw_args)
-    api_conformance_test(parsed_args.schema_path,
-                         num_tests_per_op=parsed_args.num_tests_per_op)
+    summary = RunSummary.merge(RunSummary.load(summary_path)
+                               for summary_path in parsed_args.summary_paths)
+    summary.save(parsed_args.output_path)
+
+    failed = summary.failed()
+    print("{} operation(s) tested, {} failed".format(len(summary.to_dict()),
+                                                     len(failed)))
+    if len(failed) > 0:
+        raise Exception("{} operation(s) failed conformance tests: {}".format(
+            len(failed), ', '.join(failed)))
+
+
+def _operation_weight(raw_arg):
+    """Parse an ``OPERATION_ID=WEIGHT`` argument.
+
+    :rtype: tuple(str, float)
+    """
+    operation_id, separator, weight = raw_arg.rpartition('=')
+    try:
+        if separator == '':
+            raise ValueError(raw_arg)
+        return operation_id, float(weight)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "expected OPERATION_ID=WEIGHT, got: {!r}".format(raw_arg))
+
+
+def _add_payload_arguments(parser):
+    """Add arguments limiting the size of requests generated."""
+    parser.add_argument('--max-request-bytes', dest='max_request_bytes',
+                        metavar='N', type=int, default=None,
+                        help="most bytes the parameter values of a request "
+                             "may take in total, encoded as JSON")
+    parser.add_argument('--max-parameter-bytes', dest='max_parameter_bytes',
+                        metavar='N', type=int, default=None,
+                        help="most bytes each parameter value of a request "
+                             "may take, encoded as JSON")
+
+
+def _value_factory(parsed_args):
+    """Factory generating values within the size limits of the arguments.
+
+    :rtype: StrategyFactory
+    """
+    return StrategyFactory(max_request_bytes=parsed_args.max_request_bytes,
+                           max_parameter_bytes=parsed_args.max_parameter_bytes)
+
+
+def _latency_budget(raw_arg):
+    """Parse an ``[OPERATION_ID:]p95=MS,p99=MS,max=MS`` argument, with any
+    of the limits given.
+
+    :return: The operation ID, or `None` for all operations, and the budget.
+    :rtype: tuple(str or None, LatencyBudget)
+    """
+    operation_id, _, raw_limits = raw_arg.rpartition(':')
+    try:
+        limits = {}
+        for raw_limit in raw_limits.split(','):
+            name, separator, limit = raw_limit.partition('=')
+            if separator == '':
+                raise ValueError(raw_arg)
+            limits[name.strip()] = float(limit)
+        return operation_id or None, LatencyBudget.from_dict(limits)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "expected [OPERATION_ID:]p95=MS,p99=MS,max=MS, got: "
+            "{!r}".format(raw_arg))
+
+
+def _latency_budgets(parsed_args):
+    """Latency budgets declared in the schema if requested, overridden by any
+    in a budget file, overridden in turn by any on the command line.
+
+    The schema is only read again for its budgets if they're requested.
+
+    :return: The budgets, or `None` if none were requested.
+    :rtype: LatencyBudgets or None
+    """
+    if not (parsed_args.schema_latency_budgets or
+            parsed_args.latency_budgets_path is not None or
+            len(parsed_args.latency_budgets) > 0):
+        return None
+
+    budgets = LatencyBudgets()
+    if parsed_args.schema_latency_budgets:
+        budgets = LatencyBudgets.from_schema(parsed_args.schema_path)
+    if parsed_args.latency_budgets_path is not None:
+        budgets = budgets.merged(
+            LatencyBudgets.load(parsed_args.latency_budgets_path))
+    for operation_id, budget in parsed_args.latency_budgets:
+        if operation_id is None:
+            budgets = budgets.merged(LatencyBudgets(default=budget))
+        else:
+            budgets = budgets.merged(
+                LatencyBudgets(operations={operation_id: budget}))
+
+    return budgets
+
+
+def stub_main(raw_args):
+    """Run a stub server with the supplied command line args."""
+    parser = argparse.ArgumentParser(
+        prog='python -m swaggerconformance stub',
+        description='Local stand-in server for a Swagger-defined API.')
+    parser.add_argument('schema_path', help='URL or path to Swagger schema')
+    parser.add_argument('--host', dest='host', default='127.0.0.1',
+                        help="address to listen on")
+    parser.add_argument('-p', '--port', dest='port', type=int, default=8080,
+                        help="port to listen on, or 0 for any free port")
+    parser.add_argument('--latency', dest='latency', metavar='SECS',
+                        type=float, default=0,
+                        help="delay to add to every response")
+    parser.add_argument('--jitter', dest='jitter', metavar='SECS',
+                        type=float, default=0,
+                        help="most random delay to add to each response")
+    parser.add_argument('--error-rate', dest='error_rate', metavar='FRACTION',
+                        type=float, default=0,
+                        help="fraction of requests to answer with an error")
+    parser.add_argument('--seed', dest='seed', type=int, default=None,
+                        help="seed for random delays and errors")
+    parser.add_argument('--schema-cache', dest='schema_cache_dir',
+                        metavar='DIR', default=None,
+                        help="directory to cache the parsed schema in, "
+                        "which must only be writable by trusted users")
+    parsed_args = parser.parse_args(raw_args)
+    server = StubServer(parsed_args.schema_path, host=parsed_args.host,
+                        port=parsed_args.port, latency=parsed_args.latency,
+                        jitter=parsed_args.jitter,
+                        error_rate=parsed_args.error_rate,
+                        seed=parsed_args.seed,
+                        schema_cache_dir=parsed_args.schema_cache_dir)
+    print("Serving stub of API at: {}".format(server.url), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+_COMMANDS = {
+    'load': load_main,
+    'generate-corpus': generate_corpus_main,
+    'replay': replay_main,
+    'merge': merge_main,
+    'stub': stub_main,
+}
 
 
 if __name__ == "__main__":
@@ -2,11 +2,24 @@
 Main high-level entrypoints for validating swagger conformance.
 """
 import logging
+import heapq
+import itertools
+import json
+import queue
+import threading
+import time
 import traceback
+import functools
+import concurrent.futures
 
 import hypothesis
+import hypothesis.database
 
+from ._budget import allocate_examples
+from ._generation import draw_examples
+from ._sharding import shard_operations
 from .client import Client
+from .results import ResultsLog, RunSummary, operation_key
 from .strategies import StrategyFactory
 
 __all__ = ["api_conformance_test", "operation_conformance_test"]
@@ -15,53 +28,532 @@ __all__ = ["api_conformance_test", "operation_conformance_test"]
 log = logging.getLogger(__name__)
 
 
-def api_conformance_test(schema_path, num_tests_per_op=20, cont_on_err=True):
+def api_conformance_test(schema_path, num_tests_per_op=20, cont_on_err=True,  # pylint: disable=too-many-arguments,too-many-locals
+                         workers=1, schema_cache_dir=None,
+                         validate_responses=False, results_sink=None,
+                         instrumentation=None, time_budget=None,
+                         min_tests_per_op=5, operation_weights=None,
+                         shard_index=0, shard_count=1, shard_timings=None,
+                         summary_path=None, since=None, force=False,
+                         example_database=None, server_url=None,
+                         latency_budgets=None, value_factory=None):
     """Basic test of the conformance of the API defined by the given schema.
 
+    If a time budget is given, every operation is first tested with the
+    minimum number of tests to measure how long each test of it takes. The
+    time remaining is then shared out between operations in proportion to
+    their weights, and each is tested further with as many tests as fit in
+    its share, up to ``num_tests_per_op`` in total. Time left over from
+    operations reaching that limit is shared between the others.
+
     :param schema_path: The path to / URL of the schema to validate.
     :type schema_path: str
-    :param num_tests_per_op: How many tests to run of each API operation.
+    :param num_tests_per_op: How many tests to run of each API operation, or
+                             the most to run if there's a time budget.
     :type num_tests_per_op: int
     :param cont_on_err: Validate all operations, or drop out on first error.
     :type cont_on_err: bool
+    :param workers: How many operations to test concurrently.
+    :type workers: int
+    :param schema_cache_dir: Directory to cache the parsed schema in, which
+                             must only be writable by trusted users.
+    :type schema_cache_dir: str or None
+    :param validate_responses: Validate response bodies against their schemas.
+    :type validate_responses: bool
+    :param results_sink: Path of a file, or file-like object, to stream a
+                         JSON record of the result of every request to.
+    :type results_sink: str or file or None
+    :param instrumentation: Receives timings of each phase of testing each
+                            example, such as `instrumentation.Timings`.
+    :type instrumentation: instrumentation.Instrumentation or None
+    :param time_budget: Seconds the whole test should take, or `None` to run
+                        ``num_tests_per_op`` tests of every operation.
+    :type time_budget: float or None
+    :param min_tests_per_op: How many tests to run of each API operation at
+                             least, if there's a time budget.
+    :type min_tests_per_op: int
+    :param operation_weights: Relative share of the time budget for each
+                              operation ID, with operations not included
+                              given a weight of 1.
+    :type operation_weights: dict(str, float) or None
+    :param shard_index: Index of the shard of operations to test, from 0 to
+                        ``shard_count - 1``.
+    :type shard_index: int
+    :param shard_count: How many shards to split the operations between.
+    :type shard_count: int
+    :param shard_timings: Path of a run summary with the time previously
+                          spent testing each operation, to balance shards by.
+    :type shard_timings: str or None
+    :param summary_path: Path to write a summary of the outcome of testing
+                         each operation to, which can be merged with those
+                         of other shards by `results.RunSummary.merge`.
+    :type summary_path: str or None
+    :param since: Path of the summary of a previous run. Operations which
+                  passed in that run, and whose definitions haven't changed
+                  since, are skipped - and carried over to the new summary.
+    :type since: str or None
+    :param force: Test all operations, even those unchanged since the
+                  previous run.
+    :type force: bool
+    :param example_database: Where to save and replay failing examples from -
+                             either an example database, or the path of a
+                             directory to use as one, which may be shared
+                             between runs on different machines.
+    :type example_database: str or hypothesis.database.ExampleDatabase or
+                            None
+    :param server_url: URL of the server to send requests to instead of the
+                       one given in the schema.
+    :type server_url: str or None
+    :param latency_budgets: Budgets for the latencies of requests to each
+                            operation, failing operations which exceed them.
+    :type latency_budgets: latency.LatencyBudgets or None
+    :param value_factory: Factory to generate strategies for values, or
+                          `None` to use the default one.
+    :type value_factory: strategies.StrategyFactory or None
+    """
+    results_log = None if results_sink is None else ResultsLog(results_sink)
+    previous_summary = None if since is None else RunSummary.load(since)
+    summary = RunSummary()
+
+    # Make sure there's a pooled connection available for every worker.
+    try:
+        with Client(schema_path, pool_size=max(workers, 10),
+                    schema_cache_dir=schema_cache_dir,
+                    instrumentation=instrumentation,
+                    server_url=server_url) as client:
+            log.debug("Expanded endpoints as: %r", client.api)
+
+            # Share one factory between all operations, so strategies for
+            # definitions they have in common are only built once.
+            test_operation = _summarized(summary, _latency_budgeted(
+                latency_budgets, functools.partial(
+                    operation_conformance_test, client,
+                    value_factory=(StrategyFactory() if value_factory is None
+                                   else value_factory),
+                    validate_responses=validate_responses,
+                    results_log=results_log, instrumentation=instrumentation,
+                    example_database=example_database)))
+            operations = shard_operations(
+                client.api.operations(), shard_index, shard_count,
+                None if shard_timings is None else
+                RunSummary.load(shard_timings).durations())
+            if previous_summary is not None and not force:
+                operations = _skip_unchanged(operations, previous_summary,
+                                             summary)
+            if time_budget is None:
+                hit_errors = _operations_test(
+                    operations,
+                    functools.partial(test_operation,
+                                      num_tests=num_tests_per_op),
+                    cont_on_err, workers)
+            else:
+                hit_errors = _budgeted_operations_test(
+                    operations, test_operation, cont_on_err, workers,
+                    time_budget, min_tests_per_op, num_tests_per_op,
+                    operation_weights or {})
+    finally:
+        if results_log is not None:
+            results_log.close()
+        if summary_path is not None:
+            summary.save(summary_path)
+
+    if len(hit_errors) > 0:
+        raise Exception("{} operation(s) failed conformance tests - check "
+                        "output in logging and tracebacks below for "
+                        "details\n{}".format(len(hit_errors),
+                                             '\n'.join(hit_errors)))
+
+
+def _skip_unchanged(operations, previous_summary, summary):
+    """Filter out operations which passed in the previous run and haven't
+    changed since, copying their previous outcomes into the new summary.
+
+    :rtype: list(schema.Operation)
+    """
+    unchanged = previous_summary.unchanged_passes(operations)
+    previous_outcomes = previous_summary.to_dict()
+    for operation in unchanged:
+        log.info("Skipping operation unchanged since last run: %r", operation)
+        outcome = previous_outcomes[operation_key(operation)]
+        summary.record(operation, outcome["duration"])
+
+    return [operation for operation in operations
+            if operation not in unchanged]
+
+
+def _summarized(summary, test_operation):
+    """Wrap a function testing an operation, to record the outcome of each
+    test in the run summary."""
+    def summarized_test_operation(operation, **kwargs):
+        """Test an operation, recording the outcome."""
+        start_time = time.monotonic()
+        try:
+            num_tested = test_operation(operation, **kwargs)
+        except Exception as error:
+            summary.record(operation, time.monotonic() - start_time,
+                           ''.join(traceback.format_exception_only(
+                               type(error), error)).strip())
+            raise
+        summary.record(operation, time.monotonic() - start_time)
+        return num_tested
+
+    return summarized_test_operation
+
+
+def _latency_budgeted(latency_budgets, test_operation):
+    """Wrap a function testing an operation, to pass it the latency budget
+    of each operation tested."""
+    if latency_budgets is None:
+        return test_operation
+
+    def latency_budgeted_test_operation(operation, **kwargs):
+        """Test an operation against its latency budget."""
+        return test_operation(operation,
+                              latency_budget=latency_budgets.budget_for(
+                                  operation),
+                              **kwargs)
+
+    return latency_budgeted_test_operation
+
+
+def _budgeted_operations_test(operations, test_operation, cont_on_err,  # pylint: disable=too-many-arguments,too-many-locals
+                              workers, time_budget, min_tests_per_op,
+                              max_tests_per_op, operation_weights):
+    """Test operations with as many tests as fit in the time budget.
+
+    ``test_operation`` is called with each operation and the number of tests
+    to run of it, and returns how many examples were actually tested.
+
+    :rtype: list(str)
+    """
+    deadline = time.monotonic() + time_budget
+    test_durations = {}
+    failed_operations = set()
+
+    def timed_test_operation(operation, num_tests):
+        """Test an operation, measuring how long each example took."""
+        start_time = time.monotonic()
+        try:
+            num_tested = test_operation(operation, num_tests=num_tests)
+        except Exception:
+            failed_operations.add(operation)
+            raise
+        # Fewer examples than asked for may be tested, such as when there are
+        # only a few distinct ones, so share the time between those tested.
+        test_durations[operation] = \
+            (time.monotonic() - start_time) / max(num_tested, 1)
+
+    min_tests_per_op = max(min(min_tests_per_op, max_tests_per_op), 1)
+    hit_errors = _operations_test(
+        operations,
+        functools.partial(timed_test_operation, num_tests=min_tests_per_op),
+        cont_on_err, workers)
+    if time.monotonic() >= deadline:
+        log.warning("Time budget used up testing each operation %d times, "
+                    "so skipping further tests", min_tests_per_op)
+        return hit_errors
+
+    # Share out the time remaining across all the workers.
+    remaining_operations = [operation for operation in operations
+                            if operation in test_durations and
+                            operation not in failed_operations]
+    allocation = allocate_examples(
+        {operation: test_durations[operation]
+         for operation in remaining_operations},
+        {operation: operation_weights.get(operation.id, 1)
+         for operation in remaining_operations},
+        (deadline - time.monotonic()) * workers,
+        max_tests_per_op - min_tests_per_op)
+    log.debug("Allocated further tests as: %r", allocation)
+
+    def further_test_operation(operation):
+        """Test an operation with its allocated tests, if there's time."""
+        if time.monotonic() >= deadline:
+            log.info("Out of time, skipping further tests of: %r", operation)
+            return
+        timed_test_operation(operation, allocation[operation])
+
+    hit_errors.extend(_operations_test(
+        [operation for operation in remaining_operations
+         if allocation[operation] > 0],
+        further_test_operation, cont_on_err, workers))
+
+    return hit_errors
+
+
+def _operations_test(operations, test_operation, cont_on_err, workers):
+    """Test each of the operations by calling ``test_operation`` with it, on a
+    pool of worker threads if there's more than one worker.
+
+    :rtype: list(str)
     """
-    client = Client(schema_path)
-    log.debug("Expanded endpoints as: %r", client.api)
+    if workers > 1:
+        return _parallel_operations_test(operations, test_operation,
+                                         cont_on_err, workers)
+    return _serial_operations_test(operations, test_operation, cont_on_err)
+
+
+def _serial_operations_test(operations, test_operation, cont_on_err):
+    """Test each operation in turn, by calling ``test_operation`` with it.
 
+    :rtype: list(str)
+    """
     hit_errors = []
-    for operation in client.api.operations():
+    for operation in operations:
         try:
-            operation_conformance_test(client, operation, num_tests_per_op)
+            test_operation(operation)
         except Exception:  # pylint: disable=broad-except
             log.exception("Validation failed of operation: %r", operation)
             hit_errors.append(traceback.format_exc())
             if not cont_on_err:
                 raise
 
-    if len(hit_errors) > 0:
-        raise Exception("{} operation(s) failed conformance tests - check "
-                        "output in logging and tracebacks below for "
-                        "details\n{}".format(len(hit_errors),
-                                             '\n'.join(hit_errors)))
+    return hit_errors
+
+
+def _parallel_operations_test(operations, test_operation, cont_on_err,
+                              workers):
+    """Test operations concurrently on a pool of worker threads, by calling
+    ``test_operation`` with each of them.
+
+    `hypothesis` can't be run on several threads at once, so while the
+    workers test operations, the calling thread runs everything they need
+    `hypothesis` for on their behalf - see `operation_conformance_test`.
+
+    If not continuing on errors, work not yet started is cancelled as soon as
+    any operation fails, though operations already being tested will finish.
+
+    :rtype: list(str)
+    """
+    hit_errors = []
+    calls = _CallingThreadCalls()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {calls.submit(pool, test_operation, operation): operation
+                   for operation in operations}
+        pending = set(futures)
+        try:
+            while len(pending) > 0:
+                done, pending = calls.run_until_done(pending)
+                for future in done:
+                    error = future.exception()
+                    if error is None:
+                        continue
+
+                    exc_info = (type(error), error, error.__traceback__)
+                    log.error("Validation failed of operation: %r",
+                              futures[future], exc_info=exc_info)
+                    hit_errors.append(
+                        ''.join(traceback.format_exception(*exc_info)))
+                    if not cont_on_err:
+                        raise error
+        finally:
+            for future in pending:
+                future.cancel()
+            calls.close()
+
+    return hit_errors
+
+
+class _CallingThreadCalls:
+    """Runs functions on the thread which created this, on behalf of worker
+    threads, for work such as running `hypothesis` which mustn't be done on
+    several threads at once.
+
+    Workers are submitted with `submit` while the creating thread calls
+    `run_until_done`. Until this is closed, functions run by the workers can
+    then use `current` to find it, and `call` to run functions on the
+    creating thread.
+    """
 
+    _local = threading.local()
 
-def operation_conformance_test(client, operation, num_tests=20):
+    def __init__(self):
+        self._calls = queue.Queue()
+        self._closed = False
+
+    @classmethod
+    def current(cls):
+        """The calls of the worker running in this thread, if any.
+
+        :rtype: _CallingThreadCalls or None
+        """
+        return getattr(cls._local, 'calls', None)
+
+    def submit(self, pool, function, *args):
+        """Submit a function to a pool of threads to run as a worker, which
+        can make calls on the creating thread.
+
+        :param pool: The pool to run the function on.
+        :type pool: concurrent.futures.ThreadPoolExecutor
+        :rtype: concurrent.futures.Future
+        """
+        future = pool.submit(self._run_worker, function, *args)
+        # Wake up the creating thread to check the future once it's done.
+        future.add_done_callback(lambda _: self._calls.put(None))
+        return future
+
+    def _run_worker(self, function, *args):
+        self._local.calls = self
+        try:
+            return function(*args)
+        finally:
+            self._local.calls = None
+
+    def call(self, function, *args, **kwargs):
+        """Call a function on the creating thread, waiting for it to return.
+
+        :raises concurrent.futures.CancelledError: If closed before the
+                                                   function was called.
+        :return: What the function returned.
+        """
+        future = concurrent.futures.Future()
+        self._calls.put((future, function, args, kwargs))
+        if self._closed:
+            self._cancel_calls()
+        return future.result()
+
+    def run_until_done(self, futures):
+        """Make calls on behalf of workers until any of the futures is done.
+
+        :return: The futures done, and those not yet done.
+        :rtype: tuple(set(concurrent.futures.Future),
+                      set(concurrent.futures.Future))
+        """
+        while not any(future.done() for future in futures):
+            call = self._calls.get()
+            if call is None:
+                continue
+            future, function, args, kwargs = call
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function(*args, **kwargs))
+                except BaseException as error:  # pylint: disable=broad-except
+                    future.set_exception(error)
+
+        done = {future for future in futures if future.done()}
+        return done, set(futures) - done
+
+    def close(self):
+        """Stop making calls, cancelling any that workers make from now."""
+        self._closed = True
+        self._cancel_calls()
+
+    def _cancel_calls(self):
+        while True:
+            try:
+                call = self._calls.get_nowait()
+            except queue.Empty:
+                return
+            if call is not None:
+                call[0].cancel()
+
+
+def operation_conformance_test(client, operation, num_tests=20,  # pylint: disable=too-many-arguments,too-many-locals
+                               value_factory=None, validate_responses=False,
+                               results_log=None, instrumentation=None,
+                               example_database=None, latency_budget=None):
     """Test the conformance of the given operation using the provided client.
 
+    The `hypothesis` test of each operation has a stable identity based on
+    the operation, so failing examples saved in the example database are
+    replayed first whenever the same operation is tested again - in later
+    runs, or by other processes sharing the database.
+
+    If there's a latency budget, the latency of every request with a response
+    is measured, and once all tests have passed the operation fails if the
+    latencies exceed the budget - reporting the slowest examples.
+
+    When operations are tested concurrently by `api_conformance_test`,
+    `hypothesis` only runs on the thread which called that, as it can't be
+    run on several threads at once. Examples are drawn there, then tested in
+    turn on the worker thread testing the operation. If an example fails,
+    the operation is tested again by `hypothesis` there to minimise and save
+    the failure, without recording the results of those tests again. Any
+    failing examples saved for the operation are replayed there too.
+
     :param client: The client to use to access the API.
     :type client: client.Client
     :param operation: The operation to test.
     :type operation: schema.Operation
     :param num_tests: How many tests to run of each API operation.
     :type num_tests: int
+    :param value_factory: Factory to generate strategies for values, or
+                          `None` to use the default one.
+    :type value_factory: strategies.StrategyFactory or None
+    :param validate_responses: Validate response bodies against the schema
+                               declared for their status code.
+    :type validate_responses: bool
+    :param results_log: Log to record the result of every request in.
+    :type results_log: results.ResultsLog or None
+    :param instrumentation: Receives timings of the generate and check phases
+                            of each example. Pass the same instrumentation to
+                            the client to also time the remaining phases.
+    :type instrumentation: instrumentation.Instrumentation or None
+    :param example_database: Where to save and replay failing examples from -
+                             either an example database, or the path of a
+                             directory to use as one. If `None`, the
+                             `hypothesis` default database is used.
+    :type example_database: str or hypothesis.database.ExampleDatabase or
+                            None
+    :param latency_budget: Budget for the latencies of requests.
+    :type latency_budget: latency.LatencyBudget or None
+    :return: How many examples were tested.
+    :rtype: int
     """
     log.info("Testing operation: %r", operation)
-    strategy = operation.parameters_strategy(StrategyFactory())
+    if value_factory is None:
+        value_factory = StrategyFactory()
+    strategy = operation.parameters_strategy(value_factory)
+    tester = _ExampleTester(validate_responses, results_log, instrumentation,
+                            track_latencies=latency_budget is not None)
+
+    test_settings = {}
+    if example_database is not None:
+        test_settings['database'] = _example_database(example_database)
+    single_operation_test = _hypothesis_test(operation, strategy, num_tests,
+                                             tester, test_settings)
+
+    calls = _CallingThreadCalls.current()
+    if calls is None:
+        # Run the test, which takes one less parameter than expected due to
+        # the hypothesis decorator providing the last one.
+        single_operation_test(client, operation)  # pylint: disable=E1120
+    elif _has_saved_examples(
+            test_settings.get('database',
+                              hypothesis.settings.default.database),
+            _saved_examples_key(single_operation_test)):
+        calls.call(single_operation_test, client, operation)
+    else:
+        start_time = time.monotonic()
+        examples = calls.call(draw_examples, strategy, num_tests)
+        tester.record_generation(operation, len(examples),
+                                 time.monotonic() - start_time)
+        for params in examples:
+            try:
+                tester.send(client, operation, params)
+            except Exception:
+                log.info("Testing again to minimise failure of: %r",
+                         operation)
+                calls.call(_hypothesis_test(
+                    operation, strategy, num_tests,
+                    _ExampleTester(validate_responses), test_settings),
+                           client, operation)
+                log.warning("Failure not reproduced by hypothesis: %r",
+                            operation)
+                raise
 
-    @hypothesis.settings(
-        max_examples=num_tests,
-        suppress_health_check=[hypothesis.HealthCheck.too_slow])
-    @hypothesis.given(strategy)
+    if latency_budget is not None:
+        tester.check_latencies(latency_budget)
+
+    return tester.num_tested
+
+
+def _hypothesis_test(operation, strategy, num_tests, tester, test_settings):
+    """The `hypothesis` test of an operation, testing examples drawn from a
+    strategy with a tester.
+
+    The test takes the client and the operation to test.
+    """
     def single_operation_test(client, operation, params):
         """Test an operation fully.
 
@@ -73,15 +565,277 @@ def operation_conformance_test(client, operation, num_tests=20):
         :type params: dict
         """
         log.info("Testing with params: %r", params)
-        result = client.request(operation, params)
-        assert result.status in operation.response_codes, \
-            "Response code {} not in {}".format(result.status,
-                                                operation.response_codes)
-        assert any(entry.strip().startswith('application/json') \
-                   for entry in result.headers['Content-Type']), \
-            "'application/json' not in 'Content-Type' header: {}" \
-            .format(result.headers['Content-Type'])
-
-    # Run the test, which takes one less parameter than expected due to the
-    # hypothesis decorator providing the last one.
-    single_operation_test(client, operation)  # pylint: disable=E1120
+        tester.test(client, operation, params)
+
+    # Requests can take any time, so don't have hypothesis fail slow ones as
+    # exceeding its deadline - latency budgets are checked separately.
+    return _keyed_test(
+        single_operation_test, _database_key(operation),
+        lambda test: hypothesis.settings(
+            max_examples=num_tests, deadline=None,
+            suppress_health_check=[hypothesis.HealthCheck.too_slow],
+            **test_settings)(hypothesis.given(strategy)(test)))
+
+
+def _keyed_test(test, name, decorate):
+    """Apply `hypothesis` decorators to a test function, keying the examples
+    saved for it in example databases by a name.
+
+    Example databases key saved examples by the test function, but the test
+    of an operation is created afresh for each call, so is keyed by a name
+    unique to the operation instead. Older hypothesis versions key the
+    database by the qualified name of the test. Newer ones key it by the
+    source of the test, with a digest added to tell apart tests sharing
+    source - unless the key is set explicitly on the decorated test, which
+    keeps the key the same across versions. All of these are private to
+    hypothesis, so this fails loudly if the decorated test doesn't look as
+    expected rather than silently saving examples under another key.
+
+    :param test: The test function to decorate.
+    :type test: function
+    :param name: Name of the test, unique to what it tests.
+    :type name: str
+    :param decorate: Function applying the hypothesis decorators to a test.
+    :type decorate: callable
+    :raises RuntimeError: If the decorated test isn't a hypothesis test.
+    :rtype: function
+    """
+    # pylint: disable=protected-access
+    test.__qualname__ = name
+    test._hypothesis_internal_add_digest = name.encode('utf-8')
+    keyed_test = decorate(test)
+    if not getattr(keyed_test, 'is_hypothesis_test', False):
+        raise RuntimeError("Can't key examples of {!r} with hypothesis {} - "
+                           "decorating it didn't give a hypothesis test"
+                           .format(name, hypothesis.__version__))
+    keyed_test._hypothesis_internal_database_key = \
+        "{}.{}".format(test.__module__, name).encode('utf-8')
+
+    return keyed_test
+
+
+def _saved_examples_key(test):
+    """Key of the examples saved for a test keyed by `_keyed_test` in example
+    databases.
+
+    :raises RuntimeError: If the test wasn't keyed by `_keyed_test`.
+    :rtype: bytes
+    """
+    try:
+        return test._hypothesis_internal_database_key  # pylint: disable=protected-access
+    except AttributeError:
+        raise RuntimeError("Test {!r} has no example database key".format(
+            test))
+
+
+def _database_key(operation):
+    """Name identifying the test of an operation in example databases.
+
+    :rtype: str
+    """
+    return "operation_conformance_test[{} {} {}]".format(
+        operation.id, operation.method.upper(), operation.path)
+
+
+def _has_saved_examples(database, key):
+    """Whether there are any examples saved in an example database under a
+    key.
+
+    :rtype: bool
+    """
+    return database is not None and \
+        next(iter(database.fetch(key)), None) is not None
+
+
+def _example_database(example_database):
+    """The example database to use, given one or the path of a directory.
+
+    :rtype: hypothesis.database.ExampleDatabase
+    """
+    if isinstance(example_database, str):
+        return hypothesis.database.DirectoryBasedExampleDatabase(
+            example_database)
+    return example_database
+
+
+class _ExampleTester:  # pylint: disable=too-many-instance-attributes
+    """Tests examples of parameters for an operation by making a request with
+    each of them and checking the response, recording the result and timings
+    of each test if requested.
+
+    Latencies are tracked if requested, keeping only the parameters of the
+    slowest few examples, so they can be checked against a budget afterwards.
+
+    Examples may be sent from several threads at once, but not tested with
+    `test`, which relies on examples being generated between tests.
+
+    :param validate_responses: Validate response bodies against their schemas.
+    :type validate_responses: bool
+    :param results_log: Log to record the result of every request in.
+    :type results_log: results.ResultsLog or None
+    :param instrumentation: Receives timings of the generate and check phases
+                            of each example.
+    :type instrumentation: instrumentation.Instrumentation or None
+    :param track_latencies: Track the latency of every request with a
+                            response.
+    :type track_latencies: bool
+    """
+
+    # How many of the slowest examples to report when over a latency budget.
+    SLOWEST_EXAMPLES = 5
+
+    def __init__(self, validate_responses=False, results_log=None,
+                 instrumentation=None, track_latencies=False):
+        self._validate_responses = validate_responses
+        self._results_log = results_log
+        self._instrumentation = instrumentation
+        self._latencies = [] if track_latencies else None
+        # Heap of the slowest examples, with a counter to break ties so
+        # parameters are never compared.
+        self._slowest = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        # Examples are generated between tests, so time from the end of one
+        # test to the start of the next is the time spent generating.
+        self._last_end_time = time.monotonic()
+        #: How many examples have been tested.
+        self.num_tested = 0
+
+    def test(self, client, operation, params):
+        """Test a single example of parameters.
+
+        :param client: The client to use to access the API.
+        :type client: client.Client
+        :param operation: The operation to test.
+        :type operation: schema.Operation
+        :param params: The dictionary of parameters to use on the operation.
+        :type params: dict
+        """
+        self._record_phase(operation, 'generate',
+                           time.monotonic() - self._last_end_time)
+        try:
+            self.send(client, operation, params)
+        finally:
+            self._last_end_time = time.monotonic()
+
+    def record_generation(self, operation, num_examples, duration):
+        """Record how long it took to generate examples up front, rather than
+        between tests.
+
+        :param operation: The operation the examples are for.
+        :type operation: schema.Operation
+        :param num_examples: How many examples were generated.
+        :type num_examples: int
+        :param duration: Seconds taken to generate them all.
+        :type duration: float
+        """
+        for _ in range(num_examples):
+            self._record_phase(operation, 'generate', duration / num_examples)
+
+    def send(self, client, operation, params):
+        """Test a single example of parameters, without recording how long it
+        took to generate.
+
+        :param client: The client to use to access the API.
+        :type client: client.Client
+        :param operation: The operation to test.
+        :type operation: schema.Operation
+        :param params: The dictionary of parameters to use on the operation.
+        :type params: dict
+        """
+        with self._lock:
+            self.num_tested += 1
+        start_time = time.monotonic()
+        status = None
+        latency = None
+        try:
+            result = client.request(operation, params)
+            check_start_time = time.monotonic()
+            latency = check_start_time - start_time
+            status = result.status
+            self._track_latency(params, latency)
+            check_response(operation, result, self._validate_responses)
+            self._record_phase(operation, 'check',
+                               time.monotonic() - check_start_time)
+        except Exception as error:
+            if latency is None:
+                latency = time.monotonic() - start_time
+            self._record_result(operation, params, status, latency,
+                                "{}: {}".format(type(error).__name__, error))
+            raise
+        else:
+            self._record_result(operation, params, status, latency)
+
+    def check_latencies(self, latency_budget):
+        """Assert that the latencies of the requests made so far are within
+        a budget.
+
+        :param latency_budget: The budget to check against.
+        :type latency_budget: latency.LatencyBudget
+        """
+        violations = latency_budget.violations(self._latencies or [])
+        assert len(violations) == 0, \
+            "Latency budget exceeded over {} requests - {}\nSlowest " \
+            "examples:\n{}".format(
+                len(self._latencies), '; '.join(violations), '\n'.join(
+                    "{:.1f}ms: {!r}".format(latency * 1000, params)
+                    for latency, _, params in sorted(self._slowest,
+                                                     reverse=True)))
+
+    def _track_latency(self, params, latency):
+        if self._latencies is None:
+            return
+        with self._lock:
+            self._latencies.append(latency)
+            entry = (latency, next(self._counter), params)
+            if len(self._slowest) < self.SLOWEST_EXAMPLES:
+                heapq.heappush(self._slowest, entry)
+            else:
+                heapq.heappushpop(self._slowest, entry)
+
+    def _record_phase(self, operation, phase, duration):
+        if self._instrumentation is not None:
+            self._instrumentation.record(operation, phase, duration)
+
+    def _record_result(self, operation, params, status, latency, reason=None):  # pylint: disable=too-many-arguments
+        if self._results_log is not None:
+            self._results_log.record(operation, params, status, latency,
+                                     reason)
+
+
+def check_response(operation, result, validate_body=False):
+    """Assert that a response received to a request is valid for the
+    operation the request was made against.
+
+    :param operation: The operation the request was made against.
+    :type operation: schema.Operation
+    :param result: The response received.
+    :type result: response.Response
+    :param validate_body: Also validate the body against the response schema.
+    :type validate_body: bool
+    """
+    assert result.status in operation.response_codes, \
+        "Response code {} not in {}".format(result.status,
+                                            operation.response_codes)
+    assert any(entry.strip().startswith('application/json') \
+               for entry in result.headers['Content-Type']), \
+        "'application/json' not in 'Content-Type' header: {}" \
+        .format(result.headers['Content-Type'])
+
+    if validate_body:
+        _check_response_body(operation, result)
+
+
+def _check_response_body(operation, result):
+    """Assert that the body of a response conforms to the schema declared for
+    its status code, if there is one."""
+    validator = operation.response_validator(result.status)
+    if validator is None:
+        return
+
+    assert result.raw, "No response body, expected one matching: {!r}" \
+        .format(validator)
+    body = json.loads(result.raw.decode('utf-8'))
+    errors = validator.errors(body)
+    assert len(errors) == 0, \
+        "Response body doesn't match schema:\n{}".format('\n'.join(errors))
@@ -0,0 +1,56 @@
+"""
+Sharing out a time budget for testing between operations.
+"""
+import logging
+
+__all__ = ["allocate_examples"]
+
+
+log = logging.getLogger(__name__)
+
+
+# Assumed shortest time a test can take, to avoid dividing by zero for tests
+# too quick to measure.
+_MIN_TEST_DURATION = 1e-6
+
+
+def allocate_examples(test_durations, weights, time_available, max_examples):
+    """Decide how many tests to run of each operation to fill the time
+    available.
+
+    Time is shared between operations in proportion to their weights. Any
+    operation whose share would fit more than the maximum number of tests
+    gets the maximum, and the time it doesn't need is shared between the
+    others.
+
+    :param test_durations: Expected seconds to run one test of each operation.
+    :type test_durations: dict(schema.Operation, float)
+    :param weights: Relative share of the time for each operation.
+    :type weights: dict(schema.Operation, float)
+    :param time_available: Seconds available to run tests in.
+    :type time_available: float
+    :param max_examples: Most tests to run of any one operation.
+    :type max_examples: int
+    :rtype: dict(schema.Operation, int)
+    """
+    allocation = {operation: 0 for operation in test_durations}
+    durations = {operation: max(duration, _MIN_TEST_DURATION)
+                 for operation, duration in test_durations.items()
+                 if weights[operation] > 0}
+
+    while len(durations) > 0 and time_available > 0 and max_examples > 0:
+        total_weight = sum(weights[operation] for operation in durations)
+        shares = {operation: int(time_available * weights[operation] /
+                                 total_weight / duration)
+                  for operation, duration in durations.items()}
+        capped = [operation for operation, share in shares.items()
+                  if share >= max_examples]
+        if len(capped) == 0:
+            allocation.update(shares)
+            break
+
+        for operation in capped:
+            allocation[operation] = max_examples
+            time_available -= max_examples * durations.pop(operation)
+
+    return allocation
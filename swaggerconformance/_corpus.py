@@ -0,0 +1,195 @@
+"""
+Entrypoints for generating a corpus of examples of requests to an API ahead of
+time, and replaying them against the API later.
+"""
+import logging
+import collections
+import gzip
+import json
+import traceback
+import concurrent.futures
+
+from ._basictests import _ExampleTester
+from ._generation import draw_examples
+from ._values import decode_value, encode_value
+from .client import Client
+from .results import ResultsLog
+from .strategies import StrategyFactory
+
+__all__ = ["generate_corpus", "replay_corpus"]
+
+
+log = logging.getLogger(__name__)
+
+
+# Increment this whenever the format of corpus files changes.
+_CORPUS_FORMAT = 1
+
+
+def generate_corpus(schema_path, corpus_path, num_examples_per_op=100,
+                    value_factory=None, schema_cache_dir=None):
+    """Generate examples of requests to every operation of the API defined by
+    the given schema, and save them in a corpus file to replay later.
+
+    The corpus has one line of JSON per example, and is compressed if the
+    path ends in ``.gz``. Values not representable in JSON - dates,
+    date-times, UUIDs, bytes and files - are stored tagged with their type so
+    they're restored exactly.
+
+    :param schema_path: The path to / URL of the schema of the API.
+    :type schema_path: str
+    :param corpus_path: The path of the corpus file to write.
+    :type corpus_path: str
+    :param num_examples_per_op: How many examples to draw for each operation.
+    :type num_examples_per_op: int
+    :param value_factory: Factory to generate strategies for values, or
+                          `None` to use the default one.
+    :type value_factory: strategies.StrategyFactory or None
+    :param schema_cache_dir: Directory to cache the parsed schema in, which
+                             must only be writable by trusted users.
+    :type schema_cache_dir: str or None
+    :return: The number of examples in the corpus.
+    :rtype: int
+    """
+    if value_factory is None:
+        value_factory = StrategyFactory()
+
+    num_examples = 0
+    with Client(schema_path, schema_cache_dir=schema_cache_dir) as client, \
+            _open_corpus(corpus_path, 'w') as corpus_file:
+        corpus_file.write(json.dumps({"format": _CORPUS_FORMAT}) + '\n')
+        for operation in client.api.operations():
+            log.info("Generating examples for operation: %r", operation)
+            strategy = operation.parameters_strategy(value_factory)
+            for params in draw_examples(strategy, num_examples_per_op):
+                corpus_file.write(json.dumps(
+                    {"operation": operation.id,
+                     "method": operation.method,
+                     "path": operation.path,
+                     "params": encode_value(params)}) + '\n')
+                num_examples += 1
+
+    log.debug("Wrote %r examples to corpus: %r", num_examples, corpus_path)
+    return num_examples
+
+
+def replay_corpus(schema_path, corpus_path, cont_on_err=True, workers=1,  # pylint: disable=too-many-arguments
+                  validate_responses=False, results_sink=None,
+                  schema_cache_dir=None):
+    """Replay the examples in a corpus generated by `generate_corpus` against
+    the API defined by the given schema, checking each response in the same
+    way as `api_conformance_test`.
+
+    No values are generated, so the replay is limited only by how quickly
+    requests can be sent and their responses checked.
+
+    :param schema_path: The path to / URL of the schema of the API.
+    :type schema_path: str
+    :param corpus_path: The path of the corpus file to replay.
+    :type corpus_path: str
+    :param cont_on_err: Replay all examples, or drop out on first error.
+    :type cont_on_err: bool
+    :param workers: How many examples to replay concurrently.
+    :type workers: int
+    :param validate_responses: Validate response bodies against their schemas.
+    :type validate_responses: bool
+    :param results_sink: Path of a file, or file-like object, to stream a
+                         JSON record of the result of every request to.
+    :type results_sink: str or file or None
+    :param schema_cache_dir: Directory to cache the parsed schema in, which
+                             must only be writable by trusted users.
+    :type schema_cache_dir: str or None
+    """
+    results_log = None if results_sink is None else ResultsLog(results_sink)
+    tester = _ExampleTester(validate_responses, results_log)
+
+    try:
+        with Client(schema_path, pool_size=max(workers, 10),
+                    schema_cache_dir=schema_cache_dir) as client:
+            examples = _load_corpus(client, corpus_path)
+
+            def replay_example(example):
+                """Replay a single example, returning the formatted error if
+                it failed."""
+                operation, encoded_params = example
+                try:
+                    tester.send(client, operation,
+                                decode_value(encoded_params))
+                except Exception:  # pylint: disable=broad-except
+                    log.exception("Replay failed of operation: %r", operation)
+                    if not cont_on_err:
+                        raise
+                    return operation, traceback.format_exc()
+                return operation, None
+
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=workers) as pool:
+                hit_errors = _collect_errors(_bounded_map(
+                    pool, replay_example, examples, 2 * workers))
+    finally:
+        if results_log is not None:
+            results_log.close()
+
+    if len(hit_errors) > 0:
+        raise Exception("{} operation(s) failed replaying corpus - check "
+                        "output in logging and first tracebacks below for "
+                        "details\n{}".format(len(hit_errors),
+                                             '\n'.join(hit_errors.values())))
+
+
+def _bounded_map(pool, function, iterable, max_pending):
+    """Like ``pool.map``, but only reading items from the iterable as results
+    are consumed, with at most ``max_pending`` submitted at once, so the whole
+    iterable is never held in memory.
+
+    :rtype: Generator
+    """
+    pending = collections.deque()
+    for item in iterable:
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(pool.submit(function, item))
+    while len(pending) > 0:
+        yield pending.popleft().result()
+
+
+def _collect_errors(replay_results):
+    """Keep the first error hit replaying examples of each operation, so
+    memory used doesn't grow with the size of the corpus.
+
+    :rtype: dict(str, str)
+    """
+    hit_errors = {}
+    for operation, error in replay_results:
+        if error is not None:
+            hit_errors.setdefault(operation.id, error)
+
+    return hit_errors
+
+
+def _load_corpus(client, corpus_path):
+    """Read the examples in a corpus, matched to the operations of the API
+    they're for.
+
+    Parameter values are left encoded, as some - such as files - can only be
+    used once, so must be decoded separately for each request.
+
+    :rtype: Generator(tuple(schema.Operation, dict))
+    """
+    with _open_corpus(corpus_path, 'r') as corpus_file:
+        header = json.loads(corpus_file.readline())
+        if header.get("format") != _CORPUS_FORMAT:
+            raise ValueError("Unsupported corpus format {!r} in: {!r}".format(
+                header.get("format"), corpus_path))
+
+        for line in corpus_file:
+            example = json.loads(line)
+            operation = client.api.endpoints[example["path"]][
+                example["method"]]
+            yield operation, example["params"]
+
+
+def _open_corpus(corpus_path, mode):
+    if corpus_path.endswith('.gz'):
+        return gzip.open(corpus_path, mode + 't', encoding='utf-8')
+    return open(corpus_path, mode, encoding='utf-8')
@@ -0,0 +1,47 @@
+"""
+Helpers for generating example values from strategies outside of a
+`hypothesis` test.
+"""
+import logging
+
+import hypothesis
+
+__all__ = ["draw_examples"]
+
+
+log = logging.getLogger(__name__)
+
+
+def draw_examples(strategy, num_examples):
+    """Draw up to the given number of example values from a strategy.
+
+    Only the generation phase of `hypothesis` is run, with no example database
+    or health checks, so this is much cheaper than calling ``example()`` on
+    the strategy repeatedly. Fewer examples may be returned if the strategy
+    can't produce enough distinct values.
+
+    :param strategy: The strategy to draw values from.
+    :type strategy: hypothesis.strategies.SearchStrategy
+    :param num_examples: How many examples to draw.
+    :type num_examples: int
+    :rtype: list
+    """
+    examples = []
+
+    @hypothesis.settings(max_examples=num_examples,
+                         database=None,
+                         deadline=None,
+                         phases=[hypothesis.Phase.generate],
+                         suppress_health_check=[
+                             hypothesis.HealthCheck.too_slow,
+                             hypothesis.HealthCheck.filter_too_much,
+                             hypothesis.HealthCheck.data_too_large])
+    @hypothesis.given(strategy)
+    def collect_example(example):
+        """Just store each example generated."""
+        examples.append(example)
+
+    collect_example()  # pylint: disable=no-value-for-parameter
+    log.debug("Drew %r examples", len(examples))
+
+    return examples
@@ -0,0 +1,251 @@
+"""
+High-level entrypoint for load testing an API with the same values generated
+for validating its conformance.
+"""
+import logging
+import itertools
+import threading
+import time
+import concurrent.futures
+
+from ._basictests import check_response
+from ._generation import draw_examples
+from .client import Client
+from .instrumentation import DurationStats
+from .results import operation_key
+from .strategies import StrategyFactory
+
+__all__ = ["api_load_test", "LoadTestResults"]
+
+
+log = logging.getLogger(__name__)
+
+
+def api_load_test(schema_path, duration=60, concurrency=10, rate=None,  # pylint: disable=too-many-arguments
+                  num_examples_per_op=100, value_factory=None,
+                  schema_cache_dir=None, server_url=None):
+    """Send a sustained load of requests to the API defined by the given
+    schema, and measure how it copes.
+
+    A pool of examples is drawn for each operation up front, from the same
+    strategies as used by `api_conformance_test`, and then requests are sent
+    cycling through all of those examples until the duration has passed.
+    Responses are checked in the same way as by `api_conformance_test`, but
+    invalid responses are only counted as errors, rather than stopping the
+    test.
+
+    :param schema_path: The path to / URL of the schema of the API.
+    :type schema_path: str
+    :param duration: How long to send requests for, in seconds.
+    :type duration: float
+    :param concurrency: Maximum number of requests to have in flight.
+    :type concurrency: int
+    :param rate: Target number of requests to send per second, or `None` to
+                 send them as fast as the concurrency allows.
+    :type rate: float or None
+    :param num_examples_per_op: How many distinct examples to draw for each
+                                operation.
+    :type num_examples_per_op: int
+    :param value_factory: Factory to generate strategies for values, or
+                          `None` to use the default one.
+    :type value_factory: strategies.StrategyFactory or None
+    :param schema_cache_dir: Directory to cache the parsed schema in, which
+                             must only be writable by trusted users.
+    :type schema_cache_dir: str or None
+    :param server_url: URL of the server to send requests to instead of the
+                       one given in the schema.
+    :type server_url: str or None
+    :rtype: LoadTestResults
+    """
+    if value_factory is None:
+        value_factory = StrategyFactory()
+
+    with Client(schema_path, pool_size=concurrency,
+                schema_cache_dir=schema_cache_dir,
+                server_url=server_url) as client:
+        log.debug("Expanded endpoints as: %r", client.api)
+        requests = _draw_requests(client, num_examples_per_op, value_factory)
+        if len(requests) == 0:
+            raise ValueError("No examples could be drawn for any operations "
+                             "of: {!r}".format(schema_path))
+
+        sender = _LoadSender(client, requests, duration, rate)
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=concurrency) as pool:
+            for future in [pool.submit(sender.run)
+                           for _ in range(concurrency)]:
+                future.result()
+
+    return sender.results
+
+
+def _draw_requests(client, num_examples_per_op, value_factory):
+    """Draw examples for every operation, interleaved so that requests cycling
+    through them spread load across all operations evenly.
+
+    :rtype: list(tuple(schema.Operation, dict))
+    """
+    examples = []
+    for operation in client.api.operations():
+        log.info("Drawing examples for operation: %r", operation)
+        strategy = operation.parameters_strategy(value_factory)
+        examples.append([(operation, params) for params in
+                         draw_examples(strategy, num_examples_per_op)])
+
+    return [request
+            for requests in itertools.zip_longest(*examples)
+            for request in requests if request is not None]
+
+
+class _LoadSender:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """Sends requests from a shared cycle of examples, from as many threads as
+    call `run`, until the duration has passed.
+
+    If a rate is given, each request is given a time slot to be sent in, so
+    that overall requests are sent at that rate as long as enough threads are
+    sending them. Latencies are then measured from the start of each slot
+    rather than from when the request was actually sent, so that time spent
+    waiting for a thread to send it, because the API is slow to respond to
+    earlier requests, is counted against the API rather than hidden.
+    """
+
+    def __init__(self, client, requests, duration, rate):
+        self._client = client
+        self._requests = itertools.cycle(requests)
+        self._interval = None if rate is None else 1 / rate
+        self._lock = threading.Lock()
+        self._num_sent = 0
+        self._start_time = time.monotonic()
+        self._end_time = self._start_time + duration
+        self.results = LoadTestResults()
+
+    def run(self):
+        """Send requests until the duration has passed."""
+        while True:
+            with self._lock:
+                operation, params = next(self._requests)
+                send_time = None
+                if self._interval is not None:
+                    send_time = (self._start_time +
+                                 self._num_sent * self._interval)
+                self._num_sent += 1
+
+            if send_time is not None:
+                if send_time >= self._end_time:
+                    break
+                time.sleep(max(send_time - time.monotonic(), 0))
+            if time.monotonic() >= self._end_time:
+                break
+
+            self._send(operation, params, send_time)
+
+        self.results.finish()
+
+    def _send(self, operation, params, send_time):
+        start_time = time.monotonic() if send_time is None else send_time
+        try:
+            result = self._client.request(operation, params)
+            check_response(operation, result)
+        except Exception as error:  # pylint: disable=broad-except
+            log.debug("Request to %r with %r failed", operation, params,
+                      exc_info=True)
+            self.results.record(operation, time.monotonic() - start_time,
+                                "{}: {}".format(type(error).__name__, error))
+        else:
+            self.results.record(operation, time.monotonic() - start_time)
+
+
+class LoadTestResults:
+    """Throughput, error rates and latencies of requests sent to each operation
+    during a load test."""
+
+    def __init__(self):
+        self._latencies = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._start_time = time.monotonic()
+        self._end_time = None
+
+    def __repr__(self):
+        with self._lock:
+            operations = sorted(self._latencies)
+        return "{}(operations={!r})".format(self.__class__.__name__,
+                                            operations)
+
+    def record(self, operation, latency, error=None):
+        """Record the result of a single request.
+
+        :param operation: The operation the request was made against.
+        :type operation: schema.Operation
+        :param latency: Seconds from when the request was due to be sent
+                        until its response was received and checked.
+        :type latency: float
+        :param error: Why the request failed, or `None` if it succeeded.
+        :type error: str or None
+        """
+        key = operation_key(operation)
+        with self._lock:
+            if key not in self._latencies:
+                self._latencies[key] = DurationStats()
+                self._errors[key] = 0
+            self._latencies[key].add(latency)
+            if error is not None:
+                self._errors[key] += 1
+
+    def finish(self):
+        """Mark that the test has finished, so throughput can be calculated."""
+        with self._lock:
+            self._end_time = time.monotonic()
+
+    @property
+    def elapsed(self):
+        """Seconds the test ran for, or has been running for so far.
+
+        :rtype: float
+        """
+        end_time = time.monotonic() if self._end_time is None else \
+            self._end_time
+        return end_time - self._start_time
+
+    def summary(self):
+        """Aggregate results of the requests sent to each operation.
+
+        The result maps keys of operations, as from `results.operation_key`,
+        to dictionaries with keys ``requests``, ``errors``, ``error_rate``,
+        ``throughput`` (requests per second), and latency percentiles
+        ``p50``, ``p95`` and ``p99`` in seconds.
+
+        :rtype: dict(str, dict(str, float))
+        """
+        elapsed = self.elapsed
+        with self._lock:
+            latencies = {key: stats.summary()
+                         for key, stats in self._latencies.items()}
+            errors = dict(self._errors)
+
+        return {key: {
+            "requests": stats["count"],
+            "errors": errors[key],
+            "error_rate": errors[key] / stats["count"],
+            "throughput": stats["count"] / elapsed,
+            "p50": stats["p50"],
+            "p95": stats["p95"],
+            "p99": stats["p99"]}
+                for key, stats in latencies.items()}
+
+    def report(self):
+        """Human readable table of the results summary, with latencies in
+        milliseconds.
+
+        :rtype: str
+        """
+        lines = ["{:<30} {:>8} {:>7} {:>8} {:>8} {:>8} {:>8}".format(
+            "operation", "requests", "errors", "req/s", "p50", "p95", "p99")]
+        for key, results in sorted(self.summary().items()):
+            lines.append(
+                "{:<30} {:>8} {:>7} {:>8.1f} {:>8.2f} {:>8.2f} {:>8.2f}"
+                .format(key, results["requests"], results["errors"],
+                        results["throughput"], results["p50"] * 1000,
+                        results["p95"] * 1000, results["p99"] * 1000))
+
+        return '\n'.join(lines)
@@ -0,0 +1,217 @@
+"""
+Persistent on-disk cache of parsed and prepared Swagger schemas, so large
+schemas don't need parsing from scratch in every process that uses them.
+"""
+import logging
+import hashlib
+import os
+import os.path as osp
+import pickle
+import sys
+import tempfile
+import urllib.parse
+import urllib.request
+
+import requests
+import pyswagger
+from pyswagger import App
+from pyswagger.getter import Getter
+
+__all__ = ["load_app", "read_schema"]
+
+
+log = logging.getLogger(__name__)
+
+
+# Increment this whenever the format of the cached data changes.
+_CACHE_FORMAT = 1
+
+# ID used in place of the primitive factory when pickling an app.
+_PRIM_FACTORY_ID = 'prim_factory'
+
+# Seconds to wait for a schema fetched from a URL to respond.
+_FETCH_TIMEOUT = 60
+
+
+def load_app(schema_path, prim_factory, cache_dir=None):
+    """Load and prepare the pyswagger app defined by a schema.
+
+    If a cache directory is provided, the prepared app is loaded from there if
+    it has been cached previously for a schema with identical content, and
+    the same versions of this package, pyswagger and Python. Otherwise it's
+    parsed from the schema as normal and then stored in the cache.
+
+    Only the content of the top-level schema is used to look up the cache, so
+    changes to any external files it references won't be noticed.
+
+    Cached apps are pickled. Only classes from pyswagger are loaded from the
+    cache, but that doesn't make unpickling safe from a malicious cache
+    file, so the cache directory must only be writable by trusted users.
+
+    :param schema_path: The URL of or file path to the API definition.
+    :type schema_path: str
+    :param prim_factory: The pyswagger primitive factory the app should use.
+    :type prim_factory: pyswagger.primitives.SwaggerPrimitive
+    :param cache_dir: Directory holding cached schemas, or `None` to not cache.
+    :type cache_dir: str or None
+    :rtype: pyswagger.core.App
+    """
+    if cache_dir is None:
+        return _parse_app(schema_path, prim_factory)
+
+    schema_content = read_schema(schema_path)
+    cache_path = osp.join(cache_dir, _cache_key(schema_content) + '.pickle')
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            app = _AppUnpickler(cache_file, prim_factory).load()
+    except FileNotFoundError:
+        log.debug("No cached schema at: %r", cache_path)
+    except Exception:  # pylint: disable=broad-except
+        log.warning("Ignoring unreadable cached schema at: %r", cache_path,
+                    exc_info=True)
+    else:
+        log.debug("Loaded cached schema from: %r", cache_path)
+        return app
+
+    # Parse the content already read, rather than fetching it again.
+    app = _parse_app(schema_path, prim_factory, schema_content)
+    _store_app(app, cache_path, prim_factory)
+
+    return app
+
+
+def _parse_app(schema_path, prim_factory, schema_content=None):
+    log.debug("Parsing schema: %r", schema_path)
+    getter = None if schema_content is None else \
+        _ContentGetter(schema_path, schema_content)
+    app = App.load(schema_path, getter=getter, prim=prim_factory)
+    app.prepare()
+
+    return app
+
+
+class _ContentGetter(Getter):
+    """pyswagger getter providing the content of a schema which has already
+    been read.
+
+    This is only used for the top-level schema, so any external files it
+    references are still read as normal.
+    """
+
+    def __init__(self, path, content):
+        super().__init__(path)
+        self.urls = [path]
+        self._content = content
+
+    def load(self, path):
+        return self._content
+
+
+def _store_app(app, cache_path, prim_factory):
+    # Write to a temporary file first then move it into place, so other
+    # processes never see a partially written cache file.
+    cache_dir = osp.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_fd, temp_path = tempfile.mkstemp(dir=cache_dir)
+    try:
+        with os.fdopen(temp_fd, 'wb') as temp_file:
+            _AppPickler(temp_file, prim_factory).dump(app)
+        os.replace(temp_path, cache_path)
+    except Exception:  # pylint: disable=broad-except
+        log.warning("Failed to cache schema at: %r", cache_path,
+                    exc_info=True)
+        os.remove(temp_path)
+    else:
+        log.debug("Cached schema at: %r", cache_path)
+
+
+def read_schema(schema_path):
+    """Read the raw content of the schema at a URL or file path.
+
+    :rtype: bytes
+    """
+    parsed_path = urllib.parse.urlparse(schema_path)
+    if parsed_path.scheme in ('http', 'https'):
+        response = requests.get(schema_path, timeout=_FETCH_TIMEOUT)
+        response.raise_for_status()
+        return response.content
+
+    if parsed_path.scheme == 'file':
+        schema_path = urllib.request.url2pathname(parsed_path.path)
+    with open(schema_path, 'rb') as schema_file:
+        return schema_file.read()
+
+
+def _cache_key(schema_content):
+    """Key identifying a cached app built from some schema content.
+
+    :rtype: str
+    """
+    key = hashlib.sha256()
+    for version in (_CACHE_FORMAT, _package_version(), pyswagger.__version__,
+                    sys.version_info[:2]):
+        key.update(repr(version).encode('utf-8'))
+    key.update(schema_content)
+
+    return key.hexdigest()
+
+
+def _package_version():
+    try:
+        from importlib import metadata
+    except ImportError:
+        # Python before 3.8 doesn't have this, so fall back to the slower and
+        # since deprecated pkg_resources, only imported if caching is used.
+        import pkg_resources
+        try:
+            return pkg_resources.get_distribution(
+                'swagger-conformance').version
+        except pkg_resources.DistributionNotFound:
+            return None
+    try:
+        return metadata.version('swagger-conformance')
+    except metadata.PackageNotFoundError:
+        return None
+
+
+class _AppPickler(pickle.Pickler):
+    """Pickler for pyswagger apps which leaves out their primitive factory.
+
+    The factory may hold arbitrary user registered functions that can't be
+    pickled, and a new one is always provided when loading anyway.
+    """
+
+    def __init__(self, file, prim_factory):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._prim_factory = prim_factory
+
+    def persistent_id(self, obj):  # pylint: disable=method-hidden
+        return _PRIM_FACTORY_ID if obj is self._prim_factory else None
+
+
+class _AppUnpickler(pickle.Unpickler):
+    """Unpickler for apps pickled by `_AppPickler`, replacing the primitive
+    factory with the one provided.
+
+    Only classes from pyswagger are loaded, so a cache file can't directly
+    call arbitrary functions such as `os.system`.
+    """
+
+    def __init__(self, file, prim_factory):
+        super().__init__(file)
+        self._prim_factory = prim_factory
+
+    def find_class(self, module, name):
+        found = None
+        if module == 'pyswagger' or module.startswith('pyswagger.'):
+            found = super().find_class(module, name)
+        if not isinstance(found, type):
+            raise pickle.UnpicklingError("Not loading {}.{} from a cached "
+                                         "schema".format(module, name))
+        return found
+
+    def persistent_load(self, pid):  # pylint: disable=method-hidden
+        if pid != _PRIM_FACTORY_ID:
+            raise pickle.UnpicklingError("Unknown persistent ID: {!r}"
+                                         .format(pid))
+        return self._prim_factory
@@ -0,0 +1,65 @@
+"""
+Deterministic partitioning of operations between shards, so separate
+processes or machines can each test a share of an API.
+"""
+import logging
+import heapq
+
+from .results import operation_key
+
+__all__ = ["shard_operations"]
+
+
+log = logging.getLogger(__name__)
+
+
+def shard_operations(operations, shard_index, shard_count, durations=None):
+    """The operations to test on one shard.
+
+    Every shard given the same operations and durations assigns them in the
+    same way. Operations are assigned longest first, each to the shard with
+    least total duration so far, so shards take similar times to test. If no
+    durations are known operations are balanced by count, and operations
+    without a known duration are assumed to take the average time.
+
+    :param operations: All operations to share between the shards.
+    :type operations: iterable(schema.Operation)
+    :param shard_index: Index of the shard, from 0 to ``shard_count - 1``.
+    :type shard_index: int
+    :param shard_count: How many shards there are in total.
+    :type shard_count: int
+    :param durations: Seconds previously spent testing each operation, keyed
+                      by `results.operation_key`.
+    :type durations: dict(str, float) or None
+    :rtype: list(schema.Operation)
+    """
+    if not 0 <= shard_index < shard_count:
+        raise ValueError("Shard index {!r} out of range for {!r} shards"
+                         .format(shard_index, shard_count))
+
+    operations = list(operations)
+    durations = durations or {}
+    known_durations = [durations[operation_key(operation)]
+                       for operation in operations
+                       if operation_key(operation) in durations]
+    default_duration = 1.0 if len(known_durations) == 0 else \
+        sum(known_durations) / len(known_durations)
+
+    # Sort by key as well, so operations with equal durations are always
+    # assigned in the same order.
+    keyed_operations = sorted(
+        ((durations.get(operation_key(operation), default_duration),
+          operation_key(operation), operation)
+         for operation in operations),
+        key=lambda item: (-item[0], item[1]))
+
+    shard_loads = [(0, index) for index in range(shard_count)]
+    shard = []
+    for duration, key, operation in keyed_operations:
+        load, index = heapq.heappop(shard_loads)
+        heapq.heappush(shard_loads, (load + duration, index))
+        if index == shard_index:
+            log.debug("Assigned operation %r to this shard", key)
+            shard.append(operation)
+
+    return shard
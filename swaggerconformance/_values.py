@@ -0,0 +1,86 @@
+"""
+Encoding of generated parameter values as plain JSON data, so they can be
+stored, and decoding them back again.
+"""
+import logging
+import base64
+import datetime
+import io
+import uuid
+
+__all__ = ["encode_value", "decode_value"]
+
+
+log = logging.getLogger(__name__)
+
+
+def encode_value(value):
+    """Convert a parameter value to one which can be stored as JSON.
+
+    Values of types JSON can't represent are replaced by single item
+    dictionaries tagging the type, such as ``{"$uuid": "..."}``. Dictionaries
+    with keys that could be mistaken for such tags are escaped similarly.
+    """
+    if isinstance(value, dict):
+        if _is_file(value):
+            return {"$file": base64.b64encode(value['data'].getvalue())
+                             .decode('ascii')}
+        encoded = {key: encode_value(item) for key, item in value.items()}
+        if any(key.startswith('$') for key in value):
+            return {"$dict": encoded}
+        return encoded
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    for value_type, tag, encoder in _TAG_ENCODERS:
+        if isinstance(value, value_type):
+            return {tag: encoder(value)}
+
+    return value
+
+
+def decode_value(value):
+    """Convert a value encoded by `encode_value` back to its original form."""
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if len(value) == 1:
+        (tag, tagged), = value.items()
+        if tag in _TAG_DECODERS:
+            return _TAG_DECODERS[tag](tagged)
+
+    return {key: decode_value(item) for key, item in value.items()}
+
+
+def _is_file(value):
+    # Files are generated as dictionaries holding a file object.
+    return set(value) == {'data'} and isinstance(value['data'], io.BytesIO)
+
+
+def _parse_date(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _parse_datetime(value):
+    if '.' in value:
+        return datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f')
+    return datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%S')
+
+
+# Date-times are also dates, so have to be checked for first.
+_TAG_ENCODERS = [
+    (datetime.datetime, "$datetime", datetime.datetime.isoformat),
+    (datetime.date, "$date", datetime.date.isoformat),
+    (uuid.UUID, "$uuid", str),
+    (bytes, "$bytes", lambda data: base64.b64encode(data).decode('ascii')),
+]
+
+_TAG_DECODERS = {
+    "$date": _parse_date,
+    "$datetime": _parse_datetime,
+    "$uuid": uuid.UUID,
+    "$bytes": base64.b64decode,
+    "$file": lambda data: {'data': io.BytesIO(base64.b64decode(data))},
+    "$dict": lambda items: {key: decode_value(item)
+                            for key, item in items.items()},
+}
@@ -0,0 +1,179 @@
+"""
+Validating swagger conformance from an `asyncio` event loop, with many
+requests in flight at once.
+
+This module needs Python 3.5 or later, so unlike the rest of the package it
+isn't imported by the top-level package - import it directly to use it.
+"""
+import logging
+import asyncio
+import traceback
+import concurrent.futures
+
+from ._basictests import check_response
+from ._generation import draw_examples
+from .client import Client
+from .strategies import StrategyFactory
+
+__all__ = ["AsyncClient", "async_api_conformance_test"]
+
+
+log = logging.getLogger(__name__)
+
+
+class AsyncClient:
+    """Client to use to access the Swagger application from an `asyncio` event
+    loop, allowing many requests to be in flight at once.
+
+    Requests are made by a `Client` on a pool of threads sharing its pooled
+    connections, so the event loop is never blocked waiting on the API.
+
+    :param schema_path: The URL of or file path to the API definition.
+    :type schema_path: str
+    :param codec: Used to convert between JSON and objects.
+    :type codec: codec.CodecFactory or None
+    :param max_concurrency: Maximum number of requests to have in flight.
+    :type max_concurrency: int
+    """
+
+    def __init__(self, schema_path, codec=None, max_concurrency=100):
+        self._client = Client(schema_path, codec, pool_size=max_concurrency)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_concurrency)
+
+    def __repr__(self):
+        return "{}(client={!r})".format(self.__class__.__name__,
+                                        self._client)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def api(self):
+        """The API accessible from this client.
+
+        :rtype: `schema.Api`
+        """
+        return self._client.api
+
+    async def request(self, operation, parameters):
+        """Make a request against a certain operation on the API.
+
+        This is a coroutine - if more than the maximum number of requests are
+        already in flight then it waits for one of them to complete first.
+
+        :param operation: The operation to perform.
+        :type operation: schema.Operation
+        :param parameters: The parameters to use on the operation.
+        :type parameters: dict
+
+        :rtype: response.Response
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self._executor, self._client.request, operation, parameters)
+
+    def close(self):
+        """Wait for outstanding requests, then close all pooled connections."""
+        self._executor.shutdown()
+        self._client.close()
+
+
+async def async_api_conformance_test(schema_path, num_tests_per_op=20,
+                                     cont_on_err=True, max_concurrency=100):
+    """Basic test of the conformance of the API defined by the given schema,
+    sending many requests concurrently.
+
+    This is a coroutine. Unlike `api_conformance_test`, the examples for each
+    operation are generated up front and then all sent with up to
+    ``max_concurrency`` requests in flight, so failing examples are reported
+    as they were generated rather than being simplified by `hypothesis`.
+
+    Examples are generated on a single thread other than the event loop's,
+    since `hypothesis` can't be run on several threads at once, so generating
+    them never blocks the event loop. The examples for each operation are
+    generated while requests with those of the previous operation are sent,
+    so only the examples of two operations are held at once however large the
+    API is. Requests are sent on the threads of the client's pool, so there
+    are never more in flight than the ``max_concurrency`` threads of that
+    pool.
+
+    :param schema_path: The path to / URL of the schema to validate.
+    :type schema_path: str
+    :param num_tests_per_op: How many tests to run of each API operation.
+    :type num_tests_per_op: int
+    :param cont_on_err: Validate all operations, or drop out on first error.
+    :type cont_on_err: bool
+    :param max_concurrency: Maximum number of requests to have in flight.
+    :type max_concurrency: int
+    """
+    loop = asyncio.get_event_loop()
+    value_factory = StrategyFactory()
+    hit_errors = []
+    with AsyncClient(schema_path, max_concurrency=max_concurrency) as client, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=1) as generator:
+        log.debug("Expanded endpoints as: %r", client.api)
+
+        operations = list(client.api.operations())
+        drawing = None
+        if len(operations) > 0:
+            drawing = loop.run_in_executor(
+                generator, _draw_operation_examples, operations[0],
+                num_tests_per_op, value_factory)
+        for index, operation in enumerate(operations):
+            examples = await drawing
+            if index + 1 < len(operations):
+                drawing = loop.run_in_executor(
+                    generator, _draw_operation_examples,
+                    operations[index + 1], num_tests_per_op, value_factory)
+
+            try:
+                await _async_operation_test(client, operation, examples)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Validation failed of operation: %r",
+                              operation)
+                hit_errors.append(traceback.format_exc())
+                if not cont_on_err:
+                    raise
+
+    if len(hit_errors) > 0:
+        raise Exception("{} operation(s) failed conformance tests - check "
+                        "output in logging and tracebacks below for "
+                        "details\n{}".format(len(hit_errors),
+                                             '\n'.join(hit_errors)))
+
+
+def _draw_operation_examples(operation, num_tests, value_factory):
+    """Draw examples of parameters for an operation.
+
+    :rtype: list(dict)
+    """
+    log.info("Drawing examples for operation: %r", operation)
+    return draw_examples(operation.parameters_strategy(value_factory),
+                         num_tests)
+
+
+async def _async_operation_test(client, operation, examples):
+    """Test the conformance of the given operation using the provided client,
+    sending all the examples given concurrently.
+
+    :param client: The client to use to access the API.
+    :type client: AsyncClient
+    :param operation: The operation to test.
+    :type operation: schema.Operation
+    :param examples: The parameters to test the operation with.
+    :type examples: list(dict)
+    """
+    log.info("Testing operation: %r", operation)
+    results = await asyncio.gather(
+        *[client.request(operation, params) for params in examples])
+
+    for params, result in zip(examples, results):
+        try:
+            check_response(operation, result)
+        except AssertionError as error:
+            raise AssertionError("{!r} failed with params {!r}: {}".format(
+                operation, params, error))
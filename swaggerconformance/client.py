@@ -2,10 +2,15 @@
 A client for accessing a remote swagger-defined API.
 """
 import logging
+import threading
+import time
+import urllib.parse
 
-from pyswagger import App, Security
+import requests
+from pyswagger import Security
 from pyswagger.contrib.client.requests import Client as PyswaggerClient
 
+from ._schemacache import load_app
 from .codec import CodecFactory
 from .schema import Api
 from .response import Response
@@ -21,17 +26,48 @@ __all__ = ["Client"]
 log = logging.getLogger(__name__)
 
 
-class Client:
+class Client:  # pylint: disable=too-many-instance-attributes
     """Client to use to access the Swagger application according to its schema.
 
+    All requests are sent over a single long-lived HTTP session, so
+    connections to the API are pooled and reused across requests. Call
+    `close` (or use the client as a context manager) to release them.
+
     :param schema_path: The URL of or file path to the API definition.
     :type schema_path: str
     :param codec: Used to convert between JSON and objects.
     :type codec: codec.CodecFactory or None
+    :param pool_size: Maximum number of connections to keep open to each host.
+    :type pool_size: int
+    :param keep_alive: Whether to keep connections open between requests.
+    :type keep_alive: bool
+    :param max_retries: How many times to retry requests that fail to connect.
+    :type max_retries: int
+    :param schema_cache_dir: Directory to cache the parsed schema in, so later
+                             clients loading the same schema start faster.
+                             Cached schemas are loaded with `pickle`, which
+                             can run code, so the directory must only be
+                             writable by trusted users.
+    :type schema_cache_dir: str or None
+    :param instrumentation: Receives timings of the build, send and decode
+                            phases of each request.
+    :type instrumentation: instrumentation.Instrumentation or None
+    :param server_url: URL (``scheme://host:port``) of the server to send
+                       requests to instead of the one given in the schema,
+                       such as a local `stubserver.StubServer`.
+    :type server_url: str or None
     """
 
-    def __init__(self, schema_path, codec=None):
+    def __init__(self, schema_path, codec=None, pool_size=10,  # pylint: disable=too-many-arguments
+                 keep_alive=True, max_retries=0, schema_cache_dir=None,
+                 instrumentation=None, server_url=None):
         self._schema_path = schema_path
+        self._instrumentation = instrumentation
+        self._request_options = {}
+        if server_url is not None:
+            parsed_url = urllib.parse.urlparse(server_url)
+            self._request_options = {'url_scheme': parsed_url.scheme,
+                                     'url_netloc': parsed_url.netloc}
 
         if codec is None:
             codec = CodecFactory()
@@ -39,8 +75,13 @@ class Client:
         self._prim_factory = \
             codec._pyswagger_factory  # pylint: disable=protected-access
 
-        self._app = App.load(schema_path, prim=self._prim_factory)
-        self._app.prepare()
+        self._app = load_app(schema_path, self._prim_factory,
+                             schema_cache_dir)
+
+        self._session = self._create_session(pool_size, keep_alive,
+                                             max_retries)
+        self._client = _PooledPyswaggerClient(Security(self._app),
+                                              self._session)
 
         self._api = Api(self)
 
@@ -48,6 +89,12 @@ class Client:
         return "{}(schema_path={!r})".format(self.__class__.__name__,
                                              self._schema_path)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     @property
     def api(self):
         """The API accessible from this client.
@@ -66,11 +113,47 @@ class Client:
 
         :rtype: pyswagger.io.Response
         """
-        client = PyswaggerClient(Security(self._app))
-        result = client.request(operation._pyswagger_operation(**parameters))  # pylint: disable=protected-access
+        start_time = time.monotonic()
+        pyswagger_operation = operation._pyswagger_operation(**parameters)  # pylint: disable=protected-access
+        built_time = time.monotonic()
+        # pyswagger consumes the options it uses, so pass it a copy.
+        result = self._client.request(pyswagger_operation,
+                                      dict(self._request_options))
+        end_time = time.monotonic()
+
+        if self._instrumentation is not None:
+            # pyswagger does some more building of the request itself before
+            # handing it to the session to send.
+            send_start_time, send_end_time = self._session.send_times()
+            self._instrumentation.record(
+                operation, 'build',
+                (built_time - start_time) + (send_start_time - built_time))
+            self._instrumentation.record(operation, 'send',
+                                         send_end_time - send_start_time)
+            self._instrumentation.record(operation, 'decode',
+                                         end_time - send_end_time)
 
         return Response(result)
 
+    def close(self):
+        """Close all pooled connections held open by this client."""
+        log.debug("Closing connections of: %r", self)
+        self._session.close()
+
+    @staticmethod
+    def _create_session(pool_size, keep_alive, max_retries):
+        log.debug("Creating session with pool size: %r, keep alive: %r, "
+                  "max retries: %r", pool_size, keep_alive, max_retries)
+        session = _TimedSession()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size,
+                                                max_retries=max_retries)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if not keep_alive:
+            session.headers['Connection'] = 'close'
+
+        return session
+
     @property
     def _pyswagger_app(self):
         """The underlying pyswagger definition of the app - useful elsewhere
@@ -79,3 +162,49 @@ class Client:
         :rtype: pyswagger.core.App
         """
         return self._app
+
+
+class _TimedSession(requests.Session):
+    """Session which records when it last started preparing a request to send
+    and finished receiving the response, separately in each thread."""
+
+    def __init__(self):
+        super().__init__()
+        self._times = threading.local()
+
+    def prepare_request(self, request):
+        self._times.send_start = time.monotonic()
+        return super().prepare_request(request)
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        response = super().send(request, **kwargs)
+        # Read the whole body now, so streamed responses are fully received.
+        response.content  # pylint: disable=pointless-statement
+        self._times.send_end = time.monotonic()
+        return response
+
+    def send_times(self):
+        """Times at which the last request sent in this thread started being
+        prepared and had its response received.
+
+        :rtype: tuple(float, float)
+        """
+        return self._times.send_start, self._times.send_end
+
+
+class _PooledPyswaggerClient(PyswaggerClient):
+    """pyswagger client which sends all requests over the provided session,
+    rather than a private one it creates itself.
+
+    :param security: The security credentials to apply to requests.
+    :type security: pyswagger.Security
+    :param session: The session to send requests over.
+    :type session: requests.Session
+    """
+
+    def __init__(self, security, session):
+        super().__init__(security)
+        # The pyswagger client keeps its session in a private attribute, so
+        # this has to be accessed through its mangled name to replace it.
+        self._Client__s.close()  # pylint: disable=no-member,access-member-before-definition
+        self._Client__s = session  # pylint: disable=invalid-name
@@ -0,0 +1,197 @@
+"""
+Hooks for timing the phases of testing each example request, to find where
+the time in a conformance test run is being spent.
+"""
+import logging
+import math
+import random
+import threading
+
+from .results import operation_key
+
+__all__ = ["PHASES", "Instrumentation", "Timings", "DurationStats",
+           "percentile"]
+
+
+log = logging.getLogger(__name__)
+
+
+#: The phases of testing each example, in the order they happen:
+#:
+#: - ``generate`` - Generating the example parameters, along with any other
+#:   overhead of `hypothesis` between examples.
+#: - ``build`` - Building the HTTP request from the parameters.
+#: - ``send`` - Sending the request and receiving the full response.
+#: - ``decode`` - Decoding the response via the codec in use.
+#: - ``check`` - Checking the response is valid.
+PHASES = ("generate", "build", "send", "decode", "check")
+
+
+class Instrumentation:  # pylint: disable=too-few-public-methods
+    """Receiver of the durations of phases of testing each example.
+
+    This implementation discards all durations - subclass it and override
+    `record` to collect them.
+    """
+
+    def record(self, operation, phase, duration):
+        """Record the time taken by one phase of testing an example.
+
+        This may be called from multiple threads at once.
+
+        :param operation: The operation the example is for.
+        :type operation: schema.Operation
+        :param phase: Which of the `PHASES` the duration is of.
+        :type phase: str
+        :param duration: The time taken in seconds.
+        :type duration: float
+        """
+
+
+class Timings(Instrumentation):
+    """Instrumentation aggregating the durations of each phase of testing the
+    examples of each operation.
+
+    Durations are aggregated as they're recorded, so memory use doesn't grow
+    with the number of examples tested.
+    """
+
+    def __init__(self):
+        self._durations = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        with self._lock:
+            operations = sorted(self._durations)
+        return "{}(operations={!r})".format(self.__class__.__name__,
+                                            operations)
+
+    def record(self, operation, phase, duration):
+        with self._lock:
+            phases = self._durations.setdefault(operation_key(operation), {})
+            if phase not in phases:
+                phases[phase] = DurationStats()
+            phases[phase].add(duration)
+
+    def summary(self):
+        """Aggregate timings of each phase of testing each operation.
+
+        The result maps keys of operations, as from `results.operation_key`,
+        to the phases recorded for them, and each of those to a dictionary
+        with keys ``count``, ``total``, ``max``, ``p50``, ``p95`` and ``p99``
+        - the number of examples, their total and longest durations, and the
+        given percentiles of their durations.
+
+        :rtype: dict(str, dict(str, dict(str, float)))
+        """
+        with self._lock:
+            return {key: {phase: stats.summary()
+                          for phase, stats in phases.items()}
+                    for key, phases in self._durations.items()}
+
+    def report(self):
+        """Human readable table of the timings summary, in milliseconds.
+
+        :rtype: str
+        """
+        lines = ["{:<30} {:<8} {:>7} {:>10} {:>8} {:>8} {:>8} {:>8}".format(
+            "operation", "phase", "count", "total", "max", "p50", "p95",
+            "p99")]
+        for key, phases in sorted(self.summary().items()):
+            for phase in sorted(phases, key=_phase_order):
+                timings = phases[phase]
+                lines.append(
+                    "{:<30} {:<8} {:>7} {:>10.1f} {:>8.2f} {:>8.2f} {:>8.2f} "
+                    "{:>8.2f}".format(
+                        key, phase, timings["count"],
+                        timings["total"] * 1000, timings["max"] * 1000,
+                        timings["p50"] * 1000, timings["p95"] * 1000,
+                        timings["p99"] * 1000))
+
+        return '\n'.join(lines)
+
+
+class DurationStats:
+    """Streaming aggregate of durations - their count, total and maximum, and
+    a uniform random sample of them from which to estimate percentiles.
+
+    Percentiles are exact until more durations are added than the sample
+    holds. This isn't thread safe, so callers adding durations from several
+    threads must lock around it.
+
+    :param sample_size: Most durations to keep for estimating percentiles.
+    :type sample_size: int
+    """
+
+    def __init__(self, sample_size=1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+        self._sample = []
+        self._sample_size = sample_size
+        self._random = random.Random(0)
+
+    def __repr__(self):
+        return "{}(count={!r}, total={!r}, max={!r})".format(
+            self.__class__.__name__, self.count, self.total, self.max)
+
+    def add(self, duration):
+        """Add a duration to the aggregate.
+
+        :param duration: The duration in seconds.
+        :type duration: float
+        """
+        self.count += 1
+        self.total += duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+        # Each duration added is kept in the sample with equal probability.
+        if len(self._sample) < self._sample_size:
+            self._sample.append(duration)
+        else:
+            index = self._random.randrange(self.count)
+            if index < self._sample_size:
+                self._sample[index] = duration
+
+    def percentile(self, percent):
+        """The given percentile of the durations, estimated from the sample.
+
+        :param percent: The percentile to find, between 0 and 100.
+        :type percent: float
+        :rtype: float or None
+        """
+        return percentile(sorted(self._sample), percent)
+
+    def summary(self):
+        """Dictionary with keys ``count``, ``total``, ``max``, ``p50``,
+        ``p95`` and ``p99``.
+
+        :rtype: dict(str, float)
+        """
+        sample = sorted(self._sample)
+        return {"count": self.count,
+                "total": self.total,
+                "max": self.max,
+                "p50": percentile(sample, 50),
+                "p95": percentile(sample, 95),
+                "p99": percentile(sample, 99)}
+
+
+def percentile(sorted_values, percent):
+    """The given percentile of some values, by the nearest rank method.
+
+    :param sorted_values: The values, sorted in ascending order.
+    :type sorted_values: list(float)
+    :param percent: The percentile to find, between 0 and 100.
+    :type percent: float
+    :rtype: float or None
+    """
+    if len(sorted_values) == 0:
+        return None
+
+    rank = int(math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def _phase_order(phase):
+    return PHASES.index(phase) if phase in PHASES else len(PHASES)
@@ -0,0 +1,230 @@
+"""
+Latency budgets for the operations of an API, so a conformance test can also
+fail operations which respond too slowly.
+
+Budgets can be declared in a JSON file, on the command line, or in the schema
+itself with an ``x-latency-budget`` extension on each operation - or at the
+top level of the schema for the default budget of all operations. All of
+these take limits in milliseconds on any of the ``p95`` or ``p99``
+percentiles, or the ``max`` latency of requests to an operation, such as::
+
+    "x-latency-budget": {"p95": 200, "max": 1000}
+
+Budgets in the schema are only applied from the command line when asked for
+with ``--schema-latency-budgets``, since reading them means reading the
+schema a second time.
+
+A budget file holds a default budget and budgets for individual operations,
+keyed by `results.operation_key`::
+
+    {"default": {"p99": 500}, "operations": {"getPetById": {"p95": 100}}}
+"""
+import logging
+import json
+
+from ._schemacache import read_schema
+from .instrumentation import percentile
+from .results import operation_key
+
+__all__ = ["LatencyBudget", "LatencyBudgets", "EXTENSION"]
+
+
+log = logging.getLogger(__name__)
+
+
+#: Name of the schema extension declaring latency budgets.
+EXTENSION = "x-latency-budget"
+
+# The statistics of latencies which budgets can limit, by their names in
+# budget declarations.
+_LIMITS = ("p95", "p99", "max")
+
+_METHODS = ("get", "put", "post", "delete")
+
+
+class LatencyBudget:
+    """Limits on the latencies of requests to an operation, in seconds.
+
+    :param p95: Limit on the 95th percentile latency.
+    :type p95: float or None
+    :param p99: Limit on the 99th percentile latency.
+    :type p99: float or None
+    :param maximum: Limit on the highest latency.
+    :type maximum: float or None
+    """
+
+    def __init__(self, p95=None, p99=None, maximum=None):
+        self.p95 = p95
+        self.p99 = p99
+        self.maximum = maximum
+
+    def __repr__(self):
+        return "{}(p95={!r}, p99={!r}, maximum={!r})".format(
+            self.__class__.__name__, self.p95, self.p99, self.maximum)
+
+    def __eq__(self, other):
+        return (isinstance(other, LatencyBudget) and
+                (self.p95, self.p99, self.maximum) ==
+                (other.p95, other.p99, other.maximum))
+
+    def violations(self, latencies):
+        """Describe how some latencies exceed this budget.
+
+        :param latencies: Latencies of requests, in seconds.
+        :type latencies: list(float)
+        :return: A description of each limit exceeded, or nothing if within
+                 budget.
+        :rtype: list(str)
+        """
+        latencies = sorted(latencies)
+        if len(latencies) == 0:
+            return []
+
+        violations = []
+        for name, limit, actual in (
+                ("p95", self.p95, percentile(latencies, 95)),
+                ("p99", self.p99, percentile(latencies, 99)),
+                ("max", self.maximum, latencies[-1])):
+            if limit is not None and actual > limit:
+                violations.append("{} latency {:.1f}ms exceeds budget of "
+                                  "{:.1f}ms".format(name, actual * 1000,
+                                                    limit * 1000))
+
+        return violations
+
+    @classmethod
+    def from_dict(cls, data):
+        """Budget declared as a dictionary of limits in milliseconds, with
+        any of the keys ``p95``, ``p99`` and ``max``.
+
+        :param data: The declared limits.
+        :type data: dict(str, float)
+        :rtype: LatencyBudget
+        """
+        unknown = set(data) - set(_LIMITS)
+        if len(unknown) > 0:
+            raise ValueError("Unknown latency limits {!r} - must be any of "
+                             "{!r}".format(sorted(unknown), _LIMITS))
+        limits = {name: None if data.get(name) is None else
+                  float(data[name]) / 1000 for name in _LIMITS}
+
+        return cls(limits["p95"], limits["p99"], limits["max"])
+
+
+class LatencyBudgets:
+    """Latency budgets for the operations of an API.
+
+    :param default: Budget of operations without one of their own.
+    :type default: LatencyBudget or None
+    :param operations: Budgets of individual operations, by operation key.
+    :type operations: dict(str, LatencyBudget) or None
+    """
+
+    def __init__(self, default=None, operations=None):
+        self.default = default
+        self.operations = dict(operations or {})
+
+    def __repr__(self):
+        return "{}(default={!r}, operations={!r})".format(
+            self.__class__.__name__, self.default, sorted(self.operations))
+
+    def budget_for(self, operation):
+        """The budget of an operation, if it has one.
+
+        :param operation: The operation.
+        :type operation: schema.Operation
+        :rtype: LatencyBudget or None
+        """
+        return self.operations.get(operation_key(operation), self.default)
+
+    def merged(self, other):
+        """Combine these budgets with others, which take precedence.
+
+        The budgets of individual operations always take precedence over the
+        default budget, wherever they're declared.
+
+        :param other: The budgets to override these with.
+        :type other: LatencyBudgets
+        :rtype: LatencyBudgets
+        """
+        operations = dict(self.operations)
+        operations.update(other.operations)
+        default = self.default if other.default is None else other.default
+
+        return LatencyBudgets(default, operations)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Budgets declared as a dictionary with keys ``default`` and
+        ``operations``, as in a budget file.
+
+        :param data: The declared budgets.
+        :type data: dict
+        :rtype: LatencyBudgets
+        """
+        default = data.get("default")
+        return cls(None if default is None else
+                   LatencyBudget.from_dict(default),
+                   {key: LatencyBudget.from_dict(budget)
+                    for key, budget in data.get("operations", {}).items()})
+
+    @classmethod
+    def load(cls, path):
+        """Read budgets from a JSON budget file.
+
+        :param path: Path of the file to read.
+        :type path: str
+        :rtype: LatencyBudgets
+        """
+        with open(path, encoding='utf-8') as budgets_file:
+            return cls.from_dict(json.load(budgets_file))
+
+    @classmethod
+    def from_schema(cls, schema_path):
+        """Read budgets declared by ``x-latency-budget`` extensions in a
+        schema.
+
+        Only the top-level schema is read, so extensions in external files it
+        references aren't found.
+
+        :param schema_path: The path to / URL of the schema.
+        :type schema_path: str
+        :rtype: LatencyBudgets
+        """
+        content = read_schema(schema_path)
+        try:
+            raw_schema = json.loads(content.decode('utf-8'))
+        except ValueError:
+            raw_schema = _load_yaml(schema_path, content)
+
+        default = raw_schema.get(EXTENSION)
+        operations = {}
+        for path, path_item in (raw_schema.get("paths") or {}).items():
+            for method in _METHODS:
+                raw_operation = path_item.get(method) or {}
+                if EXTENSION in raw_operation:
+                    key = raw_operation.get("operationId") or \
+                        "{} {}".format(method.upper(), path)
+                    operations[key] = LatencyBudget.from_dict(
+                        raw_operation[EXTENSION])
+        log.debug("Read latency budgets of operations: %r", operations)
+
+        return cls(None if default is None else
+                   LatencyBudget.from_dict(default), operations)
+
+
+def _load_yaml(schema_path, content):
+    """Parse a schema which isn't JSON as YAML, if PyYAML is installed.
+
+    PyYAML isn't a dependency of this package, though pyswagger needs it to
+    load YAML schemas itself, so it's only imported when needed.
+
+    :rtype: dict
+    """
+    try:
+        import yaml
+    except ImportError:
+        raise ValueError("Schema {!r} isn't JSON, and reading it as YAML "
+                         "requires PyYAML".format(schema_path))
+
+    return yaml.safe_load(content)
@@ -2,6 +2,7 @@
 A response received to a Swagger API operation.
 """
 import logging
+import collections.abc
 
 __all__ = ["Response"]
 
@@ -9,10 +10,47 @@ __all__ = ["Response"]
 log = logging.getLogger(__name__)
 
 
-class CaseInsensitiveDict(dict):
-    """Dictionary with case insensitive lookup of string keys."""
+class CaseInsensitiveDict(collections.abc.Mapping):
+    """Mapping with case insensitive lookup of string keys.
+
+    Keys are normalized once when the mapping is built, so each lookup takes
+    constant time. Values of keys differing only by case are combined into a
+    single list, as for HTTP headers which are sent multiple times. Iterating
+    gives the keys in the case they were first provided.
+
+    :param data: Mapping, or iterable of key and value pairs, to copy.
+    :type data: dict or iterable
+    """
+
+    def __init__(self, data=()):
+        if isinstance(data, collections.abc.Mapping):
+            data = data.items()
+
+        self._store = {}
+        for key, value in data:
+            normalized_key = key.lower()
+            if normalized_key in self._store:
+                first_key, first_value = self._store[normalized_key]
+                value = self._as_list(first_value) + self._as_list(value)
+                self._store[normalized_key] = (first_key, value)
+            else:
+                self._store[normalized_key] = (key, value)
+
     def __getitem__(self, key):
-        return {k.lower(): v for k, v in self.items()}[key.lower()]
+        return self._store[key.lower()][1]
+
+    def __iter__(self):
+        return (key for key, _ in self._store.values())
+
+    def __len__(self):
+        return len(self._store)
+
+    def __repr__(self):
+        return "{}({!r})".format(self.__class__.__name__, dict(self.items()))
+
+    @staticmethod
+    def _as_list(value):
+        return value if isinstance(value, list) else [value]
 
 
 class Response:
@@ -24,6 +62,7 @@ class Response:
 
     def __init__(self, raw_response):
         self._raw_response = raw_response
+        self._headers = None
 
     @property
     def status(self):
@@ -55,6 +94,10 @@ class Response:
         Header field names are case insensitive (See
         http://www.ietf.org/rfc/rfc2616.txt)
 
-        :rtype: dict(str, list(str))
+        The headers are a read-only mapping, not a `dict`.
+
+        :rtype: CaseInsensitiveDict
         """
-        return CaseInsensitiveDict(self._raw_response.header)
+        if self._headers is None:
+            self._headers = CaseInsensitiveDict(self._raw_response.header)
+        return self._headers
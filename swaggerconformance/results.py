@@ -0,0 +1,255 @@
+"""
+Records of the results of conformance test runs - streaming logs of the
+results of individual requests, and summaries of the results of each
+operation which can be merged across separate runs.
+"""
+import logging
+import hashlib
+import json
+import threading
+import time
+
+from ._values import encode_value
+
+__all__ = ["ResultsLog", "RunSummary", "operation_key"]
+
+
+log = logging.getLogger(__name__)
+
+
+class ResultsLog:
+    """Log of the results of requests, written as one JSON object per line.
+
+    Each record is written and flushed as soon as it's made, and nothing is
+    held in memory afterwards, so the log can be followed while a run is in
+    progress and runs of any length can be logged. Records may be made from
+    multiple threads at once.
+
+    Each record has the keys:
+
+    - ``operation`` - The ID of the operation the request was made against.
+    - ``params_digest`` - A digest of the parameters used on the request.
+    - ``status`` - The status code of the response, or `None` if none was
+      received.
+    - ``latency`` - The time taken in seconds to receive the response.
+    - ``passed`` - Whether the response was valid.
+    - ``reason`` - Why the response was invalid, or `None` if it passed.
+    - ``timestamp`` - The time the record was made, in seconds since the
+      epoch.
+
+    :param sink: Path of the file to write to, or file-like object to write
+                 to. Files opened from a path are closed by `close`, whereas
+                 file-like objects are left open.
+    :type sink: str or file
+    """
+
+    def __init__(self, sink):
+        if isinstance(sink, str):
+            log.debug("Opening results log at: %r", sink)
+            self._file = open(sink, 'w', encoding='utf-8')
+            self._owns_file = True
+        else:
+            self._file = sink
+            self._owns_file = False
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "{}(sink={!r})".format(self.__class__.__name__, self._file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, operation, params, status, latency, reason=None):  # pylint: disable=too-many-arguments
+        """Record the result of a single request.
+
+        :param operation: The operation the request was made against.
+        :type operation: schema.Operation
+        :param params: The parameters used on the request.
+        :type params: dict
+        :param status: The response status code, or `None` if no response.
+        :type status: int or None
+        :param latency: Seconds taken to receive the response.
+        :type latency: float
+        :param reason: Why the request failed, or `None` if it passed.
+        :type reason: str or None
+        """
+        line = json.dumps({"operation": operation.id,
+                           "params_digest": params_digest(params),
+                           "status": status,
+                           "latency": latency,
+                           "passed": reason is None,
+                           "reason": reason,
+                           "timestamp": time.time()})
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        """Close the file written to, if it was opened by this log."""
+        if self._owns_file:
+            self._file.close()
+
+
+def params_digest(params):
+    """Short digest identifying a set of request parameters.
+
+    Values which can't be represented in JSON are included as encoded for a
+    corpus, so dates by their text and bytes and files by their content,
+    which keeps the digest the same for the same parameters across runs.
+
+    :param params: The parameters used on a request.
+    :type params: dict
+    :rtype: str
+    """
+    encoded = json.dumps(encode_value(params), sort_keys=True, default=repr)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+class RunSummary:
+    """Summary of the outcome of testing each operation in a run, which can be
+    saved to a file and merged with the summaries of other runs.
+
+    Operations are identified by `operation_key`. Each has the total time in
+    seconds spent testing it, whether it passed, the reason it failed if not,
+    and the fingerprint of its definition when tested. Outcomes may be
+    recorded from multiple threads at once.
+
+    :param operations: Initial outcomes of operations, in the format returned
+                       by `to_dict`.
+    :type operations: dict or None
+    """
+
+    # Increment this whenever the format of saved summaries changes.
+    FORMAT = 1
+
+    def __init__(self, operations=None):
+        self._operations = dict(operations or {})
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "{}(operations={!r})".format(self.__class__.__name__,
+                                            sorted(self._operations))
+
+    def record(self, operation, duration, error=None):
+        """Record the outcome of testing an operation.
+
+        If the operation has already been recorded, the duration is added to
+        the previous total, and it's failed if either test failed.
+
+        :param operation: The operation tested.
+        :type operation: schema.Operation
+        :param duration: Seconds spent testing it.
+        :type duration: float
+        :param error: Why the operation failed, or `None` if it passed.
+        :type error: str or None
+        """
+        key = operation_key(operation)
+        with self._lock:
+            outcome = self._operations.setdefault(
+                key, {"duration": 0, "passed": True, "error": None})
+            outcome["fingerprint"] = operation.fingerprint
+            outcome["duration"] += duration
+            if error is not None and outcome["passed"]:
+                outcome["passed"] = False
+                outcome["error"] = error
+
+    def to_dict(self):
+        """The outcome of each operation, as a dictionary mapping operation
+        keys to dictionaries with keys ``duration``, ``passed``, ``error`` and
+        ``fingerprint``.
+
+        :rtype: dict(str, dict)
+        """
+        with self._lock:
+            return {key: dict(outcome)
+                    for key, outcome in self._operations.items()}
+
+    def durations(self):
+        """Seconds spent testing each operation, by operation key.
+
+        :rtype: dict(str, float)
+        """
+        return {key: outcome["duration"]
+                for key, outcome in self.to_dict().items()}
+
+    def unchanged_passes(self, operations):
+        """The operations which passed when last recorded, and whose
+        definitions haven't changed since.
+
+        :param operations: The operations to check.
+        :type operations: iterable(schema.Operation)
+        :rtype: list(schema.Operation)
+        """
+        outcomes = self.to_dict()
+        return [operation for operation in operations
+                if operation_key(operation) in outcomes and
+                outcomes[operation_key(operation)]["passed"] and
+                outcomes[operation_key(operation)].get("fingerprint") ==
+                operation.fingerprint]
+
+    def failed(self):
+        """Keys of the operations which failed, in sorted order.
+
+        :rtype: list(str)
+        """
+        return sorted(key for key, outcome in self.to_dict().items()
+                      if not outcome["passed"])
+
+    def save(self, path):
+        """Write the summary to a JSON file.
+
+        :param path: Path of the file to write.
+        :type path: str
+        """
+        with open(path, 'w', encoding='utf-8') as summary_file:
+            json.dump({"format": self.FORMAT, "operations": self.to_dict()},
+                      summary_file, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, path):
+        """Read a summary written by `save`.
+
+        :param path: Path of the file to read.
+        :type path: str
+        :rtype: RunSummary
+        """
+        with open(path, encoding='utf-8') as summary_file:
+            data = json.load(summary_file)
+        if data.get("format") != cls.FORMAT:
+            raise ValueError("Unsupported summary format {!r} in: {!r}".format(
+                data.get("format"), path))
+
+        return cls(data["operations"])
+
+    @classmethod
+    def merge(cls, summaries):
+        """Combine summaries of runs, such as those of separate shards.
+
+        Where more than one summary has an outcome for an operation, the last
+        one wins.
+
+        :param summaries: The summaries to merge.
+        :type summaries: iterable(RunSummary)
+        :rtype: RunSummary
+        """
+        operations = {}
+        for summary in summaries:
+            operations.update(summary.to_dict())
+
+        return cls(operations)
+
+
+def operation_key(operation):
+    """Key identifying an operation across runs - its operation ID if it has
+    one, otherwise its method and path.
+
+    :param operation: The operation to identify.
+    :type operation: schema.Operation
+    :rtype: str
+    """
+    if operation.id is not None:
+        return operation.id
+    return "{} {}".format(operation.method.upper(), operation.path)
@@ -4,11 +4,13 @@ represent parts of that schema which can later be filled in by generated
 values.
 
 It also exposes the `Primitive` interface, which is the type of object that is
-passed to a `StrategyFactory` to generate values for.
+passed to a `StrategyFactory` to generate values for, and the `Validator` used
+to check values received from the API against the schema.
 """
 from ._api import Api
 from ._operation import Operation
 from ._parameter import Parameter
 from ._primitive import Primitive
+from ._validator import Validator
 
-__all__ = ["Api", "Operation", "Parameter", "Primitive"]
+__all__ = ["Api", "Operation", "Parameter", "Primitive", "Validator"]
@@ -3,6 +3,8 @@ Templates for key parts of a Swagger-defined API which can be used to generate
 specific API requests adhering to the definition.
 """
 import logging
+import collections.abc
+import threading
 
 from ._operation import Operation
 
@@ -25,14 +27,19 @@ class Api:
         self._client = client
         self._app = client._pyswagger_app  # pylint: disable=protected-access
 
-        self._endpoints_map = {path: self._method_to_op_map(path)
-                               for path in self._app.root.paths}
+        # Operations are only built from their definitions when first
+        # accessed, so the cost of a large API scales with what's used of it.
+        self._endpoints_map = _LazyMapping(self._app.root.paths,
+                                           self._method_to_op_map)
 
     @property
     def endpoints(self):
         """Mapping of the endpoints of this API to their operations.
 
-        :rtype: dict(str, dict(str, schema.Operation))
+        Operations are built when first accessed, and the same operation
+        returned on every later access.
+
+        :rtype: Mapping(str, Mapping(str, schema.Operation))
         """
         return self._endpoints_map
 
@@ -58,13 +65,52 @@ class Api:
         log.debug("Expanding path: %r", path)
         operations_defs = self._app.root.paths[path]
 
-        operations_map = {}
-        for operation_name in self._OPERATIONS:
-            log.debug("Accessing operation: %s", operation_name)
-            operation = getattr(operations_defs, operation_name)
-            if operation is not None:
-                log.debug("Have operation")
-                operations_map[operation_name] = Operation(operation)
+        operation_names = [operation_name
+                           for operation_name in self._OPERATIONS
+                           if getattr(operations_defs, operation_name)
+                           is not None]
+
+        log.debug("Expanded path as: %r", operation_names)
+        return _LazyMapping(
+            operation_names,
+            lambda operation_name: Operation(getattr(operations_defs,
+                                                     operation_name)))
+
+
+class _LazyMapping(collections.abc.Mapping):
+    """Read-only mapping of a fixed set of keys to values built by a function
+    of the key the first time each is accessed.
+
+    Values may be accessed from multiple threads at once, and each is only
+    ever built once.
+    """
 
-        log.debug("Expanded path as: %r", operations_map)
-        return operations_map
+    def __init__(self, keys, build_value):
+        self._keys = list(keys)
+        self._key_set = set(self._keys)
+        self._build_value = build_value
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "{}(keys={!r})".format(self.__class__.__name__, self._keys)
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            if key not in self._key_set:
+                raise
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = self._build_value(key)
+            return self._values[key]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._key_set
@@ -0,0 +1,66 @@
+"""
+Fingerprints identifying the content of parts of a Swagger schema.
+"""
+import logging
+import hashlib
+import json
+
+from pyswagger.spec.base import BaseObj
+
+from .._values import encode_value
+
+__all__ = ["fingerprint"]
+
+
+log = logging.getLogger(__name__)
+
+
+# Fields which only document a schema, so don't affect testing against it.
+_DOCUMENTATION_FIELDS = frozenset(['$ref', 'description', 'summary', 'title',
+                                   'externalDocs', 'example', 'tags'])
+
+
+def fingerprint(definition):
+    """Digest of a pyswagger definition, after following all references.
+
+    Definitions which differ only in documentation, or in how references
+    between their parts are laid out, have the same fingerprint.
+
+    :param definition: The definition to fingerprint, which may also be a
+                       dictionary or list of definitions and plain values.
+    :type definition: pyswagger.spec.base.BaseObj or dict or list
+    :rtype: str
+    """
+    canonical = json.dumps(_canonical(definition, []), sort_keys=True,
+                           default=repr)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _canonical(value, parents):
+    """Convert a value in a definition to plain JSON compatible types.
+
+    :param parents: The IDs of the definitions containing this one, so
+                    recursive definitions can be recognised.
+    :type parents: list(int)
+    """
+    while getattr(value, 'ref_obj', None) is not None:
+        value = value.ref_obj
+
+    if isinstance(value, BaseObj):
+        if id(value) in parents:
+            # Refer to the recursive definition by how far up it is.
+            return {"$recursive": len(parents) - parents.index(id(value))}
+        parents.append(id(value))
+        canonical = {field: _canonical(getattr(value, field), parents)
+                     for field in value.__swagger_fields__
+                     if field not in _DOCUMENTATION_FIELDS}
+        parents.pop()
+        return canonical
+    if isinstance(value, dict):
+        return {str(key): _canonical(item, parents)
+                for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item, parents) for item in value]
+
+    # Encode values JSON can't represent, such as bytes, by their content.
+    return encode_value(value)
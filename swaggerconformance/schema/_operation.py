@@ -4,8 +4,10 @@ specific API requests adhering to the definition.
 """
 import logging
 
+from ._fingerprint import fingerprint
 from ._parameter import Parameter
 from ._primitive import Primitive
+from ._validator import Validator
 from ..strategies.basestrategies import merge_optional_dict_strategy
 
 __all__ = ["Operation"]
@@ -14,25 +16,32 @@ __all__ = ["Operation"]
 log = logging.getLogger(__name__)
 
 
-class Operation:
+class Operation:  # pylint: disable=too-many-instance-attributes
     """Template for an operation on an endpoint.
 
     :param operation: The definition of the operation in the API schema.
     :type operation: pyswagger.spec.v2_0.objects.Operation
     """
 
+    __slots__ = ("_operation", "_id", "_path", "_method", "_response_codes",
+                 "_parameters", "_response_validators", "_fingerprint")
+
     def __init__(self, operation):
         self._operation = operation
+        self._id = operation.operationId
+        self._path = operation.path
+        self._method = operation.method
+        # Parameters and response codes are only populated when first
+        # accessed, since many operations of large APIs are never tested.
         self._response_codes = None
-        self._parameters = {}
-
-        self._populate_response_codes()
-        self._populate_parameters()
+        self._parameters = None
+        self._response_validators = {}
+        self._fingerprint = None
 
     def __repr__(self):
         return "{}(id={!r}, method={!r}, path={!r}, params={!r})".format(
             self.__class__.__name__, self.id, self.method, self.path,
-            self._parameters)
+            self.parameters)
 
     def parameters_strategy(self, value_factory):
         """Generate hypothesis fixed dictionary mapping of parameters.
@@ -40,10 +49,16 @@ class Operation:
         :param value_factory: Factory to generate strategies for values.
         :type value_factory: strategies.StrategyFactory
         """
-        req_params = {param_name: param_template.strategy(value_factory)
+        # Each parameter is produced within its share of any request budget.
+        factories = value_factory.parameters_factories(
+            list(self.parameters.values()))
+        strategies = {param_name: param_template.strategy(factory)
+                      for (param_name, param_template), factory in
+                      zip(self.parameters.items(), factories)}
+        req_params = {param_name: strategies[param_name]
                       for param_name, param_template in self.parameters.items()
                       if param_template.required}
-        opt_params = {param_name: param_template.strategy(value_factory)
+        opt_params = {param_name: strategies[param_name]
                       for param_name, param_template in self.parameters.items()
                       if not param_template.required}
 
@@ -55,7 +70,7 @@ class Operation:
 
         :rtype: str
         """
-        return self._operation.operationId
+        return self._id
 
     @property
     def path(self):
@@ -63,7 +78,7 @@ class Operation:
 
         :rtype: str
         """
-        return self._operation.path
+        return self._path
 
     @property
     def method(self):
@@ -71,7 +86,7 @@ class Operation:
 
         :rtype: str
         """
-        return self._operation.method
+        return self._method
 
     @property
     def parameters(self):
@@ -79,6 +94,8 @@ class Operation:
 
         :rtype: dict(str, Parameter)
         """
+        if self._parameters is None:
+            self._populate_parameters()
         return self._parameters
 
     @property
@@ -87,25 +104,76 @@ class Operation:
 
         :rtype: set(int)
         """
+        if self._response_codes is None:
+            self._populate_response_codes()
         return self._response_codes
 
+    @property
+    def fingerprint(self):
+        """Digest of the full definition of this operation, including its
+        parameters and responses with all references followed.
+
+        It changes if any part of the definition affecting how the operation
+        is tested changes, but not if only its documentation does.
+
+        :rtype: str
+        """
+        if self._fingerprint is None:
+            # The path and method aren't part of the operation definition.
+            self._fingerprint = fingerprint({"method": self.method,
+                                             "path": self.path,
+                                             "operation": self._operation})
+        return self._fingerprint
+
+    def response_validator(self, status_code):
+        """Validator for bodies of responses with the given status code.
+
+        The validator is compiled from the response schema the first time it's
+        requested, and the same validator returned on every later call.
+
+        :param status_code: The HTTP status code of the response.
+        :type status_code: int
+        :rtype: schema.Validator or None
+        """
+        if status_code not in self._response_validators:
+            schema = self._response_schema(status_code)
+            self._response_validators[status_code] = \
+                None if schema is None else Validator(Primitive(schema))
+
+        return self._response_validators[status_code]
+
+    def _response_schema(self, status_code):
+        """The schema of bodies of responses with the given status code, or
+        `None` if no schema is defined for them.
+
+        :rtype: pyswagger.spec.v2_0.objects.Schema or None
+        """
+        responses = self._operation.responses
+        response = responses.get(str(status_code), responses.get('default'))
+        while getattr(response, 'ref_obj', None) is not None:
+            response = response.ref_obj
+
+        return None if response is None else response.schema
+
     def _populate_response_codes(self):
         # 'default' is a special value to cover undocumented response codes:
         # https://github.com/OAI/OpenAPI-Specification/blob/master/versions/2.0.md#fixed-fields-9
         # If only that value is specified, assume that any successful response
         # code is allowed.
-        self._response_codes = {int(code) for code in self._operation.responses
-                                if code != "default"}
-        if len(self._response_codes) == 0:
+        response_codes = {int(code) for code in self._operation.responses
+                          if code != "default"}
+        if len(response_codes) == 0:
             assert "default" in self._operation.responses, \
                 "No response codes at all"
             log.warning("Only 'default' response defined - allowing any 2XX")
-            self._response_codes = set(range(200, 300))
-        if all((x > 299 or x < 200) for x in self._response_codes):
+            response_codes = set(range(200, 300))
+        if all((x > 299 or x < 200) for x in response_codes):
             log.warning("No success responses defined - allowing 200")
-            self._response_codes.add(200)
+            response_codes.add(200)
+        self._response_codes = response_codes
 
     def _populate_parameters(self):
+        parameters = {}
         for parameter in self._operation.parameters:
             log.debug("Handling parameter: %r", parameter.name)
 
@@ -119,7 +187,8 @@ class Operation:
                 log.debug("Schema defined parameter")
                 template = Parameter(Primitive(parameter.schema))
 
-            self._parameters[parameter.name] = template
+            parameters[parameter.name] = template
+        self._parameters = parameters
 
     @property
     def _pyswagger_operation(self):
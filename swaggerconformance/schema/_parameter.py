@@ -16,6 +16,8 @@ class Parameter:
     :type swagger_definition: schema.Primitive
     """
 
+    __slots__ = ("_swagger_definition",)
+
     def __init__(self, swagger_definition):
         self._swagger_definition = swagger_definition
 
@@ -34,6 +36,14 @@ class Parameter:
 
         return value_template.strategy()
 
+    @property
+    def definition(self):
+        """The definition of the values of this parameter.
+
+        :rtype: schema.Primitive
+        """
+        return self._swagger_definition
+
     @property
     def name(self):
         """The name of this parameter, if it has one.
@@ -4,9 +4,15 @@ Wrapper around a Swagger definition of a paramater for an operation.
 # This class exposes swagger format named properties which pylint objects to.
 # There's also a few properties duplicated from the Parameter class it doesn't
 # like, so disable that warning too, except it can't be disabled locally so
-# has to be disabled globally.
+# has to be disabled globally. The fields of the definition are all held in
+# their own slots, of which there are a lot, and they're set when the single
+# canonical instance for a definition is created rather than in `__init__`.
 # pylint: disable=invalid-name,too-many-public-methods
+# pylint: disable=too-many-instance-attributes,attribute-defined-outside-init
 import logging
+import threading
+import types
+import weakref
 
 __all__ = ["Primitive"]
 
@@ -14,6 +20,19 @@ __all__ = ["Primitive"]
 log = logging.getLogger(__name__)
 
 
+# Marks child primitives which haven't been built yet, as opposed to those
+# which don't exist and so are `None`.
+_UNSET = object()
+
+# The canonical primitive of each class wrapping each resolved definition,
+# keyed by the class and ID of the definition. Each primitive holds its
+# definition, so the ID can't be reused by another object while the primitive
+# is alive, and entries are dropped along with the primitive once it's not
+# used anywhere else.
+_CANONICAL = weakref.WeakValueDictionary()
+_CANONICAL_LOCK = threading.Lock()
+
+
 class Primitive:
     """Wrapper around a primitive in a swagger schema.
 
@@ -24,14 +43,68 @@ class Primitive:
     that the same as well since it's sufficiently similar we don't care about
     the distinction. Items don't have names though, so be careful of that.
 
+    References are followed to the definition they point to, and the same
+    instance is returned for every definition resolving to the same one, so
+    primitives can be compared and cached by identity.
+
     :param swagger_definition: The swagger spec definition of this parameter.
     :type swagger_definition: pyswagger.spec.v2_0.objects.Parameter or
                               pyswagger.spec.v2_0.objects.Items or
                               pyswagger.spec.v2_0.objects.Schema
     """
 
-    def __init__(self, swagger_definition):
-        self._swagger_definition = self._resolve(swagger_definition)
+    # The fields of the definition are read once on construction, so each
+    # access afterwards is just a slot lookup. Child primitives are only
+    # built when first accessed, since definitions may be recursive.
+    __slots__ = ("__weakref__", "_swagger_definition", "_name", "_type",
+                 "_format", "_required", "_location", "_items", "_properties",
+                 "_additional_properties", "_max_properties",
+                 "_min_properties", "_maximum", "_exclusive_maximum",
+                 "_minimum", "_exclusive_minimum", "_multiple_of",
+                 "_max_length", "_min_length", "_pattern", "_max_items",
+                 "_min_items", "_unique_items", "_enum")
+
+    def __new__(cls, swagger_definition):
+        definition = cls._resolve(swagger_definition)
+        key = (cls, id(definition))
+        with _CANONICAL_LOCK:
+            primitive = _CANONICAL.get(key)
+            if primitive is None:
+                primitive = super().__new__(cls)
+                primitive._snapshot(definition)
+                _CANONICAL[key] = primitive
+
+        return primitive
+
+    def _snapshot(self, definition):
+        self._swagger_definition = definition
+
+        self._name = getattr(definition, 'name', None)
+        self._type = definition.type
+        self._format = definition.format
+        self._required = getattr(definition, 'required', None)
+        self._location = getattr(definition, 'in', None)
+        self._items = _UNSET
+        self._properties = _UNSET
+        # These attributes are only present on `Schema` objects.
+        self._additional_properties = None
+        if hasattr(definition, 'additionalProperties'):
+            self._additional_properties = \
+                definition.additionalProperties not in (None, False)
+        self._max_properties = getattr(definition, 'maxProperties', None)
+        self._min_properties = getattr(definition, 'minProperties', None)
+        self._maximum = definition.maximum
+        self._exclusive_maximum = definition.exclusiveMaximum
+        self._minimum = definition.minimum
+        self._exclusive_minimum = definition.exclusiveMinimum
+        self._multiple_of = definition.multipleOf
+        self._max_length = definition.maxLength
+        self._min_length = definition.minLength
+        self._pattern = definition.pattern
+        self._max_items = definition.maxItems
+        self._min_items = definition.minItems
+        self._unique_items = definition.uniqueItems
+        self._enum = definition.enum
 
     @staticmethod
     def _resolve(definition):
@@ -53,7 +126,7 @@ class Primitive:
 
         :rtype: str or None
         """
-        return getattr(self._swagger_definition, 'name', None)
+        return self._name
 
     @property
     def type(self):
@@ -61,7 +134,7 @@ class Primitive:
 
         :rtype: str
         """
-        return self._swagger_definition.type
+        return self._type
 
     @property
     def format(self):
@@ -69,7 +142,7 @@ class Primitive:
 
         :rtype: str or None
         """
-        return self._swagger_definition.format
+        return self._format
 
     @property
     def required(self):
@@ -81,8 +154,7 @@ class Primitive:
         # then the default is that the value is required.
         # This also clashes with the name of the list of required fields in a
         # schema object, so only use the value if it's a Boolean.
-        required = getattr(self._swagger_definition, 'required', None)
-        return required if isinstance(required, bool) else True
+        return self._required if isinstance(self._required, bool) else True
 
     @property
     def location(self):
@@ -91,7 +163,7 @@ class Primitive:
 
         :rtype: str or None
         """
-        return getattr(self._swagger_definition, 'in', None)
+        return self._location
 
     @property
     def items(self):
@@ -99,21 +171,29 @@ class Primitive:
 
         :rtype: Primitive or None
         """
-        items = self._swagger_definition.items
-        return None if items is None else self.__class__(items)
+        if self._items is _UNSET:
+            items = self._swagger_definition.items
+            self._items = None if items is None else self.__class__(items)
+        return self._items
 
     @property
     def properties(self):
-        """The dict of Primitive elements of this Primitive if it's an object.
+        """Read-only mapping of the Primitive elements of this Primitive if
+        it's an object.
+
+        The mapping is shared by everything using the same definition, so
+        can't be modified.
 
-        :rtype: dict(str, Primitive) or None
+        :rtype: Mapping(str, Primitive) or None
         """
-        # This attribute is only present on `Schema` objects.
-        if not hasattr(self._swagger_definition, 'properties'):
-            return None  # pragma: no cover - means called on wrong obect type
-        return {prop_name: self.__class__(prop_value)
-                for prop_name, prop_value in
-                self._swagger_definition.properties.items()}
+        if self._properties is _UNSET:
+            # This attribute is only present on `Schema` objects.
+            properties = getattr(self._swagger_definition, 'properties', None)
+            self._properties = None if properties is None else \
+                types.MappingProxyType(
+                    {prop_name: self.__class__(prop_value)
+                     for prop_name, prop_value in properties.items()})
+        return self._properties
 
     @property
     def required_properties(self):
@@ -124,8 +204,8 @@ class Primitive:
         # This clashes with the name of the bool indicating if this is a
         # required parameter on a paramter object, so only use the value if
         # it's a list.
-        reqd_props = getattr(self._swagger_definition, 'required', None)
-        return set(reqd_props) if isinstance(reqd_props, list) else None
+        return set(self._required) if isinstance(self._required, list) \
+            else None
 
     @property
     def additionalProperties(self):
@@ -133,11 +213,7 @@ class Primitive:
 
         :rtype: bool or None
         """
-        # This attribute is only present on `Schema` objects.
-        if not hasattr(self._swagger_definition, 'additionalProperties'):
-            return None  # pragma: no cover - means called on wrong obect type
-        return self._swagger_definition.additionalProperties not in (None,
-                                                                     False)
+        return self._additional_properties
 
     @property
     def maxProperties(self):
@@ -145,9 +221,7 @@ class Primitive:
 
         :rtype: int or None
         """
-        if not hasattr(self._swagger_definition, 'maxProperties'):
-            return None  # pragma: no cover - means called on wrong obect type
-        return self._swagger_definition.maxProperties
+        return self._max_properties
 
     @property
     def minProperties(self):
@@ -155,9 +229,7 @@ class Primitive:
 
         :rtype: int or None
         """
-        if not hasattr(self._swagger_definition, 'minProperties'):
-            return None  # pragma: no cover - means called on wrong obect type
-        return self._swagger_definition.minProperties
+        return self._min_properties
 
     @property
     def maximum(self):
@@ -165,7 +237,7 @@ class Primitive:
 
         :rtype: float or None
         """
-        return self._swagger_definition.maximum
+        return self._maximum
 
     @property
     def exclusiveMaximum(self):
@@ -173,7 +245,7 @@ class Primitive:
 
         :rtype: bool
         """
-        return self._swagger_definition.exclusiveMaximum
+        return self._exclusive_maximum
 
     @property
     def minimum(self):
@@ -181,7 +253,7 @@ class Primitive:
 
         :rtype: float or None
         """
-        return self._swagger_definition.minimum
+        return self._minimum
 
     @property
     def exclusiveMinimum(self):
@@ -189,7 +261,7 @@ class Primitive:
 
         :rtype: bool
         """
-        return self._swagger_definition.exclusiveMinimum
+        return self._exclusive_minimum
 
     @property
     def multipleOf(self):
@@ -197,7 +269,7 @@ class Primitive:
 
         :rtype: float or None
         """
-        return self._swagger_definition.multipleOf
+        return self._multiple_of
 
     @property
     def maxLength(self):
@@ -205,7 +277,7 @@ class Primitive:
 
         :rtype: int or None
         """
-        return self._swagger_definition.maxLength
+        return self._max_length
 
     @property
     def minLength(self):
@@ -213,7 +285,7 @@ class Primitive:
 
         :rtype: int or None
         """
-        return self._swagger_definition.minLength
+        return self._min_length
 
     @property
     def pattern(self):
@@ -221,7 +293,7 @@ class Primitive:
 
         :rtype: string or None
         """
-        return self._swagger_definition.pattern
+        return self._pattern
 
     @property
     def maxItems(self):
@@ -229,7 +301,7 @@ class Primitive:
 
         :rtype: int or None
         """
-        return self._swagger_definition.maxItems
+        return self._max_items
 
     @property
     def minItems(self):
@@ -237,7 +309,7 @@ class Primitive:
 
         :rtype: int or None
         """
-        return self._swagger_definition.minItems
+        return self._min_items
 
     @property
     def uniqueItems(self):
@@ -245,7 +317,7 @@ class Primitive:
 
         :rtype: bool
         """
-        return self._swagger_definition.uniqueItems
+        return self._unique_items
 
     @property
     def enum(self):
@@ -253,7 +325,7 @@ class Primitive:
 
         :rtype: list or None
         """
-        return self._swagger_definition.enum
+        return self._enum
 
     @property
     def _pyswagger_definition(self):
@@ -0,0 +1,351 @@
+"""
+Validation of JSON values against Swagger schema definitions.
+"""
+import logging
+import json
+import re
+
+__all__ = ["Validator"]
+
+
+log = logging.getLogger(__name__)
+
+
+# The Python types which JSON values of each Swagger type are decoded to.
+# Booleans are also ints in Python, so they have to be ruled out separately.
+_JSON_TYPES = {
+    'array': (list,),
+    'boolean': (bool,),
+    'integer': (int,),
+    'number': (int, float),
+    'object': (dict,),
+    'string': (str,),
+}
+
+
+class Validator:
+    """Validator of JSON values against a schema definition.
+
+    The definition is compiled into checks once on construction - references
+    are followed, and lookup sets and regular expressions built - so that
+    validating each value doesn't need to walk the schema again.
+
+    :param swagger_definition: The schema to validate values against.
+    :type swagger_definition: schema.Primitive
+    """
+
+    def __init__(self, swagger_definition):
+        self._swagger_definition = swagger_definition
+        self._check = _compile(swagger_definition, {})
+
+    def __repr__(self):
+        return "{}(definition={!r})".format(self.__class__.__name__,
+                                            self._swagger_definition)
+
+    def errors(self, value):
+        """Find all the ways in which a value doesn't conform to the schema.
+
+        :param value: The value decoded from JSON to validate.
+        :rtype: list(str)
+        """
+        errors = []
+        self._check(value, '$', errors)
+        return errors
+
+
+def _compile(definition, compiled):
+    """Compile a check for values against a definition.
+
+    Each definition is compiled once, with the checks stored in ``compiled``
+    before compiling any children so that recursive definitions work.
+
+    :type definition: schema.Primitive
+    :type compiled: dict
+    :rtype: callable
+    """
+    if definition in compiled:
+        return compiled[definition]
+
+    checks = []
+
+    def check(value, path, errors):
+        """Run all checks in turn, stopping if the value's type is wrong."""
+        for single_check in checks:
+            if single_check(value, path, errors) is False:
+                break
+
+    compiled[definition] = check
+
+    checks.extend(_type_checks(definition))
+    checks.extend(_enum_checks(definition))
+    if definition.type in ('integer', 'number'):
+        checks.extend(_numeric_checks(definition))
+    elif definition.type == 'string':
+        checks.extend(_string_checks(definition))
+    elif definition.type == 'array':
+        checks.extend(_array_checks(definition, compiled))
+    elif definition.type == 'object' or (definition.type is None and
+                                         definition.properties):
+        checks.extend(_object_checks(definition, compiled))
+    checks.extend(_all_of_checks(definition, compiled))
+
+    return check
+
+
+def _type_checks(definition):
+    """Compile a check of the JSON type of values, which returns `False` if
+    the type is wrong so that no further checks are made."""
+    if definition.type not in _JSON_TYPES:
+        return []
+
+    json_type = definition.type
+    python_types = _JSON_TYPES[json_type]
+
+    def check_type(value, path, errors):
+        """Check the value is of the JSON type."""
+        if (not isinstance(value, python_types) or
+                (isinstance(value, bool) and json_type != 'boolean')):
+            errors.append("{}: {!r} is not of type {!r}".format(path, value,
+                                                                json_type))
+            return False
+        return True
+
+    return [check_type]
+
+
+def _enum_checks(definition):
+    """Compile a check that values are one of those enumerated."""
+    if definition.enum is None:
+        return []
+
+    try:
+        allowed = frozenset(definition.enum)
+    except TypeError:
+        # Enums of arrays or objects can't be put in a set.
+        allowed = tuple(definition.enum)
+
+    def check_enum(value, path, errors):
+        """Check the value is one of those allowed."""
+        try:
+            valid = value in allowed
+        except TypeError:
+            valid = value in tuple(allowed)
+        if not valid:
+            errors.append("{}: {!r} is not one of {!r}".format(
+                path, value, definition.enum))
+
+    return [check_enum]
+
+
+def _numeric_checks(definition):
+    """Compile checks of the limits on numbers."""
+    checks = []
+
+    maximum = definition.maximum
+    if maximum is not None:
+        exclusive_maximum = definition.exclusiveMaximum
+
+        def check_maximum(value, path, errors):
+            """Check the value is within the maximum."""
+            if value > maximum or (exclusive_maximum and value == maximum):
+                errors.append("{}: {!r} is above the maximum {!r}".format(
+                    path, value, maximum))
+        checks.append(check_maximum)
+
+    minimum = definition.minimum
+    if minimum is not None:
+        exclusive_minimum = definition.exclusiveMinimum
+
+        def check_minimum(value, path, errors):
+            """Check the value is within the minimum."""
+            if value < minimum or (exclusive_minimum and value == minimum):
+                errors.append("{}: {!r} is below the minimum {!r}".format(
+                    path, value, minimum))
+        checks.append(check_minimum)
+
+    multiple_of = definition.multipleOf
+    if multiple_of is not None:
+
+        def check_multiple_of(value, path, errors):
+            """Check the value is a multiple of the given number."""
+            quotient = value / multiple_of
+            if abs(quotient - round(quotient)) > 1e-9:
+                errors.append("{}: {!r} is not a multiple of {!r}".format(
+                    path, value, multiple_of))
+        checks.append(check_multiple_of)
+
+    return checks
+
+
+def _string_checks(definition):
+    """Compile checks of the lengths and pattern of strings."""
+    checks = []
+
+    max_length = definition.maxLength
+    if max_length is not None:
+
+        def check_max_length(value, path, errors):
+            """Check the string is within the maximum length."""
+            if len(value) > max_length:
+                errors.append("{}: {!r} is longer than {!r}".format(
+                    path, value, max_length))
+        checks.append(check_max_length)
+
+    min_length = definition.minLength
+    if min_length is not None:
+
+        def check_min_length(value, path, errors):
+            """Check the string is within the minimum length."""
+            if len(value) < min_length:
+                errors.append("{}: {!r} is shorter than {!r}".format(
+                    path, value, min_length))
+        checks.append(check_min_length)
+
+    if definition.pattern is not None:
+        pattern = re.compile(definition.pattern)
+
+        def check_pattern(value, path, errors):
+            """Check the string contains a match of the pattern."""
+            if pattern.search(value) is None:
+                errors.append("{}: {!r} does not match {!r}".format(
+                    path, value, pattern.pattern))
+        checks.append(check_pattern)
+
+    return checks
+
+
+def _array_checks(definition, compiled):
+    """Compile checks of the number, uniqueness and values of items of
+    arrays."""
+    checks = []
+
+    max_items = definition.maxItems
+    if max_items is not None:
+
+        def check_max_items(value, path, errors):
+            """Check the array has at most the maximum number of items."""
+            if len(value) > max_items:
+                errors.append("{}: more than {!r} items".format(path,
+                                                               max_items))
+        checks.append(check_max_items)
+
+    min_items = definition.minItems
+    if min_items is not None:
+
+        def check_min_items(value, path, errors):
+            """Check the array has at least the minimum number of items."""
+            if len(value) < min_items:
+                errors.append("{}: fewer than {!r} items".format(path,
+                                                                min_items))
+        checks.append(check_min_items)
+
+    if definition.uniqueItems:
+
+        def check_unique_items(value, path, errors):
+            """Check no two items of the array are equal."""
+            # Compare JSON representations, as items may not be hashable.
+            encoded = [json.dumps(item, sort_keys=True) for item in value]
+            if len(set(encoded)) != len(encoded):
+                errors.append("{}: items are not unique".format(path))
+        checks.append(check_unique_items)
+
+    if definition.items is not None:
+        check_item = _compile(definition.items, compiled)
+
+        def check_items(value, path, errors):
+            """Check each item of the array."""
+            for index, item in enumerate(value):
+                check_item(item, "{}[{}]".format(path, index), errors)
+        checks.append(check_items)
+
+    return checks
+
+
+def _object_checks(definition, compiled):
+    """Compile checks of the number and values of properties of objects."""
+    checks = []
+
+    required = frozenset(definition.required_properties or ())
+    if len(required) > 0:
+
+        def check_required(value, path, errors):
+            """Check the object has all the required properties."""
+            missing = required.difference(value)
+            if len(missing) > 0:
+                errors.append("{}: missing required properties {!r}".format(
+                    path, sorted(missing)))
+        checks.append(check_required)
+
+    max_properties = definition.maxProperties
+    if max_properties is not None:
+
+        def check_max_properties(value, path, errors):
+            """Check the object has at most the maximum number of
+            properties."""
+            if len(value) > max_properties:
+                errors.append("{}: more than {!r} properties".format(
+                    path, max_properties))
+        checks.append(check_max_properties)
+
+    min_properties = definition.minProperties
+    if min_properties is not None:
+
+        def check_min_properties(value, path, errors):
+            """Check the object has at least the minimum number of
+            properties."""
+            if len(value) < min_properties:
+                errors.append("{}: fewer than {!r} properties".format(
+                    path, min_properties))
+        checks.append(check_min_properties)
+
+    property_checks = {name: _compile(prop_definition, compiled)
+                       for name, prop_definition in
+                       (definition.properties or {}).items()}
+    check_additional = _additional_properties_check(definition, compiled)
+
+    def check_properties(value, path, errors):
+        """Check each property of the object."""
+        for name, prop_value in value.items():
+            prop_path = "{}.{}".format(path, name)
+            if name in property_checks:
+                property_checks[name](prop_value, prop_path, errors)
+            elif check_additional is not None:
+                check_additional(prop_value, prop_path, errors)
+    checks.append(check_properties)
+
+    return checks
+
+
+def _all_of_checks(definition, compiled):
+    """Compile a check that values conform to every one of the definitions
+    listed in ``allOf``."""
+    # This attribute is only present on `Schema` objects.
+    all_of = getattr(definition._pyswagger_definition, 'allOf', None)  # pylint: disable=protected-access
+    if not all_of:
+        return []
+
+    sub_checks = [_compile(definition.__class__(sub_definition), compiled)
+                  for sub_definition in all_of]
+
+    def check_all_of(value, path, errors):
+        """Check the value against each of the definitions."""
+        for sub_check in sub_checks:
+            sub_check(value, path, errors)
+
+    return [check_all_of]
+
+
+def _additional_properties_check(definition, compiled):
+    """Compile a check for properties not explicitly listed in the definition,
+    or `None` if any values are allowed."""
+    additional = definition._pyswagger_definition.additionalProperties  # pylint: disable=protected-access
+    if additional is False:
+
+        def check_not_allowed(_, path, errors):
+            """Report the property as not allowed."""
+            errors.append("{}: additional property not allowed".format(path))
+        return check_not_allowed
+    if additional is None or additional is True:
+        return None
+
+    return _compile(definition.__class__(additional), compiled)
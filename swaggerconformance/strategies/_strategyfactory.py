@@ -2,6 +2,7 @@
 Factories for creating PrimitiveStrategys from swagger definitions.
 """
 import logging
+import copy
 from collections import defaultdict
 
 from . import primitivestrategies as ps
@@ -30,9 +31,30 @@ def string_primitive_strategy(swagger_definition, factory):
 
 
 class StrategyFactory:
-    """Factory for building `PrimitiveStrategy` from swagger definitions."""
+    """Factory for building `PrimitiveStrategy` from swagger definitions.
+
+    Each `PrimitiveStrategy` produced is cached against the definition it was
+    built for, so definitions shared between many operations and parameters
+    (for example through a ``$ref``) are only built once. The cache is cleared
+    whenever a new creator is registered.
+
+    The size of requests can be limited, by the bytes their parameter values
+    may take when encoded as JSON in total, and by the bytes each parameter
+    value may take. The budget is shared out through each value as its
+    strategy is built, so values are generated within it rather than being
+    filtered, and values up to its full size can still be generated. The
+    budget is approximate - it isn't applied to values whose size barely
+    varies, such as numbers and dates, but space is set aside for them.
+
+    :param max_request_bytes: Most bytes the parameter values of a request
+                              may take in total.
+    :type max_request_bytes: int or None
+    :param max_parameter_bytes: Most bytes each parameter value of a request
+                                may take.
+    :type max_parameter_bytes: int or None
+    """
 
-    def __init__(self):
+    def __init__(self, max_request_bytes=None, max_parameter_bytes=None):
         self._map = {
             'boolean': defaultdict(lambda: ps.BooleanStrategy,
                                    [(None, ps.BooleanStrategy)]),
@@ -54,15 +76,28 @@ class StrategyFactory:
                                    ('mask', ps.XFieldsHeaderStringStrategy),
                                    ('uuid', ps.UUIDStrategy)])
         }
+        self._cache = {}
+        self.max_request_bytes = max_request_bytes
+        self.max_parameter_bytes = max_parameter_bytes
+        #: Most bytes values produced may take when encoded as JSON, or
+        #: `None` if they're unlimited.
+        self.max_bytes = None
+
+    def __repr__(self):
+        return "{}(max_request_bytes={!r}, max_parameter_bytes={!r})".format(
+            self.__class__.__name__, self.max_request_bytes,
+            self.max_parameter_bytes)
 
     def _get(self, type_str, format_str):
         return self._map[type_str][format_str]
 
     def _set(self, type_str, format_str, creator):
         self._map[type_str][format_str] = creator
+        self._cache.clear()
 
     def _set_default(self, type_str, creator):
         self._map[type_str].default_factory = lambda: creator
+        self._cache.clear()
 
     def produce(self, swagger_definition):
         """Create a template for the value specified by the definition.
@@ -71,6 +106,13 @@ class StrategyFactory:
         :type swagger_definition: schema.Primitive
         :rtype: PrimitiveStrategy
         """
+        # Every reference to the same underlying definition is wrapped by the
+        # same primitive, so key the cache on that.
+        key = (swagger_definition, self.max_bytes)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
         log.debug("Creating value for: %r", swagger_definition)
         creator = self._get(swagger_definition.type, swagger_definition.format)
         value = creator(swagger_definition, self)
@@ -78,8 +120,45 @@ class StrategyFactory:
         assert value is not None, "Unsupported type, format: {}, {}".format(
             swagger_definition.type, swagger_definition.format)
 
+        self._cache[key] = value
         return value
 
+    def budgeted(self, max_bytes):
+        """A view of this factory producing values which take at most the
+        given bytes when encoded as JSON.
+
+        The view shares registered creators and cached strategies with this
+        factory.
+
+        :param max_bytes: Most bytes values may take, or `None` if they're
+                          unlimited.
+        :type max_bytes: int or None
+        :rtype: StrategyFactory
+        """
+        if max_bytes == self.max_bytes:
+            return self
+        view = copy.copy(self)
+        view.max_bytes = max_bytes
+        return view
+
+    def parameters_factories(self, parameters):
+        """Views of this factory producing values for each of the parameters
+        of a request, within its share of the request budget and within the
+        budget for each parameter.
+
+        :param parameters: The parameters of the request.
+        :type parameters: list(schema.Parameter)
+        :rtype: list(StrategyFactory)
+        """
+        shares = ps.budget_shares(
+            self.max_request_bytes,
+            [parameter.definition for parameter in parameters])
+        if self.max_parameter_bytes is not None:
+            shares = [self.max_parameter_bytes if share is None else
+                      min(share, self.max_parameter_bytes)
+                      for share in shares]
+        return [self.budgeted(share) for share in shares]
+
     def register(self, type_str, format_str, creator):
         """Register a function to generate `PrimitiveStrategy` instances for
         this type and format pair.
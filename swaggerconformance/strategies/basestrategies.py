@@ -5,31 +5,114 @@ strategies.
 """
 import logging
 import datetime
+import functools
+import inspect
 import io
+import json as _json
+import re
 
 import hypothesis.strategies as hy_st
 
 __all__ = ["json", "dates", "times", "datetimes", "file_objects", "files",
-           "merge_dicts_strategy", "merge_dicts_max_size_strategy",
-           "merge_optional_dict_strategy"]
+           "regex_text", "bounded_text", "merge_dicts_strategy",
+           "merge_dicts_max_size_strategy", "merge_optional_dict_strategy"]
 
 
 log = logging.getLogger(__name__)
 
 
-def json(value_limit=5):
+# Inline flags at the start of a regular expression.
+_LEADING_FLAGS = re.compile(r"(?:\(\?[aiLmsux]+\))*")
+# Whether `hypothesis.strategies.from_regex` can generate only whole matches
+# itself, which older hypothesis versions can't.
+_HAS_FULLMATCH = 'fullmatch' in inspect.signature(
+    hy_st.from_regex).parameters
+
+# Most bytes the JSON encoding of a float or a boolean can take, and the
+# bytes of ``null``.
+_MAX_FLOAT_BYTES = 24
+_MAX_BOOLEAN_BYTES = 5
+_NULL_BYTES = 4
+# Bytes of the separators `json.dumps` puts after keys and between values.
+_SEPARATOR_BYTES = 2
+
+
+def json(value_limit=5, max_bytes=None):
     """Hypothesis strategy for generating values that can be passed to
     `json.dumps` to produce valid JSON data.
 
+    If there's a limit on the bytes of the encoded data, values are built up
+    within the bytes left as each part of them is drawn, so they never exceed
+    it - unless it's too small for even an empty string.
+
     :param value_limit: A limit on the number of values in the JSON data -
                         setting this too high can cause value generation to
                         time out.
     :type value_limit: int
+    :param max_bytes: Most bytes the data may take when encoded as JSON by
+                      `json.dumps`, with its default separators.
+    :type max_bytes: int or None
     """
-    return hy_st.recursive(
-        hy_st.floats() | hy_st.booleans() | hy_st.text() | hy_st.none(),
-        lambda children: hy_st.dictionaries(hy_st.text(), children),
-        max_leaves=value_limit)
+    if max_bytes is None:
+        return hy_st.recursive(
+            hy_st.floats() | hy_st.booleans() | hy_st.text() | hy_st.none(),
+            lambda children: hy_st.dictionaries(hy_st.text(), children),
+            max_leaves=value_limit)
+    # The composite decorator supplies the draw argument.
+    return _bounded_json(value_limit, max_bytes)  # pylint: disable=no-value-for-parameter
+
+
+@hy_st.composite
+def _bounded_json(draw, value_limit, max_bytes):
+    """Strategy for JSON data within a limit on its encoded bytes, and on its
+    number of values besides objects."""
+    return _draw_json(draw, max_bytes, [value_limit])
+
+
+def _draw_json(draw, max_bytes, values_left):
+    """Draw JSON data within a limit on its encoded bytes, using up the values
+    left as values besides objects are drawn.
+
+    :param values_left: The number of values left, in a list so nested calls
+                        can use them up.
+    :type values_left: list(int)
+    """
+    kinds = ['text', 'object']
+    if max_bytes >= _NULL_BYTES:
+        kinds.append('null')
+    if max_bytes >= _MAX_BOOLEAN_BYTES:
+        kinds.append('boolean')
+    if max_bytes >= _MAX_FLOAT_BYTES:
+        kinds.append('float')
+    kind = draw(hy_st.sampled_from(kinds))
+
+    if kind != 'object':
+        values_left[0] -= 1
+        if kind == 'null':
+            return None
+        if kind == 'boolean':
+            return draw(hy_st.booleans())
+        if kind == 'float':
+            return draw(hy_st.floats())
+        return draw(bounded_text(max_bytes=max_bytes))
+
+    # Objects take two braces, and each entry takes at least an empty key, a
+    # separator, and null - plus another separator after any entry before it.
+    result = {}
+    remaining = max_bytes - 2
+    while values_left[0] > 0:
+        separator_bytes = _SEPARATOR_BYTES if len(result) > 0 else 0
+        entry_bytes = separator_bytes + 2 + _SEPARATOR_BYTES + _NULL_BYTES
+        if remaining < entry_bytes or not draw(hy_st.booleans()):
+            break
+        remaining -= separator_bytes + _SEPARATOR_BYTES
+        key = draw(bounded_text(max_bytes=remaining - _NULL_BYTES))
+        remaining -= len(_json.dumps(key))
+        value = _draw_json(draw, remaining, values_left)
+        remaining -= len(_json.dumps(value))
+        result[key] = value
+
+    return result
 
 
 def dates():
@@ -54,17 +137,158 @@ def datetimes():
     return hy_st.builds(datetime.datetime.combine, dates(), times())
 
 
-def file_objects():
-    """Hypothesis strategy for generating pre-populated `file objects`."""
-    return hy_st.builds(io.BytesIO, hy_st.binary())
+def file_objects(max_size=None):
+    """Hypothesis strategy for generating pre-populated `file objects`.
+
+    :param max_size: Most bytes the files may hold.
+    :type max_size: int or None
+    """
+    return hy_st.builds(io.BytesIO, hy_st.binary(max_size=max_size))
 
 
-def files():
+def files(max_size=None):
     """Hypothesis strategy for generating objects pyswagger can use as file
     handles to populate `file` format parameters.
 
-    Generated values take the format: `dict('data': <file object>)`"""
-    return file_objects().map(lambda x: {'data': x})
+    Generated values take the format: `dict('data': <file object>)`
+
+    :param max_size: Most bytes the files may hold.
+    :type max_size: int or None
+    """
+    return file_objects(max_size).map(lambda x: {'data': x})
+
+
+def regex_text(pattern, min_size=None, max_size=None,
+               blacklist_characters=None):
+    """Hypothesis strategy for generating text matching a regular expression,
+    as required of strings by a Swagger ``pattern``.
+
+    Only text matching the whole of the expression is generated, which also
+    matches wherever it's searched for. Matches are generated directly from
+    the expression, and only rejected if their length is outside the limits
+    given or they contain a blacklisted character.
+
+    :param pattern: The regular expression to match.
+    :type pattern: str
+    :param min_size: Minimum length of the text generated.
+    :type min_size: int or None
+    :param max_size: Maximum length of the text generated.
+    :type max_size: int or None
+    :param blacklist_characters: Characters which mustn't appear in the text.
+    :type blacklist_characters: list(str) or None
+    """
+    min_size = 0 if min_size is None else min_size
+    blacklist = frozenset(blacklist_characters or ())
+
+    def allowed(value):
+        """Whether a match is within the size limits and blacklist."""
+        return (min_size <= len(value) and
+                (max_size is None or len(value) <= max_size) and
+                blacklist.isdisjoint(value))
+
+    strategy = _full_matches(pattern)
+    if min_size > 0 or max_size is not None or blacklist:
+        strategy = strategy.filter(allowed)
+
+    return strategy
+
+
+def bounded_text(alphabet=None, min_size=None, max_size=None, max_bytes=None):
+    """Hypothesis strategy for generating text whose JSON encoding, including
+    its quotes, takes at most a given number of bytes.
+
+    Text is truncated to fit rather than filtered, so no text is rejected, and
+    text of every length up to the limit can still be generated. Text is
+    never truncated below the minimum size though, so it may exceed the limit
+    if the limit is too small for it.
+
+    :param alphabet: Strategy for the characters of the text, or `None` for
+                     any characters.
+    :type alphabet: SearchStrategy or None
+    :param min_size: Minimum length of the text generated.
+    :type min_size: int or None
+    :param max_size: Maximum length of the text generated.
+    :type max_size: int or None
+    :param max_bytes: Most bytes the encoded text may take.
+    :type max_bytes: int or None
+    """
+    if max_bytes is None:
+        return _text(alphabet=alphabet, min_size=min_size,
+                     max_size=max_size)
+
+    min_size = 0 if min_size is None else min_size
+    # Every character takes at least one byte, besides the quotes.
+    max_chars = max(max_bytes - 2, min_size)
+    max_size = max_chars if max_size is None else min(max_size, max_chars)
+    return _text(alphabet=alphabet, min_size=min_size,
+                 max_size=max_size).map(
+                     lambda text: _truncate_text(text, max_bytes - 2,
+                                                 min_size))
+
+
+def _text(alphabet=None, min_size=None, max_size=None):
+    """`hypothesis.strategies.text`, taking `None` for the default alphabet
+    and minimum size, which newer hypothesis versions don't accept."""
+    kwargs = {} if alphabet is None else {'alphabet': alphabet}
+    return hy_st.text(min_size=0 if min_size is None else min_size,
+                      max_size=max_size, **kwargs)
+
+
+def _truncate_text(text, max_bytes, min_size):
+    """Cut text down until its JSON encoding, without quotes, takes at most a
+    given number of bytes, or to the minimum size.
+
+    :rtype: str
+    """
+    size = 0
+    for index, char in enumerate(text):
+        size += _json_char_size(char)
+        if size > max_bytes and index >= min_size:
+            return text[:index]
+    return text
+
+
+def _json_char_size(char):
+    """Bytes taken by a character in a JSON string, escaped as `json.dumps`
+    escapes it by default.
+
+    :rtype: int
+    """
+    code = ord(char)
+    if char in '"\\\b\f\n\r\t':
+        return 2
+    if code < 0x20:
+        return 6
+    if code < 0x7f:
+        return 1
+    # Characters beyond the basic plane are escaped as surrogate pairs.
+    return 6 if code < 0x10000 else 12
+
+
+@functools.lru_cache(maxsize=None)
+def _full_matches(pattern):
+    """Strategy for text matching the whole of a regular expression.
+
+    The strategy is cached, as the same patterns are often used by many
+    definitions.
+
+    :rtype: SearchStrategy
+    """
+    if _HAS_FULLMATCH:
+        return hy_st.from_regex(pattern, fullmatch=True)
+    return hy_st.from_regex(_whole_match(pattern))
+
+
+def _whole_match(pattern):
+    """Expression matching only the whole of text matched by a pattern.
+
+    Flags at the start of the pattern apply to all of it, and have to stay at
+    the start of the expression, so are kept outside the group wrapping it.
+
+    :rtype: str
+    """
+    flags = _LEADING_FLAGS.match(pattern).group()
+    return flags + r'\A(?:' + pattern[len(flags):] + r')\Z'
 
 
 def merge_dicts_strategy(dict_strat_1, dict_strat_2):
@@ -85,6 +309,9 @@ def merge_optional_dict_strategy(required_fields, optional_fields):
     # Create a strategy for a set of keys from the optional dict strategy, then
     # a strategy to build those back into a dictionary.
     # Finally, merge the strategy of selected optionals with the required one.
+    # Newer hypothesis versions refuse to sample from nothing.
+    if len(optional_fields) == 0:
+        return hy_st.fixed_dictionaries(required_fields)
     opt_keys = hy_st.sets(hy_st.sampled_from(list(optional_fields.keys())))
     selected_optionals = hy_st.builds(
         lambda dictionary, keys: {key: dictionary[key] for key in keys},
@@ -4,7 +4,9 @@ Strategies for values of various data types.
 # The classes in this file ahve a single public method by design.
 # pylint: disable=too-few-public-methods
 import logging
+import json
 import math
+import struct
 
 import hypothesis.strategies as hy_st
 from . import basestrategies as base_st
@@ -13,34 +15,61 @@ __all__ = ["PrimitiveStrategy", "BooleanStrategy", "NumericStrategy",
            "IntegerStrategy", "FloatStrategy", "StringStrategy",
            "URLPathStringStrategy", "HTTPHeaderStringStrategy",
            "XFieldsHeaderStringStrategy", "DateStrategy", "DateTimeStrategy",
-           "UUIDStrategy", "FileStrategy", "ArrayStrategy", "ObjectStrategy"]
+           "UUIDStrategy", "FileStrategy", "ArrayStrategy", "ObjectStrategy",
+           "budget_shares", "minimum_bytes", "FIXED_VALUE_BYTES",
+           "MIN_ELEMENT_BYTES"]
 
 
 log = logging.getLogger(__name__)
 
 
+#: Bytes set aside for each value whose size barely varies, such as numbers
+#: and dates, when sharing out a budget of bytes.
+FIXED_VALUE_BYTES = 40
+#: Fewest bytes set aside for each element of an array whose size varies when
+#: sharing out a budget, which limits how many elements arrays may have.
+MIN_ELEMENT_BYTES = 64
+
+# Formats of strings whose size barely varies.
+_FIXED_STRING_FORMATS = {'date', 'date-time', 'uuid', 'mask'}
+
+
 class PrimitiveStrategy:
     """Strategy for a single value of any specified type.
 
+    Subclasses implement `_build_strategy`, which is only called the first
+    time the strategy is requested - the same strategy is returned from
+    `strategy` on every later call. Subclasses may instead override `strategy`
+    directly if they don't want the result cached.
+
     :param swagger_definition: The Swagger spec for this parameter.
     :type swagger_definition: schema.Primitive
     :param factory: The factory used to generate child `PrimitiveStrategy` s.
+                    Its ``max_bytes`` is the budget for the size of values.
     :type factory: strategies.StrategyFactory
     """
+    _strategy = None
 
     def __init__(self, swagger_definition, factory):
         self._swagger_definition = swagger_definition
         self._factory = factory
+        self._max_bytes = getattr(factory, 'max_bytes', None)
 
     def strategy(self):
         """Return a hypothesis strategy defining this value."""
+        if self._strategy is None:
+            self._strategy = self._build_strategy()
+        return self._strategy
+
+    def _build_strategy(self):
+        """Build the hypothesis strategy defining this value."""
         raise NotImplementedError("Abstract method")
 
 
 class BooleanStrategy(PrimitiveStrategy):
     """Strategy for a Boolean value."""
 
-    def strategy(self):
+    def _build_strategy(self):
         return hy_st.booleans()
 
 
@@ -61,14 +90,14 @@ class NumericStrategy(PrimitiveStrategy):
         self._exclusive_minimum = swagger_definition.exclusiveMinimum
         self._multiple_of = swagger_definition.multipleOf
 
-    def strategy(self):
+    def _build_strategy(self):
         raise NotImplementedError("Abstract method")
 
 
 class IntegerStrategy(NumericStrategy):
     """Strategy for an integer value."""
 
-    def strategy(self):
+    def _build_strategy(self):
         # Note that hypotheis requires integer bounds, but we may be provided
         # with float values.
         inclusive_max = self._maximum
@@ -98,23 +127,33 @@ class IntegerStrategy(NumericStrategy):
 class FloatStrategy(NumericStrategy):
     """Strategy for a floating point value."""
 
-    def strategy(self):
+    def _build_strategy(self):
+        # Exclusive bounds are applied by narrowing the range generated from,
+        # rather than filtering, so tight ranges don't cause values to be
+        # rejected.
         if self._multiple_of is not None:
             maximum = self._maximum
             if maximum is not None:
                 maximum = math.floor(maximum / self._multiple_of)
+                if (self._exclusive_maximum and
+                        maximum * self._multiple_of >= self._maximum):
+                    maximum -= 1
             minimum = self._minimum
             if minimum is not None:
                 minimum = math.ceil(minimum / self._multiple_of)
+                if (self._exclusive_minimum and
+                        minimum * self._multiple_of <= self._minimum):
+                    minimum += 1
             strategy = hy_st.integers(min_value=minimum, max_value=maximum)
             strategy = strategy.map(lambda x: x * self._multiple_of)
         else:
-            strategy = hy_st.floats(min_value=self._minimum,
-                                    max_value=self._maximum)
-        if self._exclusive_maximum:
-            strategy = strategy.filter(lambda x: x < self._maximum)
-        if self._exclusive_minimum:
-            strategy = strategy.filter(lambda x: x > self._minimum)
+            maximum = self._maximum
+            if self._exclusive_maximum:
+                maximum = _next_float(maximum, upwards=False)
+            minimum = self._minimum
+            if self._exclusive_minimum:
+                minimum = _next_float(minimum, upwards=True)
+            strategy = hy_st.floats(min_value=minimum, max_value=maximum)
 
         return strategy
 
@@ -130,17 +169,29 @@ class StringStrategy(PrimitiveStrategy):
         self._pattern = swagger_definition.pattern
         self._blacklist_chars = blacklist_chars
 
-    def strategy(self):
+    def _build_strategy(self):
         if self._enum is not None:
             return hy_st.sampled_from(self._enum)
+        if self._pattern is not None:
+            # Matches can't be truncated, so just limit their length, which is
+            # exact for patterns matching only ASCII text.
+            max_length = self._max_length
+            if self._max_bytes is not None:
+                max_length = _capped(max_length, max(
+                    self._max_bytes - 2, self._min_length or 0))
+            return base_st.regex_text(
+                self._pattern, min_size=self._min_length,
+                max_size=max_length,
+                blacklist_characters=self._blacklist_chars)
 
         alphabet = None
         if self._blacklist_chars:
             alphabet = hy_st.characters(
                 blacklist_characters=self._blacklist_chars)
-        strategy = hy_st.text(alphabet=alphabet,
-                              min_size=self._min_length,
-                              max_size=self._max_length)
+        strategy = base_st.bounded_text(alphabet=alphabet,
+                                        min_size=self._min_length,
+                                        max_size=self._max_length,
+                                        max_bytes=self._max_bytes)
 
         return strategy
 
@@ -162,12 +213,17 @@ class BytesStrategy(PrimitiveStrategy):
             self._min_length = 1
         assert self._min_length >= 1, "Byte parameters must be at least 1 byte"
 
-    def strategy(self):
+    def _build_strategy(self):
         if self._enum is not None:
             return hy_st.sampled_from(self._enum)
 
+        max_length = self._max_length
+        if self._max_bytes is not None:
+            # Bytes are sent base64 encoded, as 4 characters per 3 bytes.
+            max_length = _capped(max_length, max(
+                (self._max_bytes - 2) // 4 * 3, self._min_length))
         strategy = hy_st.binary(min_size=self._min_length,
-                                max_size=self._max_length)
+                                max_size=max_length)
 
         return strategy
 
@@ -190,9 +246,13 @@ class HTTPHeaderStringStrategy(StringStrategy):
         super().__init__(
             swagger_definition, factory, blacklist_chars=['\r', '\n'])
 
-    def strategy(self):
+    def _build_strategy(self):
+        strategy = super()._build_strategy()
+        if self._enum is not None or self._pattern is not None:
+            # Stripping could stop values meeting the definition.
+            return strategy
         # Header values shouldn't have surrounding whitespace.
-        return super().strategy().map(str.strip)
+        return strategy.map(str.strip)
 
 
 class XFieldsHeaderStringStrategy(PrimitiveStrategy):
@@ -218,56 +278,75 @@ class XFieldsHeaderStringStrategy(PrimitiveStrategy):
     are safe values that shouldn't interfere with other testing.
     """
 
-    def strategy(self):
+    def _build_strategy(self):
         return hy_st.sampled_from(("*", ''))
 
 
 class DateStrategy(PrimitiveStrategy):
     """Strategy for a Date value."""
 
-    def strategy(self):
+    def _build_strategy(self):
         return base_st.dates()
 
 
 class DateTimeStrategy(PrimitiveStrategy):
     """Strategy for a Date-Time value."""
 
-    def strategy(self):
+    def _build_strategy(self):
         return base_st.datetimes()
 
 
 class UUIDStrategy(PrimitiveStrategy):
     """Strategy for a UUID value."""
 
-    def strategy(self):
+    def _build_strategy(self):
         return hy_st.uuids()
 
 
 class FileStrategy(PrimitiveStrategy):
     """Strategy for a File value."""
 
-    def strategy(self):
-        return base_st.files()
+    def _build_strategy(self):
+        return base_st.files(self._max_bytes)
 
 
 class ArrayStrategy(PrimitiveStrategy):
-    """Strategy for an array collection."""
+    """Strategy for an array collection.
+
+    With a budget of bytes, arrays are limited to as many elements as fit in
+    it, leaving at least `MIN_ELEMENT_BYTES` for each element whose size
+    varies, and the budget is shared between that many elements by
+    `budget_shares`.
+    """
 
     def __init__(self, swagger_definition, factory):
         super().__init__(swagger_definition, factory)
 
-        self._elements = self._factory.produce(self._swagger_definition.items)
-
         self._max_items = swagger_definition.maxItems
         self._min_items = swagger_definition.minItems
         self._unique_items = swagger_definition.uniqueItems
 
-    def strategy(self):
+        items = self._swagger_definition.items
+        element_factory = self._factory
+        if self._max_bytes is not None:
+            # Elements are separated by commas, and surrounded by brackets.
+            element_bytes = minimum_bytes(items) + 1
+            if _is_sized(items):
+                element_bytes = max(element_bytes, MIN_ELEMENT_BYTES + 1)
+            self._max_items = _capped(self._max_items, max(
+                (self._max_bytes - 2) // element_bytes, self._min_items or 0))
+            if self._max_items > 0:
+                element_factory = self._factory.budgeted(budget_shares(
+                    self._max_bytes, [items] * self._max_items,
+                    overhead=2 + self._max_items)[0])
+        self._elements = element_factory.produce(items)
+
+    def _build_strategy(self):
         """Return a hypothesis strategy defining this collection."""
         return hy_st.lists(elements=self._elements.strategy(),
-                           min_size=self._min_items,
+                           min_size=self._min_items or 0,
                            max_size=self._max_items,
-                           unique=self._unique_items)
+                           unique=bool(self._unique_items))
 
 
 class ObjectStrategy(PrimitiveStrategy):
@@ -276,16 +355,15 @@ class ObjectStrategy(PrimitiveStrategy):
     `MAX_ADDITIONAL_PROPERTIES` is a limit on the number of additional
     properties to add to objects. Setting this too high might cause data
     generation to time out.
+
+    With a budget of bytes, it's shared by `budget_shares` between the values
+    of properties, and the names and values of additional properties.
     """
     MAX_ADDITIONAL_PROPERTIES = 5
 
     def __init__(self, swagger_definition, factory):
         super().__init__(swagger_definition, factory)
 
-        self._properties = {prop_name: self._factory.produce(prop_defn)
-                            for prop_name, prop_defn in
-                            self._swagger_definition.properties.items()}
-
         additional = (swagger_definition.additionalProperties or
                       len(swagger_definition.properties) == 0)
         log.debug("Allow additional properties? %r", additional)
@@ -293,7 +371,22 @@ class ObjectStrategy(PrimitiveStrategy):
         self._min_properties = swagger_definition.minProperties
         self._additional_properties = additional
 
-    def strategy(self):
+        properties = self._swagger_definition.properties
+        num_additional = self.MAX_ADDITIONAL_PROPERTIES if additional else 0
+        # Each name is followed by a colon and a comma, and properties are
+        # surrounded by braces. Additional properties have no definition.
+        shares = budget_shares(
+            self._max_bytes,
+            list(properties.values()) + [None] * num_additional,
+            overhead=2 + 2 * num_additional + sum(
+                len(json.dumps(name)) + 2 for name in properties))
+        self._additional_bytes = shares[-1] if num_additional > 0 else None
+        self._properties = {
+            prop_name: self._factory.budgeted(share).produce(prop_defn)
+            for (prop_name, prop_defn), share in zip(properties.items(),
+                                                     shares)}
+
+    def _build_strategy(self):
         """Return a hypothesis strategy defining this collection, including
         random additional properties if the object supports them.
 
@@ -334,11 +427,19 @@ class ObjectStrategy(PrimitiveStrategy):
             max_properties = max(max_properties, min_properties)
             log.debug("Determined max, min extra properties: %r, %r",
                       max_properties, min_properties)
-            forbidden_prop_names = set(required_properties.keys() &
+            # Names of specified properties are changed rather than filtered
+            # out, so no generated names are rejected.
+            forbidden_prop_names = set(required_properties.keys() |
                                        optional_properties.keys())
+            name_bytes = value_bytes = None
+            if self._additional_bytes is not None:
+                name_bytes = self._additional_bytes // 2
+                value_bytes = self._additional_bytes - name_bytes
             extra = hy_st.dictionaries(
-                hy_st.text().filter(lambda x: x not in forbidden_prop_names),
-                base_st.json(),
+                base_st.bounded_text(max_bytes=name_bytes).map(
+                    lambda name: _unforbidden_name(name,
+                                                   forbidden_prop_names)),
+                base_st.json(max_bytes=value_bytes),
                 min_size=min_properties,
                 max_size=max_properties)
 
@@ -349,3 +450,121 @@ class ObjectStrategy(PrimitiveStrategy):
                 result = base_st.merge_dicts_strategy(result, extra)
 
         return result
+
+
+def budget_shares(max_bytes, members, overhead=0):
+    """Share out the budget of a collection between its members.
+
+    Once the overhead of the collection itself and the `minimum_bytes` of
+    every member are set aside, the rest is shared evenly between the
+    members whose size varies, on top of their minimum.
+
+    :param max_bytes: The budget of the collection, or `None` if unlimited.
+    :type max_bytes: int or None
+    :param members: The definitions of the members of the collection, or
+                    `None` for members with no definition which may be any
+                    JSON value.
+    :type members: list(schema.Primitive or None)
+    :param overhead: Bytes taken by the collection besides its members.
+    :type overhead: int
+    :return: The budget of each member, which is `None` if unlimited or the
+             member's size barely varies.
+    :rtype: list(int or None)
+    """
+    if max_bytes is None:
+        return [None] * len(members)
+    minimums = [minimum_bytes(member) for member in members]
+    num_sized = sum(1 for member in members if _is_sized(member))
+    extra = max(max_bytes - overhead - sum(minimums), 0) // max(num_sized, 1)
+
+    return [minimum + extra if _is_sized(member) else None
+            for member, minimum in zip(members, minimums)]
+
+
+def minimum_bytes(definition, _seen=()):  # pylint: disable=too-many-return-statements
+    """Fewest bytes values of a definition may take when encoded as JSON,
+    roughly, counting values whose size barely varies as taking
+    `FIXED_VALUE_BYTES`, and each object as having all its properties.
+
+    :param definition: The definition of the values, or `None` for any JSON
+                       value.
+    :type definition: schema.Primitive or None
+    :rtype: int
+    """
+    if not _is_sized(definition):
+        return FIXED_VALUE_BYTES
+    if definition is None:
+        # An empty string.
+        return 2
+    if definition in _seen:
+        # Recursive definitions can always stop recursing somewhere.
+        return 0
+    seen = _seen + (definition,)
+
+    if definition.type == 'object':
+        return 2 + sum(len(json.dumps(name)) + 2 + minimum_bytes(prop, seen)
+                       for name, prop in definition.properties.items())
+    if definition.type == 'array':
+        return 2 + (definition.minItems or 0) * (
+            minimum_bytes(definition.items, seen) + 1)
+    if definition.type == 'file':
+        return 0
+    min_length = definition.minLength or 0
+    if definition.format == 'byte':
+        return 2 + 4 * math.ceil(max(min_length, 1) / 3)
+    return 2 + min_length
+
+
+def _is_sized(definition):
+    """Whether the size of values of a definition varies much, which is so
+    for any JSON value if there's no definition.
+
+    :rtype: bool
+    """
+    if definition is None:
+        return True
+    if definition.type == 'string':
+        return definition.format not in _FIXED_STRING_FORMATS
+    return definition.type in ('array', 'object', 'file')
+
+
+def _capped(limit, cap):
+    """The lower of an optional limit and a cap.
+
+    :rtype: int
+    """
+    return cap if limit is None else min(limit, cap)
+
+
+def _unforbidden_name(name, forbidden_names):
+    """Change a property name until it isn't one of the forbidden names.
+
+    :rtype: str
+    """
+    while name in forbidden_names:
+        name += '_'
+    return name
+
+
+def _next_float(value, upwards):
+    """The closest float to a value which is above or below it.
+
+    :param value: The value to step from.
+    :type value: float
+    :param upwards: Whether to step towards positive infinity, rather than
+                    negative infinity.
+    :type upwards: bool
+    :rtype: float
+    """
+    value = float(value)
+    if math.isnan(value) or math.isinf(value):
+        return value
+    if value == 0.0:
+        # The smallest subnormal float, with the appropriate sign.
+        return 5e-324 if upwards else -5e-324
+
+    # Adjacent floats of the same sign have adjacent bit patterns, with the
+    # magnitude increasing with the integer value of the pattern.
+    bits = struct.unpack('<q', struct.pack('<d', value))[0]
+    bits += 1 if (value > 0) == upwards else -1
+    return struct.unpack('<d', struct.pack('<q', bits))[0]
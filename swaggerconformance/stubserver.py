@@ -0,0 +1,269 @@
+"""
+A local stand-in for the server of a Swagger-defined API, answering requests
+to each operation with a response conforming to the schema, so the client and
+test runners can be benchmarked without any external service.
+"""
+import logging
+import base64
+import datetime
+import http.server
+import io
+import itertools
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+import uuid
+
+from ._generation import draw_examples
+from .client import Client
+from .schema import Primitive
+from .strategies import StrategyFactory
+
+__all__ = ["StubServer"]
+
+
+log = logging.getLogger(__name__)
+
+
+class StubServer:  # pylint: disable=too-many-instance-attributes
+    """HTTP server answering requests to every operation of the API defined by
+    a schema.
+
+    Each operation is answered with its lowest documented success status
+    code, and a body generated from the schema of that response. A pool of
+    bodies is generated for every operation when the server is created,
+    before it serves any requests, and responses cycle through them, so
+    generation doesn't slow responses down or run while a client tests the
+    server. Request parameters aren't checked.
+
+    Latency and errors can be injected - each response is delayed by the
+    latency plus a random amount up to the jitter, and the given fraction of
+    requests are answered with a 500 error instead.
+
+    Requests are handled concurrently, each in its own thread, and
+    connections are kept alive between requests. Use `start` and `stop` (or
+    use the server as a context manager) to run it in the background, or
+    `serve_forever` to run it in the calling thread.
+
+    :param schema_path: The path to / URL of the schema of the API.
+    :type schema_path: str
+    :param host: The address to listen on.
+    :type host: str
+    :param port: The port to listen on, or 0 to pick any free port.
+    :type port: int
+    :param latency: Seconds to delay every response by.
+    :type latency: float
+    :param jitter: Most seconds to randomly delay each response by on top of
+                   the latency.
+    :type jitter: float
+    :param error_rate: Fraction of requests to answer with an error, from 0
+                       to 1.
+    :type error_rate: float
+    :param seed: Seed for the random choices of jitter and errors, so they're
+                 reproducible.
+    :type seed: int or None
+    :param num_bodies: How many distinct bodies to generate per operation.
+    :type num_bodies: int
+    :param value_factory: Factory to generate strategies for bodies, or
+                          `None` to use the default one.
+    :type value_factory: strategies.StrategyFactory or None
+    :param schema_cache_dir: Directory to cache the parsed schema in, which
+                             must only be writable by trusted users.
+    :type schema_cache_dir: str or None
+    """
+
+    def __init__(self, schema_path, host='127.0.0.1', port=0, latency=0,  # pylint: disable=too-many-arguments
+                 jitter=0, error_rate=0, seed=None, num_bodies=20,
+                 value_factory=None, schema_cache_dir=None):
+        self._client = Client(schema_path, schema_cache_dir=schema_cache_dir)
+        self._latency = latency
+        self._jitter = jitter
+        self._error_rate = error_rate
+        self._random = random.Random(seed)
+        self._num_bodies = num_bodies
+        self._value_factory = (StrategyFactory() if value_factory is None
+                               else value_factory)
+        self._lock = threading.Lock()
+        self._routes = _routes(self._client)
+        self._responses = {operation: self._operation_responses(operation)
+                           for _, _, operation in self._routes}
+
+        self._server = _ThreadingHTTPServer((host, port), _StubRequestHandler)
+        self._server.stub = self
+        self._thread = None
+
+    def __repr__(self):
+        return "{}(client={!r}, url={!r})".format(self.__class__.__name__,
+                                                  self._client, self.url)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self):
+        """The URL the server can be reached at, to pass as the server URL of
+        a `client.Client`.
+
+        :rtype: str
+        """
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        """Start serving requests in a background thread."""
+        log.debug("Starting stub server at: %r", self.url)
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        """Serve requests in the calling thread until interrupted."""
+        log.debug("Serving stub server at: %r", self.url)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._close()
+
+    def stop(self):
+        """Stop serving requests, and close the server."""
+        log.debug("Stopping stub server at: %r", self.url)
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._close()
+
+    def respond(self, method, path):
+        """The response to a request to the given method and path, after
+        waiting for any injected latency.
+
+        :param method: The HTTP method of the request.
+        :type method: str
+        :param path: The path of the request, without any query string.
+        :type path: str
+        :return: The status code and body of the response.
+        :rtype: tuple(int, bytes)
+        """
+        with self._lock:
+            delay = self._latency + self._random.uniform(0, self._jitter)
+            error = self._random.random() < self._error_rate
+        if delay > 0:
+            time.sleep(delay)
+
+        operation = self._match(method, path)
+        if operation is None:
+            return 404, _json_bytes({"message": "No operation matches"})
+        if error:
+            return 500, _json_bytes({"message": "Injected error"})
+
+        status, bodies = self._responses[operation]
+        with self._lock:
+            body = next(bodies)
+        return status, body
+
+    def _match(self, method, path):
+        for route_method, route, operation in self._routes:
+            if route_method == method.lower() and route.fullmatch(path):
+                return operation
+        return None
+
+    def _operation_responses(self, operation):
+        """The status code to respond to an operation with, and a cycle of
+        encoded bodies generated to respond with.
+
+        :rtype: tuple(int, Iterator(bytes))
+        """
+        status = min(operation.response_codes,
+                     key=lambda code: (not 200 <= code < 300, code))
+        schema = operation._response_schema(status)  # pylint: disable=protected-access
+        bodies = [b'']
+        if status != 204 and schema is not None:
+            log.debug("Generating bodies for operation: %r", operation)
+            try:
+                template = self._value_factory.produce(Primitive(schema))
+            except (KeyError, AssertionError):
+                # Some schemas, such as those using ``allOf``, aren't
+                # supported for generating values.
+                log.warning("Can't generate bodies for operation: %r",
+                            operation, exc_info=True)
+                bodies = [b'null']
+            else:
+                bodies = [_json_bytes(body) for body in draw_examples(
+                    template.strategy(), self._num_bodies)]
+
+        return status, itertools.cycle(bodies or [b'null'])
+
+    def _close(self):
+        self._server.server_close()
+        self._client.close()
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                           http.server.HTTPServer):
+    """HTTP server handling each connection in its own thread."""
+    daemon_threads = True
+
+
+class _StubRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Handler answering every request with the stub server's response."""
+    # Keep connections alive between requests, as real servers do.
+    protocol_version = 'HTTP/1.1'
+
+    def _handle(self):
+        # Read any body, so the next request on the connection can be read.
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status, body = self.server.stub.respond(self.command,
+                                                self.path.split('?', 1)[0])
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_PUT = do_POST = do_DELETE = _handle
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        log.debug("%s - %s", self.address_string(), format % args)
+
+
+def _routes(client):
+    """Expression matching the paths of requests to each operation, along with
+    the method of the operation.
+
+    :rtype: list(tuple(str, re.Pattern, schema.Operation))
+    """
+    base_path = (client._pyswagger_app.root.basePath or '').rstrip('/')  # pylint: disable=protected-access
+    routes = []
+    for operation in client.api.operations():
+        # Path parameters may take any value within a single path segment.
+        chunks = re.split(r'\{[^}]*\}', base_path + operation.path)
+        routes.append((operation.method, re.compile(
+            '[^/]+'.join(re.escape(chunk) for chunk in chunks)), operation))
+
+    return routes
+
+
+def _json_bytes(value):
+    return json.dumps(value, default=_json_default).encode('utf-8')
+
+
+def _json_default(value):
+    """Represent values generated for types JSON doesn't have as they're sent
+    in Swagger APIs."""
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    if isinstance(value, io.BytesIO):
+        return base64.b64encode(value.getvalue()).decode('ascii')
+    raise TypeError("Can't represent value in JSON: {!r}".format(value))
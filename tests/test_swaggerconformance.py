@@ -10,16 +10,35 @@ drive the API does all the validation of input required for us.
 """
 import unittest
 import unittest.mock
+import argparse
+import asyncio
+import datetime
+import io
+import pickle
 import re
+import os
+import sys
 import os.path as osp
 import json
+import tempfile
+import threading
+import time
 import urllib
+import uuid
 
 import responses
 import hypothesis
 
 import swaggerconformance
+import swaggerconformance._budget
+import swaggerconformance._generation
+import swaggerconformance._sharding
+import swaggerconformance._values
+import swaggerconformance.instrumentation
+import swaggerconformance.latency
 import swaggerconformance.response
+import swaggerconformance.results
+import swaggerconformance.stubserver
 
 
 TEST_SCHEMA_DIR = osp.relpath(osp.join(osp.dirname(osp.realpath(__file__)),
@@ -118,6 +137,200 @@ class APITemplateTestCase(unittest.TestCase):
         self.assertEqual(api_template.endpoints['/apps/{appid}']['get'],
                          api_template.operation('get_apps_resource'))
 
+    def test_lazy_operations(self):
+        """Test operations are only built when first accessed, and the same
+        operation is returned on every access."""
+        with unittest.mock.patch('swaggerconformance.schema._api.Operation',
+                                 wraps=swaggerconformance.schema.Operation) \
+                as operation_class:
+            api_template = swaggerconformance.schema.Api(self.client)
+            self.assertSetEqual(set(api_template.endpoints['/apps/{appid}']),
+                                {'get', 'put', 'delete'})
+            self.assertEqual(operation_class.call_count, 0)
+
+            operation = api_template.operation('get_apps_resource')
+            self.assertEqual(operation_class.call_count, 1)
+            self.assertIs(api_template.endpoints['/apps/{appid}']['get'],
+                          operation)
+            self.assertEqual(operation_class.call_count, 1)
+
+            self.assertEqual(len(list(api_template.operations())), 5)
+            self.assertEqual(operation_class.call_count, 5)
+            self.assertIn(operation, api_template.operations())
+
+        with self.assertRaises(KeyError):
+            api_template.endpoints['/missing']
+        with self.assertRaises(KeyError):
+            api_template.endpoints['/apps/{appid}']['post']
+
+    def test_compact_templates(self):
+        """Test templates hold their fields in slots, and build each child
+        primitive only once."""
+        api_template = swaggerconformance.schema.Api(self.client)
+        operation = api_template.operation('put_apps_resource')
+        parameter = operation.parameters['payload']
+        body = parameter._swagger_definition  # pylint: disable=protected-access
+        for template in (operation, parameter, body):
+            self.assertFalse(hasattr(template, '__dict__'))
+
+        self.assertEqual(body.type, 'object')
+        self.assertIs(body.properties, body.properties)
+        self.assertIs(body.properties['data'].properties,
+                      body.properties['data'].properties)
+        with self.assertRaises(TypeError):
+            body.properties['extra'] = body.properties['data']
+
+    def test_canonical_primitives(self):
+        """Test each definition is wrapped by a single primitive, however it's
+        referenced."""
+        api_template = swaggerconformance.schema.Api(self.client)
+        operation = api_template.operation('put_apps_resource')
+        raw_parameter = operation._pyswagger_operation.parameters[0]  # pylint: disable=protected-access
+        body = operation.parameters['payload']._swagger_definition  # pylint: disable=protected-access
+
+        # The parameter's schema is a reference to the model definition.
+        self.assertIsNotNone(raw_parameter.schema.ref_obj)
+        self.assertIs(swaggerconformance.schema.Primitive(raw_parameter.schema),
+                      body)
+        self.assertIs(swaggerconformance.schema.Primitive(
+            raw_parameter.schema.ref_obj), body)
+
+        factory = swaggerconformance.strategies.StrategyFactory()
+        self.assertIs(factory.produce(
+            swaggerconformance.schema.Primitive(raw_parameter.schema)),
+                      factory.produce(body))
+
+
+class ClientTestCase(unittest.TestCase):
+    """Tests of the `client.Client` class."""
+
+    @responses.activate
+    def test_session_reused(self):
+        """All requests should be sent over the same pooled session."""
+        respond_to_get(r'/apps/.+', response_json={'name': 'abc', 'data': {}})
+        client = swaggerconformance.client.Client(TEST_SCHEMA_PATH,
+                                                  pool_size=3,
+                                                  max_retries=2)
+        operation = client.api.operation('get_apps_resource')
+
+        adapter = client._session.get_adapter(SCHEMA_URL_BASE)  # pylint: disable=protected-access
+        self.assertEqual(adapter._pool_maxsize, 3)  # pylint: disable=protected-access
+        self.assertEqual(adapter.max_retries.total, 2)
+
+        # No new sessions should be created while making requests.
+        with unittest.mock.patch('requests.Session',
+                                 side_effect=AssertionError):
+            for app_id in ('first', 'second'):
+                result = client.request(operation, {'appid': app_id})
+                self.assertEqual(result.status, 200)
+
+    def test_close(self):
+        """Using the client as a context manager closes the session after."""
+        with unittest.mock.patch('requests.Session.close') as close_mock:
+            with swaggerconformance.client.Client(TEST_SCHEMA_PATH,
+                                                  keep_alive=False) as client:
+                session = client._session  # pylint: disable=protected-access
+                self.assertEqual(session.headers['Connection'], 'close')
+                close_mock.reset_mock()
+            close_mock.assert_called_once_with()
+
+
+class SchemaCacheTestCase(unittest.TestCase):
+    """Tests of caching parsed schemas on disk."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_cached_schema_reused(self):
+        """A second client for the same schema loads it from the cache."""
+        swaggerconformance.client.Client(TEST_SCHEMA_PATH,
+                                         schema_cache_dir=self.cache_dir.name)
+        self.assertEqual(len(os.listdir(self.cache_dir.name)), 1)
+
+        with unittest.mock.patch('pyswagger.App.load',
+                                 side_effect=AssertionError):
+            client = swaggerconformance.client.Client(
+                TEST_SCHEMA_PATH, schema_cache_dir=self.cache_dir.name)
+        operation = client.api.operation('get_apps_resource')
+        self.assertEqual(operation.path, '/apps/{appid}')
+        self.assertEqual(operation.response_codes, {200, 404})
+
+    def test_changed_schema_reparsed(self):
+        """Schemas with different content are cached separately."""
+        with open(TEST_SCHEMA_PATH) as schema_file:
+            schema = json.load(schema_file)
+        schema['paths'].pop('/schema')
+        schema_path = osp.join(self.cache_dir.name, 'schema.json')
+        with open(schema_path, 'w') as schema_file:
+            json.dump(schema, schema_file)
+
+        swaggerconformance.client.Client(TEST_SCHEMA_PATH,
+                                         schema_cache_dir=self.cache_dir.name)
+        client = swaggerconformance.client.Client(
+            'file://' + osp.abspath(schema_path),
+            schema_cache_dir=self.cache_dir.name)
+        self.assertNotIn('/schema', client.api.endpoints)
+        self.assertEqual(len(os.listdir(self.cache_dir.name)), 3)
+
+    def test_corrupt_cache_ignored(self):
+        """An unreadable cache file is ignored and replaced."""
+        swaggerconformance.client.Client(TEST_SCHEMA_PATH,
+                                         schema_cache_dir=self.cache_dir.name)
+        cache_path = osp.join(self.cache_dir.name,
+                              os.listdir(self.cache_dir.name)[0])
+        with open(cache_path, 'wb') as cache_file:
+            cache_file.write(b'not a pickle')
+
+        client = swaggerconformance.client.Client(
+            TEST_SCHEMA_PATH, schema_cache_dir=self.cache_dir.name)
+        self.assertIn('/schema', client.api.endpoints)
+        with unittest.mock.patch('pyswagger.App.load',
+                                 side_effect=AssertionError):
+            swaggerconformance.client.Client(
+                TEST_SCHEMA_PATH, schema_cache_dir=self.cache_dir.name)
+
+
+    @responses.activate
+    def test_url_schema_fetched_once(self):
+        """A schema at a URL is only fetched once to cache it."""
+        schema_url = 'http://schemas.example.com/schema.json'
+        with open(TEST_SCHEMA_PATH, 'rb') as schema_file:
+            responses.add(responses.GET, schema_url, body=schema_file.read(),
+                          content_type=CONTENT_TYPE_JSON)
+
+        client = swaggerconformance.client.Client(
+            schema_url, schema_cache_dir=self.cache_dir.name)
+        self.assertIn('/schema', client.api.endpoints)
+        self.assertEqual(len(responses.calls), 1)
+
+    def test_only_pyswagger_unpickled(self):
+        """Cache files referring to anything but pyswagger classes aren't
+        loaded."""
+        marker_path = osp.join(self.cache_dir.name, 'marker')
+        open(marker_path, 'w').close()
+
+        class Remover:  # pylint: disable=too-few-public-methods
+            """Pickles as a call removing the marker file."""
+
+            def __reduce__(self):
+                return os.remove, (marker_path,)
+
+        swaggerconformance.client.Client(TEST_SCHEMA_PATH,
+                                         schema_cache_dir=self.cache_dir.name)
+        cache_path = osp.join(self.cache_dir.name, next(
+            name for name in os.listdir(self.cache_dir.name)
+            if name.endswith('.pickle')))
+        with open(cache_path, 'wb') as cache_file:
+            pickle.dump(Remover(), cache_file)
+
+        client = swaggerconformance.client.Client(
+            TEST_SCHEMA_PATH, schema_cache_dir=self.cache_dir.name)
+        self.assertIn('/schema', client.api.endpoints)
+        self.assertTrue(osp.exists(marker_path))
+
 class BasicConformanceAPITestCase(unittest.TestCase):
     """Tests of the basic conformance testing API itself."""
 
@@ -168,6 +381,158 @@ class BasicConformanceAPITestCase(unittest.TestCase):
                                dunder_main,
                                [TEST_SCHEMA_PATH])
 
+    @responses.activate
+    def test_parallel_deferred_failure(self):
+        """Errors testing operations in parallel are all still reported."""
+        from swaggerconformance.__main__ import main as dunder_main
+        # Return an error response to all endpoints
+        respond_to_get('/schema')
+        respond_to_get('/apps', status=500)
+        respond_to_get(r'/apps/.+', status=500)
+        respond_to_put(r'/apps/.+', status=500)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        self.assertRaisesRegex(Exception,
+                               r"3 operation\(s\) failed",
+                               dunder_main,
+                               [TEST_SCHEMA_PATH, '-j', '3'])
+
+    @responses.activate
+    def test_parallel_immediate_failure(self):
+        """An error testing operations in parallel stops the test."""
+        # Return an error response to all endpoints
+        respond_to_get('/schema')
+        respond_to_get('/apps', status=500)
+        respond_to_get(r'/apps/.+', status=404)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        self.assertRaises(AssertionError,
+                          swaggerconformance.api_conformance_test,
+                          TEST_SCHEMA_PATH,
+                          cont_on_err=False,
+                          workers=2)
+
+    @responses.activate
+    def test_parallel_requests_only(self):
+        """Testing in parallel only sends requests from worker threads, with
+        every example drawn on the calling thread."""
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=404)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        drawing_threads = set()
+        draw_examples = swaggerconformance._generation.draw_examples
+
+        def recording_draw_examples(strategy, num_examples):
+            """Draw examples, recording which thread drew them."""
+            drawing_threads.add(threading.current_thread())
+            return draw_examples(strategy, num_examples)
+
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                unittest.mock.patch(
+                    'swaggerconformance._basictests.draw_examples',
+                    side_effect=recording_draw_examples):
+            swaggerconformance.api_conformance_test(
+                TEST_SCHEMA_PATH, num_tests_per_op=5, cont_on_err=False,
+                workers=3, example_database=temp_dir)
+
+        self.assertEqual(drawing_threads, {threading.current_thread()})
+        self.assertGreater(len(responses.calls), 4)
+
+    @responses.activate
+    def test_parallel_failures_recorded_once(self):
+        """A failure testing in parallel is minimised by testing again, but
+        only the original tests are recorded."""
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=500)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        sink = io.StringIO()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.assertRaisesRegex(Exception, r"1 operation\(s\) failed",
+                                   swaggerconformance.api_conformance_test,
+                                   TEST_SCHEMA_PATH, num_tests_per_op=5,
+                                   workers=3, results_sink=sink,
+                                   example_database=temp_dir)
+
+        records = [json.loads(line) for line in sink.getvalue().splitlines()]
+        failures = [record for record in records if not record["passed"]]
+        self.assertEqual([record["operation"] for record in failures],
+                         ["get_apps_resource"])
+        requests = [call for call in responses.calls
+                    if call.request.method == 'GET' and
+                    '/apps/' in call.request.url]
+        self.assertGreater(len(requests), 1)
+
+    @responses.activate
+    def test_results_log(self):
+        """The result of every request is streamed to the results log."""
+        respond_to_get('/schema')
+        respond_to_get('/apps', status=500)
+        respond_to_get(r'/apps/.+', status=404)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        sink = io.StringIO()
+        self.assertRaises(AssertionError,
+                          swaggerconformance.api_conformance_test,
+                          TEST_SCHEMA_PATH,
+                          num_tests_per_op=5,
+                          cont_on_err=False,
+                          results_sink=sink)
+
+        records = [json.loads(line) for line in sink.getvalue().splitlines()]
+        self.assertGreater(len(records), 0)
+        for record in records:
+            self.assertEqual(set(record),
+                             {"operation", "params_digest", "status",
+                              "latency", "passed", "reason", "timestamp"})
+            self.assertEqual(record["passed"], record["reason"] is None)
+            self.assertGreaterEqual(record["latency"], 0)
+        failures = [record for record in records if not record["passed"]]
+        self.assertGreater(len(failures), 0)
+        self.assertEqual(failures[0]["status"], 500)
+        self.assertIn("AssertionError: Response code 500",
+                      failures[0]["reason"])
+
+    def test_params_digest_by_content(self):
+        """Parameters are digested by their content, so the same parameters
+        always have the same digest."""
+        digest = swaggerconformance.results.params_digest
+        self.assertEqual(
+            digest({'file': {'data': io.BytesIO(b'abc')}, 'data': b'\x00'}),
+            digest({'file': {'data': io.BytesIO(b'abc')}, 'data': b'\x00'}))
+        self.assertNotEqual(digest({'file': {'data': io.BytesIO(b'abc')}}),
+                            digest({'file': {'data': io.BytesIO(b'abd')}}))
+
+    @responses.activate
+    def test_results_log_file(self):
+        """Running __main__ can stream results to a file."""
+        from swaggerconformance.__main__ import main as dunder_main
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=404)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results_path = osp.join(temp_dir, 'results.jsonl')
+            dunder_main([TEST_SCHEMA_PATH, '-n', '3',
+                         '--results-log', results_path])
+            with open(results_path) as results_file:
+                records = [json.loads(line) for line in results_file]
+
+        self.assertTrue(all(record["passed"] for record in records))
+        self.assertEqual({record["operation"] for record in records},
+                         {"get_schema_resource", "get_apps_collection",
+                          "get_apps_resource", "put_apps_resource",
+                          "delete_apps_resource"})
+
     @responses.activate
     def test_content_type_header_with_parameters(self):
         """Content type header parameters should be allowed."""
@@ -187,6 +552,90 @@ class BasicConformanceAPITestCase(unittest.TestCase):
                                                 cont_on_err=False)
 
 
+@unittest.skipIf(sys.version_info < (3, 5),
+                 "Testing from an event loop needs Python 3.5")
+class AsyncConformanceAPITestCase(unittest.TestCase):
+    """Tests of conformance testing from an `asyncio` event loop."""
+
+    @classmethod
+    def setUpClass(cls):
+        # The module can't even be parsed by older Python versions.
+        import swaggerconformance.aio  # pylint: disable=redefined-outer-name
+
+    @responses.activate
+    def test_async_success(self):
+        """Operations can be validated concurrently from an event loop."""
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=404)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        asyncio.get_event_loop().run_until_complete(
+            swaggerconformance.aio.async_api_conformance_test(
+                TEST_SCHEMA_PATH, cont_on_err=False, max_concurrency=5))
+
+    @responses.activate
+    def test_async_generation_off_loop(self):
+        """Examples are all drawn on one thread other than the event loop's."""
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=404)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        drawing_threads = set()
+        draw_examples = swaggerconformance._generation.draw_examples
+
+        def recording_draw_examples(strategy, num_examples):
+            """Draw examples, recording which thread drew them."""
+            drawing_threads.add(threading.current_thread())
+            return draw_examples(strategy, num_examples)
+
+        with unittest.mock.patch(
+                'swaggerconformance.aio.draw_examples',
+                side_effect=recording_draw_examples):
+            asyncio.get_event_loop().run_until_complete(
+                swaggerconformance.aio.async_api_conformance_test(
+                    TEST_SCHEMA_PATH, num_tests_per_op=5, cont_on_err=False))
+
+        self.assertEqual(len(drawing_threads), 1)
+        self.assertNotIn(threading.current_thread(), drawing_threads)
+
+    @responses.activate
+    def test_async_deferred_failure(self):
+        """Errors validating concurrently are reported in a single exception."""
+        # Return an error response to all endpoints
+        respond_to_get('/schema')
+        respond_to_get('/apps', status=500)
+        respond_to_get(r'/apps/.+', status=500)
+        respond_to_put(r'/apps/.+', status=500)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        self.assertRaisesRegex(
+            Exception,
+            r"3 operation\(s\) failed",
+            asyncio.get_event_loop().run_until_complete,
+            swaggerconformance.aio.async_api_conformance_test(TEST_SCHEMA_PATH))
+
+    @responses.activate
+    def test_async_immediate_failure(self):
+        """An error validating concurrently can stop the test immediately."""
+        # Return an error response to all endpoints
+        respond_to_get('/schema')
+        respond_to_get('/apps', status=500)
+        respond_to_get(r'/apps/.+', status=404)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        self.assertRaisesRegex(
+            AssertionError,
+            r"Response code 500",
+            asyncio.get_event_loop().run_until_complete,
+            swaggerconformance.aio.async_api_conformance_test(TEST_SCHEMA_PATH,
+                                                          cont_on_err=False))
+
+
 class ParameterTypesTestCase(unittest.TestCase):
     """Tests to cover all the options/constraints on parameters."""
 
@@ -277,7 +726,8 @@ class ExternalExamplesTestCase(unittest.TestCase):
 
         # Now just kick off the validation process.
         swaggerconformance.api_conformance_test(PETSTORE_SCHEMA_PATH,
-                                                cont_on_err=False)
+                                                cont_on_err=False,
+                                                validate_responses=True)
 
     @responses.activate
     def test_openapi_uber(self):
@@ -409,6 +859,1101 @@ class MultiRequestTestCase(unittest.TestCase):
         single_operation_test(client, put_operation, get_operation) # pylint: disable=E1120
 
 
+class StrategyFactoryTestCase(unittest.TestCase):
+    """Tests of the `strategies.StrategyFactory` class."""
+
+    def setUp(self):
+        self.client = swaggerconformance.client.Client(PETSTORE_SCHEMA_PATH)
+
+    def test_shared_definitions_produced_once(self):
+        """Parameters referencing the same model share one strategy."""
+        value_factory = swaggerconformance.strategies.StrategyFactory()
+        add_body = self.client.api.operation('addPet').parameters['body']
+        update_body = self.client.api.operation('updatePet').parameters['body']
+
+        add_strategy = value_factory.produce(
+            add_body._swagger_definition)  # pylint: disable=protected-access
+        update_strategy = value_factory.produce(
+            update_body._swagger_definition)  # pylint: disable=protected-access
+        self.assertIs(add_strategy, update_strategy)
+
+    def test_strategy_built_once(self):
+        """Hypothesis strategies are only built the first time requested."""
+        value_factory = swaggerconformance.strategies.StrategyFactory()
+        body = self.client.api.operation('addPet').parameters['body']
+        template = value_factory.produce(
+            body._swagger_definition)  # pylint: disable=protected-access
+
+        with unittest.mock.patch.object(
+                template, '_build_strategy',
+                wraps=template._build_strategy) as build_mock:  # pylint: disable=protected-access
+            first_strategy = template.strategy()
+            self.assertIs(template.strategy(), first_strategy)
+            self.assertIs(body.strategy(value_factory), first_strategy)
+        build_mock.assert_called_once_with()
+
+    def test_register_clears_cache(self):
+        """Registering a new creator means it's used for later values."""
+        value_factory = swaggerconformance.strategies.StrategyFactory()
+        pet_id = self.client.api.operation('getPetById').parameters['petId']
+        definition = pet_id._swagger_definition  # pylint: disable=protected-access
+        self.assertIsInstance(
+            value_factory.produce(definition),
+            swaggerconformance.strategies.primitivestrategies.IntegerStrategy)
+
+        value_factory.register(
+            'integer', 'int64',
+            swaggerconformance.strategies.primitivestrategies.FloatStrategy)
+        self.assertIsInstance(
+            value_factory.produce(definition),
+            swaggerconformance.strategies.primitivestrategies.FloatStrategy)
+
+
+class ConstrainedValuesTestCase(unittest.TestCase):
+    """Tests of generating values meeting constraints directly, rather than by
+    rejecting values which don't."""
+
+    def assert_all_examples(self, strategy, check):
+        """Assert a check passes for many examples from a strategy."""
+        examples = swaggerconformance._generation.draw_examples(strategy, 50)
+        self.assertGreater(len(examples), 0)
+        for example in examples:
+            self.assertTrue(check(example), example)
+
+    def test_matches_generated(self):
+        """Strings generated match the pattern without any padding."""
+        self.assert_all_examples(
+            swaggerconformance.strategies.basestrategies.regex_text(
+                r'[a-z]{3}-\d{2}'),
+            lambda value: re.fullmatch(r'[a-z]{3}-\d{2}', value))
+
+    def test_whole_matches(self):
+        """Only text matching the whole pattern is generated, as it's also
+        matched wherever the pattern is searched for."""
+        self.assert_all_examples(
+            swaggerconformance.strategies.basestrategies.regex_text(r'ab'),
+            lambda value: value == 'ab')
+        self.assert_all_examples(
+            swaggerconformance.strategies.basestrategies.regex_text(
+                r'[a-z]+', min_size=2, max_size=4),
+            lambda value: re.fullmatch(r'[a-z]{2,4}', value))
+
+    def test_max_length(self):
+        """Long matches are excluded."""
+        self.assert_all_examples(
+            swaggerconformance.strategies.basestrategies.regex_text(
+                r'^\d+$', min_size=2, max_size=4),
+            lambda value: re.fullmatch(r'\d{2,4}', value))
+
+    def test_leading_flags(self):
+        """Flags at the start of a pattern are kept there."""
+        self.assert_all_examples(
+            swaggerconformance.strategies.basestrategies.regex_text(
+                r'(?i)^[a-c]+$', min_size=3, max_size=5),
+            lambda value: re.fullmatch(r'[a-cA-C]{3,5}', value))
+
+    def test_blacklist_characters(self):
+        """Blacklisted characters don't appear in matches."""
+        self.assert_all_examples(
+            swaggerconformance.strategies.basestrategies.regex_text(
+                r'\s+', blacklist_characters=['\r', '\n']),
+            lambda value: re.fullmatch(r'\s+', value) and
+            '\r' not in value and '\n' not in value)
+
+    def test_header_pattern_not_stripped(self):
+        """Header values matching a pattern are sent as generated."""
+        definition = unittest.mock.Mock(maxLength=None, minLength=3,
+                                        enum=None, pattern=r'^ [a-z]{2}$')
+        template = swaggerconformance.strategies.primitivestrategies \
+            .HTTPHeaderStringStrategy(definition, None)
+        self.assert_all_examples(
+            template.strategy(),
+            lambda value: re.fullmatch(r' [a-z]{2}', value))
+
+    def test_string_strategy_pattern(self):
+        """String values with a pattern are generated to match it."""
+        definition = unittest.mock.Mock(maxLength=8, minLength=None,
+                                        enum=None, pattern=r'^[0-9a-f]+$')
+        template = swaggerconformance.strategies.primitivestrategies \
+            .StringStrategy(definition, None)
+        self.assert_all_examples(
+            template.strategy(),
+            lambda value: re.fullmatch(r'[0-9a-f]{1,8}', value))
+
+    def test_exclusive_float_bounds(self):
+        """Floats are generated within tight exclusive bounds."""
+        definition = unittest.mock.Mock(
+            minimum=0, maximum=1e-323, exclusiveMinimum=True,
+            exclusiveMaximum=True, multipleOf=None)
+        template = swaggerconformance.strategies.primitivestrategies \
+            .FloatStrategy(definition, None)
+        self.assert_all_examples(template.strategy(),
+                                 lambda value: value == 5e-324)
+
+        definition = unittest.mock.Mock(
+            minimum=-1, maximum=1, exclusiveMinimum=True,
+            exclusiveMaximum=True, multipleOf=0.5)
+        template = swaggerconformance.strategies.primitivestrategies \
+            .FloatStrategy(definition, None)
+        self.assert_all_examples(template.strategy(),
+                                 lambda value: value in (-0.5, 0, 0.5))
+
+    def test_additional_property_names(self):
+        """Additional properties never replace specified properties."""
+        definition = unittest.mock.Mock(
+            properties={'': None, 'a': None}, required_properties={''},
+            additionalProperties=True, maxProperties=None,
+            minProperties=None)
+        factory = unittest.mock.Mock(max_bytes=None)
+        factory.budgeted.return_value = factory
+        factory.produce.return_value.strategy.return_value = \
+            hypothesis.strategies.just(None)
+        template = swaggerconformance.strategies.primitivestrategies \
+            .ObjectStrategy(definition, factory)
+        self.assert_all_examples(
+            template.strategy(),
+            lambda value: value[''] is None and value.get('a') is None)
+
+
+class PayloadBudgetTestCase(unittest.TestCase):
+    """Tests of limiting the size of generated requests."""
+
+    def assert_all_examples(self, strategy, check):
+        """Assert a check passes for many examples from a strategy."""
+        examples = swaggerconformance._generation.draw_examples(strategy, 50)
+        self.assertGreater(len(examples), 0)
+        for example in examples:
+            self.assertTrue(check(example), example)
+
+    def test_bounded_text(self):
+        """Text is truncated to fit its budget, but not below its minimum
+        length."""
+        self.assert_all_examples(
+            swaggerconformance.strategies.basestrategies.bounded_text(
+                max_bytes=20),
+            lambda value: len(json.dumps(value)) <= 20)
+        self.assert_all_examples(
+            swaggerconformance.strategies.basestrategies.bounded_text(
+                min_size=30, max_bytes=10),
+            lambda value: len(value) == 30)
+        for max_bytes in (2, 10, 50, 200):
+            self.assert_all_examples(
+                swaggerconformance.strategies.basestrategies.json(
+                    max_bytes=max_bytes),
+                lambda value, limit=max_bytes: len(json.dumps(value)) <= limit)
+
+    def test_request_budgets(self):
+        """Requests fit within the request budget, and each parameter within
+        the parameter budget."""
+        api = swaggerconformance.client.Client(PETSTORE_SCHEMA_PATH).api
+        factory = swaggerconformance.strategies.StrategyFactory(
+            max_request_bytes=600)
+        for operation_id in ('addPet', 'createUsersWithArrayInput'):
+            self.assert_all_examples(
+                api.operation(operation_id).parameters_strategy(factory),
+                lambda params: sum(len(json.dumps(value))
+                                   for value in params.values()) <= 600)
+
+        factory = swaggerconformance.strategies.StrategyFactory(
+            max_parameter_bytes=300)
+        self.assert_all_examples(
+            api.operation('updateUser').parameters_strategy(factory),
+            lambda params: all(len(json.dumps(value)) <= 300
+                               for value in params.values()))
+
+    def test_budget_shares(self):
+        """Budgets are shared between values whose size varies, once the
+        minimum size of every value is set aside."""
+        ps = swaggerconformance.strategies.primitivestrategies
+        integer = unittest.mock.Mock(type='integer', format=None)
+        string = unittest.mock.Mock(type='string', format=None, minLength=3)
+        obj = unittest.mock.Mock(type='object', format=None)
+        obj.properties = {'a': integer, 'b': string, 'c': obj}
+        # Braces, then each name with its colon and comma and the minimum
+        # value - the recursive property needing none.
+        self.assertEqual(ps.minimum_bytes(obj), 2 + 45 + 10 + 5)
+
+        self.assertEqual(ps.budget_shares(62 + 2 + 40 + 20,
+                                          [obj, None, integer]),
+                         [62 + 10, 2 + 10, None])
+        self.assertEqual(ps.budget_shares(None, [obj]), [None])
+
+
+class ResponseValidationTestCase(unittest.TestCase):
+    """Tests of validating response bodies against their schemas."""
+
+    def setUp(self):
+        self.client = swaggerconformance.client.Client(PETSTORE_SCHEMA_PATH)
+        self.pet = {"id": 0,
+                    "category": {"id": 0, "name": "string"},
+                    "name": "doggie",
+                    "photoUrls": ["string"],
+                    "tags": [{"id": 0, "name": "string"}],
+                    "status": "available"}
+
+    def test_validator_errors(self):
+        """Values not matching the schema are reported with their paths."""
+        operation = self.client.api.operation('getPetById')
+        validator = operation.response_validator(200)
+        self.assertEqual(validator.errors(self.pet), [])
+
+        bad_pet = dict(self.pet, id="0", status="lost",
+                       tags=[{"id": 0, "name": 1}])
+        del bad_pet["name"]
+        errors = validator.errors(bad_pet)
+        self.assertEqual(len(errors), 4)
+        self.assertTrue(errors[0].startswith(
+            "$: missing required properties ['name']"))
+        self.assertTrue(any(error.startswith("$.id: '0' is not of type")
+                            for error in errors))
+        self.assertTrue(any(error.startswith("$.tags[0].name: 1 is not")
+                            for error in errors))
+        self.assertTrue(any(error.startswith("$.status: 'lost' is not one of")
+                            for error in errors))
+
+    def test_all_of_validated(self):
+        """Values must conform to every definition listed in ``allOf``."""
+        with open(PETSTORE_SCHEMA_PATH, encoding='utf-8') as schema_file:
+            schema = json.load(schema_file)
+        schema['definitions']['NamedPet'] = {'allOf': [
+            {'$ref': '#/definitions/Pet'},
+            {'type': 'object', 'required': ['nickname'],
+             'properties': {'nickname': {'type': 'string'}}}]}
+        schema['paths']['/pet/{petId}']['get']['responses']['200'][
+            'schema'] = {'$ref': '#/definitions/NamedPet'}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            schema_path = osp.join(temp_dir, 'schema.json')
+            with open(schema_path, 'w', encoding='utf-8') as schema_file:
+                json.dump(schema, schema_file)
+            client = swaggerconformance.client.Client(schema_path)
+
+        validator = client.api.operation('getPetById').response_validator(200)
+        self.assertEqual(validator.errors(dict(self.pet, nickname="rex")), [])
+        self.assertEqual(validator.errors(self.pet),
+                         ["$: missing required properties ['nickname']"])
+        errors = validator.errors(dict(self.pet, id="0", nickname=1))
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(errors[0].startswith("$.id: '0' is not of type"))
+        self.assertTrue(errors[1].startswith("$.nickname: 1 is not of type"))
+
+    def test_validator_compiled_once(self):
+        """Each status code's validator is compiled once and reused, and only
+        exists if the response has a schema."""
+        operation = self.client.api.operation('getPetById')
+        self.assertIs(operation.response_validator(200),
+                      operation.response_validator(200))
+        self.assertIsNone(operation.response_validator(404))
+
+    @responses.activate
+    def test_invalid_body_fails(self):
+        """Operations returning bodies not matching their schema fail only
+        when validating responses."""
+        operation = self.client.api.operation('getPetById')
+        respond_to_get(r'/pet/-?\d+', response_json=dict(self.pet, id="0"))
+
+        swaggerconformance.operation_conformance_test(self.client, operation)
+        with self.assertRaisesRegex(AssertionError, r"\$\.id: '0'"):
+            swaggerconformance.operation_conformance_test(
+                self.client, operation, validate_responses=True)
+
+    @responses.activate
+    def test_valid_body_passes(self):
+        """Operations returning bodies matching their schema pass."""
+        operation = self.client.api.operation('getPetById')
+        respond_to_get(r'/pet/-?\d+', response_json=self.pet)
+
+        swaggerconformance.operation_conformance_test(
+            self.client, operation, validate_responses=True)
+
+
+class TimeBudgetTestCase(unittest.TestCase):
+    """Tests of fitting conformance tests into a time budget."""
+
+    @staticmethod
+    def _respond_successfully():
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=404)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+    @staticmethod
+    def _requests_per_operation(sink):
+        counts = {}
+        for line in sink.getvalue().splitlines():
+            operation_id = json.loads(line)["operation"]
+            counts[operation_id] = counts.get(operation_id, 0) + 1
+        return counts
+
+    def test_allocate_examples(self):
+        """Time is shared by weight, with time unneeded by operations reaching
+        the maximum tests shared between the rest."""
+        allocate_examples = swaggerconformance._budget.allocate_examples  # pylint: disable=protected-access
+        self.assertEqual(
+            allocate_examples({'quick': 0.1, 'slow': 1.0, 'unused': 0.1},
+                              {'quick': 1, 'slow': 1, 'unused': 0},
+                              10, 20),
+            {'quick': 20, 'slow': 8, 'unused': 0})
+        self.assertEqual(
+            allocate_examples({'first': 1.0, 'second': 1.0},
+                              {'first': 3, 'second': 1},
+                              8, 20),
+            {'first': 6, 'second': 2})
+        self.assertEqual(allocate_examples({'first': 1.0}, {'first': 1},
+                                           -1, 20),
+                         {'first': 0})
+
+    @responses.activate
+    def test_no_time_left(self):
+        """Every operation is tested the minimum number of times, even if
+        there's no time to test any further."""
+        self._respond_successfully()
+        sink = io.StringIO()
+        with self.assertLogs('swaggerconformance._basictests',
+                             'WARNING') as logs:
+            swaggerconformance.api_conformance_test(TEST_SCHEMA_PATH,
+                                                    results_sink=sink,
+                                                    time_budget=0,
+                                                    min_tests_per_op=2)
+        self.assertIn("Time budget used up", logs.output[-1])
+
+        counts = self._requests_per_operation(sink)
+        self.assertEqual(len(counts), 5)
+        self.assertLessEqual(max(counts.values()), 2)
+
+    def test_cost_per_example_tested(self):
+        """The time taken by each example is measured over the examples
+        actually tested, rather than those asked for."""
+        operation = unittest.mock.Mock(id='op')
+
+        def test_operation(_, num_tests):
+            """Test only one example, however many are asked for."""
+            self.assertEqual(num_tests, 10)
+            time.sleep(0.05)
+            return 1
+
+        with unittest.mock.patch(
+                'swaggerconformance._basictests.allocate_examples',
+                return_value={operation: 0}) as allocate:
+            swaggerconformance._basictests._budgeted_operations_test(  # pylint: disable=protected-access
+                [operation], test_operation, True, 1, 60, 10, 20, {})
+
+        self.assertGreaterEqual(allocate.call_args[0][0][operation], 0.05)
+
+    @responses.activate
+    def test_time_budget(self):
+        """Operations are tested up to the maximum within a time budget."""
+        from swaggerconformance.__main__ import main as dunder_main
+        self._respond_successfully()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results_path = osp.join(temp_dir, 'results.jsonl')
+            dunder_main([TEST_SCHEMA_PATH, '-n', '8', '-j', '2',
+                         '--time-budget', '60', '--min-tests', '2',
+                         '--weight', 'get_apps_collection=2',
+                         '--results-log', results_path])
+            with open(results_path) as results_file:
+                sink = io.StringIO(results_file.read())
+
+        counts = self._requests_per_operation(sink)
+        self.assertEqual(len(counts), 5)
+        self.assertLessEqual(max(counts.values()), 8)
+        self.assertGreater(counts["get_apps_resource"], 2)
+
+    def test_invalid_weight(self):
+        """Weights given on the command line must be numbers."""
+        from swaggerconformance.__main__ import main as dunder_main
+        with unittest.mock.patch('sys.stderr', new_callable=io.StringIO):
+            self.assertRaises(SystemExit, dunder_main,
+                              [TEST_SCHEMA_PATH, '--weight', 'abc'])
+
+
+class IncrementalTestCase(unittest.TestCase):
+    """Tests of only testing operations changed since a previous run."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.schema_path = osp.join(self.temp_dir.name, 'schema.json')
+        self.summary_path = osp.join(self.temp_dir.name, 'summary.json')
+        with open(TEST_SCHEMA_PATH) as schema_file:
+            self.schema = json.load(schema_file)
+        self._write_schema()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write_schema(self):
+        with open(self.schema_path, 'w') as schema_file:
+            json.dump(self.schema, schema_file)
+
+    def _fingerprints(self):
+        client = swaggerconformance.client.Client(self.schema_path)
+        return {operation.id: operation.fingerprint
+                for operation in client.api.operations()}
+
+    def _tested_operations(self, **kwargs):
+        """Run the test, returning which operations were tested."""
+        sink = io.StringIO()
+        try:
+            swaggerconformance.api_conformance_test(
+                self.schema_path, num_tests_per_op=2, results_sink=sink,
+                summary_path=self.summary_path, **kwargs)
+        except Exception:  # pylint: disable=broad-except
+            pass
+        return {json.loads(line)["operation"]
+                for line in sink.getvalue().splitlines()}
+
+    def test_fingerprints(self):
+        """Only changes to the definitions operations use change their
+        fingerprints, and documentation changes don't count."""
+        original = self._fingerprints()
+        self.assertEqual(original, self._fingerprints())
+        self.assertEqual(len(set(original.values())), 5)
+
+        name_definition = self.schema["definitions"]["App name"]
+        name_definition["properties"]["name"]["description"] = "Changed"
+        self._write_schema()
+        self.assertEqual(self._fingerprints(), original)
+
+        name_definition["properties"]["name"]["maxLength"] = 10
+        self._write_schema()
+        changed = {operation_id for operation_id, fingerprint in
+                   self._fingerprints().items()
+                   if fingerprint != original[operation_id]}
+        self.assertEqual(changed, {"get_apps_collection", "get_apps_resource"})
+
+    @responses.activate
+    def test_incremental_runs(self):
+        """Unchanged operations which passed are skipped on later runs."""
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=500)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+        all_operations = set(self._fingerprints())
+
+        self.assertEqual(self._tested_operations(), all_operations)
+
+        # Failing operations are always retested.
+        self.assertEqual(self._tested_operations(since=self.summary_path),
+                         {"get_apps_resource"})
+
+        self.schema["definitions"]["App data"]["maxProperties"] = 3
+        self._write_schema()
+        self.assertEqual(self._tested_operations(since=self.summary_path),
+                         {"get_apps_resource", "put_apps_resource"})
+
+        # Skipped operations are still included in the summary.
+        summary = swaggerconformance.results.RunSummary.load(
+            self.summary_path)
+        self.assertEqual(set(summary.to_dict()), all_operations)
+        self.assertEqual(summary.failed(), ["get_apps_resource"])
+
+        self.assertEqual(self._tested_operations(since=self.summary_path,
+                                                 force=True),
+                         all_operations)
+
+
+class ExampleDatabaseTestCase(unittest.TestCase):
+    """Tests of saving failing examples between runs."""
+
+    @responses.activate
+    def test_failures_saved_per_operation(self):
+        """Failing examples are saved under a key stable for the operation."""
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=500)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.assertRaises(Exception,
+                              swaggerconformance.api_conformance_test,
+                              TEST_SCHEMA_PATH, num_tests_per_op=5,
+                              workers=2, example_database=temp_dir)
+
+            database = hypothesis.database.DirectoryBasedExampleDatabase(
+                temp_dir)
+            failing_key = b"swaggerconformance._basictests." \
+                          b"operation_conformance_test" \
+                          b"[get_apps_resource GET /apps/{appid}]"
+            passing_key = b"swaggerconformance._basictests." \
+                          b"operation_conformance_test" \
+                          b"[get_apps_collection GET /apps]"
+            self.assertGreater(len(list(database.fetch(failing_key))), 0)
+            self.assertEqual(list(database.fetch(passing_key)), [])
+
+    def test_database_key_pinned(self):
+        """The key examples are saved under doesn't change between versions
+        of swaggerconformance or hypothesis, and can't silently go
+        missing."""
+        client = swaggerconformance.client.Client(TEST_SCHEMA_PATH)
+        operation = client.api.operation('get_apps_resource')
+        test = swaggerconformance._basictests._hypothesis_test(
+            operation, hypothesis.strategies.just({}), 1, None, {})
+        self.assertEqual(
+            swaggerconformance._basictests._saved_examples_key(test),
+            b"swaggerconformance._basictests.operation_conformance_test"
+            b"[get_apps_resource GET /apps/{appid}]")
+
+        with self.assertRaises(RuntimeError):
+            swaggerconformance._basictests._saved_examples_key(lambda: None)
+        with self.assertRaises(RuntimeError):
+            swaggerconformance._basictests._keyed_test(
+                lambda: None, "test", lambda test: test)
+
+    @responses.activate
+    def test_failures_separated_between_operations(self):
+        """Each failing operation saves its examples under its own key."""
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=500)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=500)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.assertRaises(Exception,
+                              swaggerconformance.api_conformance_test,
+                              TEST_SCHEMA_PATH, num_tests_per_op=5,
+                              example_database=temp_dir)
+
+            database = hypothesis.database.DirectoryBasedExampleDatabase(
+                temp_dir)
+            keys = [b"swaggerconformance._basictests."
+                    b"operation_conformance_test"
+                    b"[get_apps_resource GET /apps/{appid}]",
+                    b"swaggerconformance._basictests."
+                    b"operation_conformance_test"
+                    b"[delete_apps_resource DELETE /apps/{appid}]"]
+            saved = [set(database.fetch(key)) for key in keys]
+            self.assertTrue(all(len(examples) > 0 for examples in saved))
+
+
+class ShardingTestCase(unittest.TestCase):
+    """Tests of splitting operations between shards."""
+
+    def setUp(self):
+        self.client = swaggerconformance.client.Client(TEST_SCHEMA_PATH)
+        self.operations = list(self.client.api.operations())
+
+    def _shard_ids(self, shard_count, durations=None):
+        return [{operation.id for operation in
+                 swaggerconformance._sharding.shard_operations(  # pylint: disable=protected-access
+                     self.operations, index, shard_count, durations)}
+                for index in range(shard_count)]
+
+    def test_shards_partition_operations(self):
+        """Every operation is in exactly one shard, balanced by count."""
+        shards = self._shard_ids(2)
+        self.assertEqual(shards[0] | shards[1],
+                         {operation.id for operation in self.operations})
+        self.assertEqual(shards[0] & shards[1], set())
+        self.assertEqual(sorted(len(shard) for shard in shards), [2, 3])
+
+        # The assignment doesn't depend on the order operations are in.
+        self.operations.reverse()
+        self.assertEqual(self._shard_ids(2), shards)
+
+    def test_shards_balanced_by_duration(self):
+        """Shards are balanced by the previous durations of operations."""
+        durations = {"get_apps_collection": 10, "put_apps_resource": 6,
+                     "get_apps_resource": 2, "delete_apps_resource": 1,
+                     "get_schema_resource": 1}
+        shards = self._shard_ids(2, durations)
+        self.assertEqual(shards[0], {"get_apps_collection"})
+        self.assertEqual(shards[1], {"put_apps_resource", "get_apps_resource",
+                                     "delete_apps_resource",
+                                     "get_schema_resource"})
+
+    def test_invalid_shard(self):
+        """Shard indexes must be within the number of shards."""
+        shard_operations = swaggerconformance._sharding.shard_operations  # pylint: disable=protected-access
+        self.assertRaises(ValueError, shard_operations, self.operations, 0, 0)
+        self.assertRaises(ValueError, shard_operations, self.operations, 2, 2)
+
+    @responses.activate
+    def test_merge_shard_summaries(self):
+        """Summaries of each shard can be merged, reporting any failures."""
+        from swaggerconformance.__main__ import main as dunder_main
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=500)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            summary_paths = [osp.join(temp_dir, 'summary{}.json'.format(index))
+                             for index in range(2)]
+            for index, summary_path in enumerate(summary_paths):
+                try:
+                    dunder_main([TEST_SCHEMA_PATH, '-n', '2',
+                                 '--shard-index', str(index),
+                                 '--shard-count', '2',
+                                 '--summary', summary_path])
+                except Exception:  # pylint: disable=broad-except
+                    pass
+
+            # Balancing by the timings of a previous run is deterministic.
+            timed_shards = [
+                swaggerconformance._sharding.shard_operations(  # pylint: disable=protected-access
+                    self.operations, index, 2,
+                    swaggerconformance.results.RunSummary.load(
+                        summary_paths[0]).durations())
+                for index in range(2)]
+            self.assertEqual(sum(len(shard) for shard in timed_shards), 5)
+
+            merged_path = osp.join(temp_dir, 'merged.json')
+            with unittest.mock.patch('sys.stdout', new_callable=io.StringIO):
+                self.assertRaisesRegex(Exception,
+                                       r"1 operation\(s\) failed conformance "
+                                       r"tests: get_apps_resource",
+                                       dunder_main,
+                                       ['merge', merged_path] + summary_paths)
+            merged = swaggerconformance.results.RunSummary.load(merged_path)
+
+        self.assertEqual(len(merged.to_dict()), 5)
+        self.assertEqual(merged.failed(), ["get_apps_resource"])
+        self.assertIn("Response code 500",
+                      merged.to_dict()["get_apps_resource"]["error"])
+
+
+class CorpusTestCase(unittest.TestCase):
+    """Tests of generating and replaying corpuses of examples."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.corpus_path = osp.join(self.temp_dir.name, 'corpus.jsonl.gz')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_values_round_trip(self):
+        """All parameter value types are restored exactly from a corpus."""
+        # pylint: disable=protected-access
+        encode_value = swaggerconformance._values.encode_value
+        decode_value = swaggerconformance._values.decode_value
+        params = {
+            'date': datetime.date(1, 2, 3),
+            'datetimes': [datetime.datetime(2017, 3, 21, 23, 13, 44),
+                          datetime.datetime(2017, 3, 21, 23, 13, 44, 949)],
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'bytes': b'\x00\xff',
+            'file': {'data': io.BytesIO(b'contents')},
+            'body': {'$date': 'not a date', 'nested': {'$uuid': 1}},
+            'plain': {'text': 'abc', 'number': 1.5, 'flag': True,
+                      'none': None}}
+
+        decoded = decode_value(json.loads(json.dumps(encode_value(params))))
+        self.assertEqual(decoded['file']['data'].getvalue(), b'contents')
+        del params['file']
+        del decoded['file']
+        self.assertEqual(decoded, params)
+
+    @responses.activate
+    def test_generate_and_replay(self):
+        """A generated corpus replays all of its examples."""
+        respond_to_get('/example')
+        respond_to_delete('/example', status=204)
+        respond_to_put(r'/example/-?\d+', status=204)
+
+        num_examples = swaggerconformance.generate_corpus(
+            FULL_PUT_SCHEMA_PATH, self.corpus_path, num_examples_per_op=5)
+        self.assertGreater(num_examples, 0)
+
+        sink = io.StringIO()
+        # Replaying generates nothing, so mustn't record any generate phase.
+        with unittest.mock.patch(
+                'swaggerconformance._basictests._ExampleTester.test',
+                side_effect=AssertionError):
+            swaggerconformance.replay_corpus(FULL_PUT_SCHEMA_PATH,
+                                             self.corpus_path, workers=2,
+                                             results_sink=sink)
+        self.assertEqual(len(sink.getvalue().splitlines()), num_examples)
+
+    @responses.activate
+    def test_replay_failure(self):
+        """Failures replaying a corpus are reported per operation."""
+        from swaggerconformance.__main__ import main as dunder_main
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=500)
+        respond_to_put(r'/apps/.+', status=500)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        dunder_main(['generate-corpus', TEST_SCHEMA_PATH, self.corpus_path,
+                     '-n', '3'])
+        self.assertRaisesRegex(Exception,
+                               r"2 operation\(s\) failed replaying corpus",
+                               dunder_main,
+                               ['replay', TEST_SCHEMA_PATH, self.corpus_path])
+        self.assertRaises(AssertionError,
+                          swaggerconformance.replay_corpus,
+                          TEST_SCHEMA_PATH, self.corpus_path,
+                          cont_on_err=False)
+
+
+class StubServerTestCase(unittest.TestCase):
+    """Tests of running against a local stub server for an API."""
+
+    def test_conformance_against_stub(self):
+        """Test the conformance test passes against a stub of the API."""
+        with swaggerconformance.stubserver.StubServer(
+                TEST_SCHEMA_PATH) as server:
+            swaggerconformance.api_conformance_test(
+                TEST_SCHEMA_PATH, num_tests_per_op=5, cont_on_err=False,
+                server_url=server.url)
+            results = swaggerconformance.api_load_test(
+                TEST_SCHEMA_PATH, duration=0.5, concurrency=2,
+                num_examples_per_op=3, server_url=server.url)
+
+        summary = results.summary()
+        self.assertGreater(summary['get_apps_collection']['requests'], 0)
+        self.assertTrue(all(operation['errors'] == 0
+                            for operation in summary.values()))
+
+    def test_bodies_conform(self):
+        """Test response bodies are generated matching their schemas."""
+        server = swaggerconformance.stubserver.StubServer(TEST_SCHEMA_PATH,
+                                                          num_bodies=5)
+        try:
+            operation = server._client.api.operation('get_apps_collection')  # pylint: disable=protected-access
+            validator = operation.response_validator(200)
+            for _ in range(5):
+                status, body = server.respond('GET', '/api/apps')
+                self.assertEqual(status, 200)
+                self.assertEqual(validator.errors(json.loads(body.decode())),
+                                 [])
+        finally:
+            server.stop()
+
+    def test_bodies_generated_up_front(self):
+        """Test bodies are all generated before serving, so none are
+        generated while answering requests."""
+        server = swaggerconformance.stubserver.StubServer(TEST_SCHEMA_PATH,
+                                                          num_bodies=5)
+        try:
+            with unittest.mock.patch(
+                    'swaggerconformance.stubserver.draw_examples',
+                    side_effect=AssertionError):
+                for method, path in (('GET', '/api/apps'),
+                                     ('GET', '/api/apps/abc'),
+                                     ('PUT', '/api/apps/abc'),
+                                     ('DELETE', '/api/apps/abc')):
+                    status, _ = server.respond(method, path)
+                    self.assertLess(status, 300)
+        finally:
+            server.stop()
+
+    def test_injected_latency_and_errors(self):
+        """Test latency and errors are injected into responses."""
+        server = swaggerconformance.stubserver.StubServer(
+            TEST_SCHEMA_PATH, latency=0.05, error_rate=1, seed=0)
+        try:
+            start_time = time.monotonic()
+            status, _ = server.respond('DELETE', '/api/apps/abc')
+            self.assertGreaterEqual(time.monotonic() - start_time, 0.05)
+            self.assertEqual(status, 500)
+            status, _ = server.respond('POST', '/api/apps/abc')
+            self.assertEqual(status, 404)
+        finally:
+            server.stop()
+
+
+class LatencyBudgetTestCase(unittest.TestCase):
+    """Tests of failing operations over their latency budgets."""
+
+    def test_budgets_declared(self):
+        """Budgets are read from the schema, files and command line, with
+        later ones and those of individual operations taking precedence."""
+        with open(TEST_SCHEMA_PATH, encoding='utf-8') as schema_file:
+            schema = json.load(schema_file)
+        schema['x-latency-budget'] = {'p99': 500}
+        schema['paths']['/apps']['get']['x-latency-budget'] = {'p95': 100}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            schema_path = osp.join(temp_dir, 'schema.json')
+            with open(schema_path, 'w', encoding='utf-8') as schema_file:
+                json.dump(schema, schema_file)
+            budgets = swaggerconformance.latency.LatencyBudgets.from_schema(
+                schema_path)
+            client = swaggerconformance.client.Client(schema_path)
+
+        budget = swaggerconformance.latency.LatencyBudget
+        collection = client.api.operation('get_apps_collection')
+        resource = client.api.operation('get_apps_resource')
+        self.assertEqual(budgets.budget_for(collection), budget(p95=0.1))
+        self.assertEqual(budgets.budget_for(resource), budget(p99=0.5))
+
+        budgets = budgets.merged(
+            swaggerconformance.latency.LatencyBudgets.from_dict(
+                {'default': {'max': 1000}}))
+        self.assertEqual(budgets.budget_for(collection), budget(p95=0.1))
+        self.assertEqual(budgets.budget_for(resource), budget(maximum=1.0))
+
+        with self.assertRaises(ValueError):
+            budget.from_dict({'p50': 10})
+
+    def test_budgets_requested(self):
+        """The command line only reads budgets from the schema if asked to,
+        and has no budgets if none are requested."""
+        from swaggerconformance.__main__ import _latency_budgets
+        arguments = argparse.Namespace(
+            schema_path=osp.join(TEST_SCHEMA_DIR, 'missing.json'),
+            schema_latency_budgets=False, latency_budgets_path=None,
+            latency_budgets=[])
+        self.assertIsNone(_latency_budgets(arguments))
+
+        budget = swaggerconformance.latency.LatencyBudget(p95=0.1)
+        arguments.latency_budgets = [(None, budget)]
+        self.assertEqual(_latency_budgets(arguments).default, budget)
+
+        arguments.schema_latency_budgets = True
+        self.assertRaises(FileNotFoundError, _latency_budgets, arguments)
+
+    def test_budgets_declared_in_yaml(self):
+        """Budgets are read from schemas written in YAML."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            schema_path = osp.join(temp_dir, 'schema.yaml')
+            with open(schema_path, 'w', encoding='utf-8') as schema_file:
+                schema_file.write("swagger: '2.0'\n"
+                                  "x-latency-budget:\n"
+                                  "  max: 250\n"
+                                  "paths: {}\n")
+            budgets = swaggerconformance.latency.LatencyBudgets.from_schema(
+                schema_path)
+
+        self.assertEqual(budgets.default,
+                         swaggerconformance.latency.LatencyBudget(
+                             maximum=0.25))
+
+    def test_budget_exceeded(self):
+        """Operations fail if their latencies exceed their budget, reporting
+        the slowest examples, and pass within it."""
+        budgets = swaggerconformance.latency.LatencyBudgets(
+            operations={'get_apps_collection':
+                            swaggerconformance.latency.LatencyBudget(
+                                maximum=0.01)})
+        with swaggerconformance.stubserver.StubServer(
+                TEST_SCHEMA_PATH, latency=0.02) as server:
+            with self.assertRaisesRegex(Exception,
+                                        "(?s)1 operation.*Latency budget "
+                                        "exceeded over \\d+ requests - max "
+                                        "latency .*Slowest examples"):
+                swaggerconformance.api_conformance_test(
+                    TEST_SCHEMA_PATH, num_tests_per_op=3,
+                    server_url=server.url, latency_budgets=budgets)
+
+            budgets.operations['get_apps_collection'].maximum = 10
+            swaggerconformance.api_conformance_test(
+                TEST_SCHEMA_PATH, num_tests_per_op=3, server_url=server.url,
+                latency_budgets=budgets)
+
+    def test_slow_responses_not_deadlined(self):
+        """Responses slower than hypothesis' default deadline fail the
+        latency budget rather than the deadline."""
+        budget = swaggerconformance.latency.LatencyBudget(maximum=0.1)
+        with swaggerconformance.stubserver.StubServer(
+                TEST_SCHEMA_PATH, latency=0.25) as server:
+            client = swaggerconformance.client.Client(
+                TEST_SCHEMA_PATH, server_url=server.url)
+            operation = client.api.operation('get_apps_collection')
+            with self.assertRaisesRegex(AssertionError,
+                                        "Latency budget exceeded"):
+                swaggerconformance.operation_conformance_test(
+                    client, operation, num_tests=2, latency_budget=budget)
+
+
+class LoadTestTestCase(unittest.TestCase):
+    """Tests of load testing an API."""
+
+    @responses.activate
+    def test_load_test(self):
+        """Requests are sent to all operations, with errors counted."""
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=500)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        results = swaggerconformance.api_load_test(TEST_SCHEMA_PATH,
+                                                   duration=0.5,
+                                                   concurrency=4,
+                                                   num_examples_per_op=5)
+
+        summary = results.summary()
+        self.assertEqual(set(summary),
+                         {"get_schema_resource", "get_apps_collection",
+                          "get_apps_resource", "put_apps_resource",
+                          "delete_apps_resource"})
+        for operation_id, operation_results in summary.items():
+            self.assertGreater(operation_results["requests"], 0)
+            self.assertGreater(operation_results["throughput"], 0)
+            self.assertLessEqual(operation_results["p50"],
+                                 operation_results["p99"])
+            expected_error_rate = \
+                1 if operation_id == "get_apps_resource" else 0
+            self.assertEqual(operation_results["error_rate"],
+                             expected_error_rate)
+
+    @responses.activate
+    def test_rate_limited(self):
+        """Requests are sent at no more than the target rate."""
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=404)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        results = swaggerconformance.api_load_test(TEST_SCHEMA_PATH,
+                                                   duration=0.5,
+                                                   concurrency=2,
+                                                   rate=20,
+                                                   num_examples_per_op=2)
+
+        num_requests = sum(operation_results["requests"] for
+                           operation_results in results.summary().values())
+        self.assertLessEqual(num_requests, 10)
+        self.assertGreater(num_requests, 0)
+
+    def test_rate_latency_from_schedule(self):
+        """At a target rate, latency includes time waiting to be sent behind
+        slow requests."""
+        client = unittest.mock.Mock()
+        client.request.side_effect = lambda *args: time.sleep(0.1)
+        operation = unittest.mock.Mock(id='getApp')
+        sender = swaggerconformance._loadtest._LoadSender(
+            client, [(operation, {})], duration=0.35, rate=100)
+        with unittest.mock.patch('swaggerconformance._loadtest.'
+                                 'check_response'):
+            sender.run()
+
+        results = sender.results.summary()["getApp"]
+        self.assertGreater(results["requests"], 2)
+        # Later requests were due long before the one thread could send them.
+        self.assertGreater(results["p99"], 0.25)
+
+    def test_operations_without_ids(self):
+        """Operations without IDs are reported by their method and path."""
+        results = swaggerconformance._loadtest.LoadTestResults()
+        for method in ('get', 'put'):
+            results.record(unittest.mock.Mock(id=None, method=method,
+                                              path='/apps'), 0.5)
+        results.finish()
+
+        self.assertEqual(set(results.summary()), {'GET /apps', 'PUT /apps'})
+        self.assertEqual(len(results.report().splitlines()), 3)
+
+    @responses.activate
+    def test_running_as_module(self):
+        """Running __main__ with ``load`` prints a report of the results."""
+        from swaggerconformance.__main__ import main as dunder_main
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=404)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+        with unittest.mock.patch('sys.stdout',
+                                 new_callable=io.StringIO) as stdout:
+            dunder_main(['load', TEST_SCHEMA_PATH, '-d', '0.2', '-c', '2',
+                         '-n', '2'])
+
+        report = stdout.getvalue().splitlines()
+        self.assertEqual(report[0].split(), ["operation", "requests", "errors",
+                                             "req/s", "p50", "p95", "p99"])
+        self.assertEqual(len(report), 1 + 5)
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    """Tests of timing the phases of testing examples."""
+
+    @staticmethod
+    def _respond_successfully():
+        respond_to_get('/schema')
+        respond_to_get('/apps', response_json=[{'name': 'test'}])
+        respond_to_get(r'/apps/.+', status=404)
+        respond_to_put(r'/apps/.+', status=204)
+        respond_to_delete(r'/apps/.+', status=204)
+
+    @responses.activate
+    def test_all_phases_timed(self):
+        """Every phase of every example is timed."""
+        self._respond_successfully()
+        timings = swaggerconformance.instrumentation.Timings()
+        sink = io.StringIO()
+        swaggerconformance.api_conformance_test(TEST_SCHEMA_PATH,
+                                                num_tests_per_op=5,
+                                                results_sink=sink,
+                                                instrumentation=timings)
+
+        num_requests = len(sink.getvalue().splitlines())
+        summary = timings.summary()
+        self.assertEqual(len(summary), 5)
+        self.assertEqual(
+            sum(phases["send"]["count"] for phases in summary.values()),
+            num_requests)
+        for phases in summary.values():
+            self.assertEqual(set(phases),
+                             set(swaggerconformance.instrumentation.PHASES))
+            counts = {timings["count"] for timings in phases.values()}
+            self.assertEqual(len(counts), 1)
+            for timings in phases.values():
+                self.assertGreaterEqual(timings["total"], 0)
+                self.assertLessEqual(timings["p50"], timings["p95"])
+                self.assertLessEqual(timings["p95"], timings["p99"])
+
+    @responses.activate
+    def test_timings_printed(self):
+        """Running __main__ can print a report of the timings."""
+        from swaggerconformance.__main__ import main as dunder_main
+        self._respond_successfully()
+        with unittest.mock.patch('sys.stdout',
+                                 new_callable=io.StringIO) as stdout:
+            dunder_main([TEST_SCHEMA_PATH, '-n', '3', '--timings'])
+
+        report = stdout.getvalue().splitlines()
+        self.assertEqual(report[0].split(), ["operation", "phase", "count",
+                                             "total", "max", "p50", "p95",
+                                             "p99"])
+        self.assertEqual(len(report), 1 + 5 * 5)
+
+    def test_percentile(self):
+        """Percentiles are found by the nearest rank method."""
+        percentile = swaggerconformance.instrumentation.percentile
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([3], 95), 3)
+        self.assertIsNone(percentile([], 50))
+
+    def test_duration_stats_streamed(self):
+        """Durations are aggregated without keeping all of them."""
+        stats = swaggerconformance.instrumentation.DurationStats(
+            sample_size=10)
+        for duration in range(1, 1001):
+            stats.add(duration)
+
+        summary = stats.summary()
+        self.assertEqual(summary["count"], 1000)
+        self.assertEqual(summary["total"], 500500)
+        self.assertEqual(summary["max"], 1000)
+        self.assertLessEqual(len(stats._sample), 10)  # pylint: disable=protected-access
+        self.assertLessEqual(summary["p50"], summary["p99"])
+
+    def test_operations_without_ids(self):
+        """Operations without IDs are timed by their method and path."""
+        timings = swaggerconformance.instrumentation.Timings()
+        for method in ('get', 'put'):
+            operation = unittest.mock.Mock(id=None, method=method,
+                                           path='/apps')
+            timings.record(operation, "send", 0.5)
+        operation = unittest.mock.Mock(id='getApp')
+        timings.record(operation, "send", 0.25)
+
+        self.assertEqual(set(timings.summary()),
+                         {'GET /apps', 'PUT /apps', 'getApp'})
+        self.assertEqual(len(timings.report().splitlines()), 4)
+
+
 class ResponseTestCase(unittest.TestCase):
     """Test the Response class."""
 
@@ -425,6 +1970,30 @@ class ResponseTestCase(unittest.TestCase):
         response = swaggerconformance.response.Response(raw_response)
         assert response.headers['CoNTenT-tyPe'] == [content_type]
 
+    def test_headers_built_once(self):
+        """The headers mapping is only built once per response."""
+        raw_response = unittest.mock.Mock()
+        raw_response.header = {'Content-Type': ['application/json']}
+        response = swaggerconformance.response.Response(raw_response)
+        self.assertIs(response.headers, response.headers)
+
+    def test_insensitive_headers_mapping(self):
+        """Header mappings support standard lookups and iteration, combining
+        values of headers whose names only differ by case."""
+        headers = swaggerconformance.response.CaseInsensitiveDict(
+            [('Set-Cookie', ['a=1']), ('X-Count', '1'),
+             ('set-cookie', ['b=2'])])
+        self.assertEqual(len(headers), 2)
+        self.assertEqual(list(headers), ['Set-Cookie', 'X-Count'])
+        self.assertEqual(headers['SET-COOKIE'], ['a=1', 'b=2'])
+        self.assertIn('x-count', headers)
+        self.assertNotIn('Content-Type', headers)
+        self.assertEqual(headers.get('x-COUNT'), '1')
+        self.assertIsNone(headers.get('Content-Type'))
+        self.assertEqual(headers, {'Set-Cookie': ['a=1', 'b=2'],
+                                   'X-Count': '1'})
+        self.assertIn("'X-Count': '1'", repr(headers))
+
 
 if __name__ == '__main__':
     unittest.main()